@@ -4,11 +4,12 @@ Script para agregar un nuevo aparato biométrico a la base de datos
 """
 
 import sys
-from database import connect_db
+from database import connect_db, invalidar_cache_aparatos
+from registro_eventos import configurar_registro
 import logging
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configurar_registro()
 logger = logging.getLogger(__name__)
 
 def agregar_aparato_biometrico(nombre, serial, ip_address=None, puerto=4370, ubicacion=None):
@@ -54,6 +55,7 @@ def agregar_aparato_biometrico(nombre, serial, ip_address=None, puerto=4370, ubi
         aparato_id = cursor.fetchone()[0]
         
         conn.commit()
+        invalidar_cache_aparatos(aparato_id)
         
         logger.info(f"[OK] Aparato biométrico agregado exitosamente:")
         logger.info(f"   ID: {aparato_id}")
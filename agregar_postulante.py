@@ -7,7 +7,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 from database import connect_db, agregar_postulante, USUARIO_ACTUAL
-from zkteco_connector_v2 import ZKTecoK40V2
+from sesiones_zkteco import obtener_sesion
+from espejo_usuarios_zkteco import espejo_de
 import psycopg2
 import bcrypt
 import ctypes
@@ -27,7 +28,8 @@ def obtener_serial_desde_hardware(ip="192.168.100.201", puerto=4370, intentos=3)
     Si fallan todos los intentos, retorna None para indicar que no hay conexión.
     """
     try:
-        zkteco = ZKTecoK40V2(ip, puerto)
+        # Sesión compartida: si otra ventana ya está conectada no hay handshake
+        zkteco = obtener_sesion(ip, puerto)
         
         for intento in range(intentos):
             try:
@@ -780,14 +782,14 @@ Por favor verifique:
             return
             
         try:
-            # Obtener solo los últimos 5 usuarios para optimizar rendimiento
-            usuarios = self.zkteco.get_user_list(count=5, include_fingerprints=False)
+            # El espejo local solo descarga la tabla si cambió la cantidad de usuarios
+            espejo = espejo_de(self.zkteco)
+            espejo.sincronizar(self.zkteco)
+            uid_mas_alto = espejo.max_uid()
             
-            if usuarios:
-                # Encontrar el UID más alto entre los últimos 5 usuarios
-                uid_mas_alto = max(usuarios, key=lambda u: int(u['uid']))['uid']
+            if uid_mas_alto is not None:
                 self.entry_id_k40.set(str(uid_mas_alto))
-                print(f"[OK] ID más alto detectado en K40 (últimos 5 usuarios): {uid_mas_alto}")
+                print(f"[OK] ID más alto detectado en K40: {uid_mas_alto}")
             else:
                 print("[WARN] No hay usuarios registrados en el K40")
                 self.entry_id_k40.set("")
@@ -798,7 +800,7 @@ Por favor verifique:
     def establecer_conexion_zkteco(self):
         """Establece una conexión única al ZKTeco que se mantendrá abierta"""
         try:
-            self.zkteco = ZKTecoK40V2('192.168.100.201', 4370)
+            self.zkteco = obtener_sesion('192.168.100.201', 4370)
             if self.zkteco.connect():
                 self.zkteco_connected = True
                 print("[OK] Conexión ZKTeco establecida y mantenida")
@@ -1031,8 +1033,15 @@ Por favor verifique:
 
             try:
                 self.mostrar_estado("Obteniendo lista de usuarios...")
-                # Obtener solo los últimos 5 usuarios para optimizar rendimiento
-                usuarios = self.zkteco.get_user_list(count=5, include_fingerprints=False)
+                # Últimos 5 usuarios, con la tabla recién descargada: si otra estación
+                # borró y agregó un usuario la cantidad coincide aunque la tabla cambió,
+                # y set_user sobrescribiría a otra persona
+                espejo = espejo_de(self.zkteco)
+                if not espejo.sincronizar(self.zkteco, forzar=True):
+                    self.ocultar_estado()
+                    messagebox.showerror("Error", "No se pudo obtener la lista de usuarios del K40.")
+                    return
+                usuarios = espejo.ultimos(5)
 
                 if not usuarios:
                     self.ocultar_estado()
@@ -1105,6 +1114,7 @@ Por favor verifique:
                     # Verificar si la actualización en K40 fue exitosa
                     if resultado_k40:
                         k40_actualizado = True
+                        espejo.actualizar_usuario(usuario_uid, name=f"{nombre} {apellido}")
                         print(f"[OK] Usuario {usuario_id_actual} actualizado en K40 sin perder la huella.")
                     else:
                         self.ocultar_estado()
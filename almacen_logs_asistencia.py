@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Almacén columnar en memoria de registros de asistencia
+
+Los registros descargados de un dispositivo (o leídos del almacén local)
+llegan como una lista de diccionarios. Aquí se guardan en columnas
+compactas, ordenadas una sola vez por fecha:
+
+- fecha y hora como segundos epoch en un array('q');
+- user_id internado: cada ID distinto se guarda una vez y los registros
+  llevan su código en un array('I');
+- punch y status como bytes.
+
+Con las fechas ordenadas, un rango de fechas es un par de búsquedas
+binarias y un corte de arrays; los registros de hoy se cuentan igual, y
+los usuarios únicos con un set() sobre la columna de códigos. Las fechas
+y horas se formatean solo al mostrar o exportar, una vez por día.
+"""
+
+import logging
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Marca de los registros sin fecha (quedan al principio del orden)
+SIN_FECHA = -(2 ** 63)
+
+# Segundos de un día sin cambio de horario
+SEGUNDOS_DIA = 86400
+
+# user_id de los registros sin usuario ('N/A' es el relleno de get_attendance_logs)
+SIN_USUARIO = ('', 'N/A')
+
+
+def epoch_de(valor):
+    """
+    Convertir la fecha de un registro a segundos epoch
+
+    Args:
+        valor: datetime (hora local) o número de segundos
+
+    Returns:
+        int: Segundos epoch, o SIN_FECHA si no hay fecha válida
+    """
+    if not valor:
+        return SIN_FECHA
+    try:
+        if isinstance(valor, datetime):
+            return int(valor.timestamp())
+        return int(valor)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return SIN_FECHA
+
+
+def _entero(valor):
+    """Valor numérico de un campo del registro; 0 si falta o no es entero ('N/A')"""
+    return valor if isinstance(valor, int) else 0
+
+
+def inicio_dia(dia):
+    """Segundos epoch de la medianoche local de un día (date)"""
+    return int(datetime(dia.year, dia.month, dia.day).timestamp())
+
+
+class AlmacenLogs:
+    """Registros de asistencia en columnas, ordenados por fecha ascendente"""
+
+    def __init__(self, logs=()):
+        """
+        Construir el almacén a partir de registros con las claves de
+        ZKTecoK40V2.get_attendance_logs (user_id, timestamp, status, punch, uid)
+
+        Args:
+            logs (iterable): Registros en cualquier orden
+        """
+        self.usuarios = []   # código -> user_id
+        self._codigos = {}   # user_id -> código
+
+        tiempos, codigos, punches, estados, uids = [], [], [], [], []
+        for log in logs:
+            tiempos.append(epoch_de(log.get('timestamp')))
+            codigos.append(self._internar(log.get('user_id')))
+            punches.append(_entero(log.get('punch')) & 0xFF)
+            estados.append(_entero(log.get('status')) & 0xFF)
+            uids.append(_entero(log.get('uid')))
+
+        # Ordenamiento estable por fecha, una sola vez
+        orden = sorted(range(len(tiempos)), key=tiempos.__getitem__)
+        self.tiempos = array('q', map(tiempos.__getitem__, orden))
+        self.codigos = array('I', map(codigos.__getitem__, orden))
+        self.punches = bytearray(map(punches.__getitem__, orden))
+        self.estados = bytearray(map(estados.__getitem__, orden))
+        self.uids = array('q', map(uids.__getitem__, orden))
+
+    def _internar(self, user_id):
+        user_id = '' if user_id is None else str(user_id)
+        codigo = self._codigos.get(user_id)
+        if codigo is None:
+            codigo = self._codigos[user_id] = len(self.usuarios)
+            self.usuarios.append(user_id)
+        return codigo
+
+    def _derivado(self, tiempos, codigos, punches, estados, uids):
+        """Almacén con columnas ya ordenadas que comparte la tabla de usuarios"""
+        nuevo = AlmacenLogs.__new__(AlmacenLogs)
+        nuevo.usuarios = self.usuarios
+        nuevo._codigos = self._codigos
+        nuevo.tiempos = tiempos
+        nuevo.codigos = codigos
+        nuevo.punches = punches
+        nuevo.estados = estados
+        nuevo.uids = uids
+        return nuevo
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    # ------------------------------------------------------------------
+    # Selección
+    # ------------------------------------------------------------------
+
+    def posiciones_entre(self, desde=None, hasta=None):
+        """
+        Posiciones [inicio, fin) de los registros con desde <= fecha < hasta
+
+        Args:
+            desde (int, optional): Segundos epoch incluidos; None = sin límite
+            hasta (int, optional): Segundos epoch excluidos; None = sin límite
+
+        Returns:
+            tuple: (inicio, fin)
+        """
+        inicio = 0 if desde is None else bisect_left(self.tiempos, desde)
+        fin = len(self.tiempos) if hasta is None else bisect_left(self.tiempos, hasta)
+        return inicio, max(inicio, fin)
+
+    def rebanada(self, inicio, fin):
+        """Almacén con los registros de las posiciones [inicio, fin)"""
+        return self._derivado(self.tiempos[inicio:fin], self.codigos[inicio:fin],
+                              self.punches[inicio:fin], self.estados[inicio:fin],
+                              self.uids[inicio:fin])
+
+    def entre(self, desde=None, hasta=None):
+        """Almacén con los registros de un rango de fechas (ver posiciones_entre)"""
+        return self.rebanada(*self.posiciones_entre(desde, hasta))
+
+    def seleccionar(self, posiciones):
+        """
+        Almacén con los registros de las posiciones dadas (en orden ascendente,
+        así el resultado sigue ordenado por fecha)
+        """
+        posiciones = array('I', posiciones)
+        return self._derivado(array('q', map(self.tiempos.__getitem__, posiciones)),
+                              array('I', map(self.codigos.__getitem__, posiciones)),
+                              bytearray(map(self.punches.__getitem__, posiciones)),
+                              bytearray(map(self.estados.__getitem__, posiciones)),
+                              array('q', map(self.uids.__getitem__, posiciones)))
+
+    def consultar(self, desde=None, hasta=None, coincide_usuario=None):
+        """
+        Registros de un rango de días y, opcionalmente, de ciertos usuarios.
+        El rango se convierte una vez a límites epoch y se resuelve con dos
+        búsquedas binarias; el filtro de usuario se evalúa una vez por user_id
+        distinto, no por registro.
+
+        Args:
+            desde (date, optional): Primer día incluido
+            hasta (date, optional): Último día incluido
+            coincide_usuario (callable, optional): Recibe un user_id y devuelve
+                True si sus registros se incluyen
+
+        Returns:
+            AlmacenLogs: Registros seleccionados, ordenados por fecha
+        """
+        inicio, fin = self.posiciones_entre(
+            inicio_dia(desde) if desde else None,
+            inicio_dia(hasta + timedelta(days=1)) if hasta else None)
+        if coincide_usuario is None:
+            return self.rebanada(inicio, fin)
+
+        incluidos = {codigo for codigo, user_id in enumerate(self.usuarios)
+                     if coincide_usuario(user_id)}
+        if not incluidos:
+            return self.rebanada(0, 0)
+        codigos = self.codigos
+        return self.seleccionar(p for p in range(inicio, fin) if codigos[p] in incluidos)
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def contar_entre(self, desde=None, hasta=None):
+        """Cantidad de registros con desde <= fecha < hasta"""
+        inicio, fin = self.posiciones_entre(desde, hasta)
+        return fin - inicio
+
+    def contar_dia(self, dia=None):
+        """Cantidad de registros de un día (date; None = hoy)"""
+        dia = dia or date.today()
+        return self.contar_entre(inicio_dia(dia), inicio_dia(dia + timedelta(days=1)))
+
+    def conteo_por_dia(self):
+        """
+        Cantidad de registros por día, saltando de un día al siguiente con
+        búsqueda binaria (costo proporcional a los días, no a los registros)
+
+        Returns:
+            list: [(date, cantidad)] en orden cronológico (sin registros sin fecha)
+        """
+        tiempos = self.tiempos
+        posicion, total = bisect_left(tiempos, SIN_FECHA + 1), len(tiempos)
+        conteos = []
+        while posicion < total:
+            dia = datetime.fromtimestamp(tiempos[posicion]).date()
+            siguiente = bisect_left(tiempos, inicio_dia(dia + timedelta(days=1)), posicion)
+            conteos.append((dia, siguiente - posicion))
+            posicion = siguiente
+        return conteos
+
+    def conteo_por_usuario(self):
+        """
+        Returns:
+            dict: {user_id: cantidad de registros}
+        """
+        return {self.usuarios[codigo]: cantidad
+                for codigo, cantidad in Counter(self.codigos).items()}
+
+    def usuarios_unicos(self):
+        """Cantidad de user_id distintos (sin contar registros sin usuario)"""
+        codigos = set(self.codigos)
+        return len(codigos) - sum(self._codigos.get(vacio) in codigos for vacio in SIN_USUARIO)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def registro(self, posicion):
+        """Registro de una posición con las claves de get_attendance_logs"""
+        tiempo = self.tiempos[posicion]
+        return {
+            'user_id': self.usuarios[self.codigos[posicion]],
+            'timestamp': None if tiempo == SIN_FECHA else datetime.fromtimestamp(tiempo),
+            'status': self.estados[posicion],
+            'punch': self.punches[posicion],
+            'uid': self.uids[posicion],
+        }
+
+    def filas(self, inicio=0, fin=None, recientes_primero=False):
+        """
+        Generar (user_id, fecha 'DD/MM/AAAA', hora 'HH:MM:SS') de las posiciones
+        [inicio, fin). La fecha se formatea una vez por día y la hora se
+        calcula desde la medianoche (salvo en días con cambio de horario).
+
+        Args:
+            inicio (int): Primera posición en el orden pedido
+            fin (int, optional): Posición final (excluida); None = hasta el final
+            recientes_primero (bool): Recorrer de la fecha más reciente a la más antigua
+        """
+        total = len(self.tiempos)
+        fin = total if fin is None else min(fin, total)
+        if recientes_primero:
+            posiciones = range(total - 1 - inicio, total - 1 - fin, -1)
+        else:
+            posiciones = range(inicio, fin)
+
+        tiempos, codigos, usuarios = self.tiempos, self.codigos, self.usuarios
+        dia_desde = dia_hasta = None
+        fecha = None
+        medianoche = None
+        for posicion in posiciones:
+            tiempo = tiempos[posicion]
+            usuario = usuarios[codigos[posicion]]
+            if tiempo == SIN_FECHA:
+                yield usuario, "N/A", "N/A"
+                continue
+
+            if dia_desde is None or not dia_desde <= tiempo < dia_hasta:
+                momento = datetime.fromtimestamp(tiempo)
+                dia = momento.date()
+                fecha = momento.strftime('%d/%m/%Y')
+                dia_desde = inicio_dia(dia)
+                dia_hasta = inicio_dia(dia + timedelta(days=1))
+                # Día con cambio de horario: la hora se formatea registro por registro
+                medianoche = dia_desde if dia_hasta - dia_desde == SEGUNDOS_DIA else None
+
+            if medianoche is None:
+                hora = datetime.fromtimestamp(tiempo).strftime('%H:%M:%S')
+            else:
+                minutos, segundos = divmod(tiempo - medianoche, 60)
+                horas, minutos = divmod(minutos, 60)
+                hora = f"{horas:02d}:{minutos:02d}:{segundos:02d}"
+            yield usuario, fecha, hora
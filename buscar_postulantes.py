@@ -3,10 +3,22 @@
 Módulo para buscar postulantes en el sistema
 """
 
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import buscar_postulante, eliminar_postulante, get_postulantes, obtener_postulante_por_id, obtener_nombre_registrador, obtener_nombre_aparato
+from database import BusquedaIncremental, eliminar_postulante, get_postulantes, obtener_postulante_por_id, obtener_nombre_registrador, obtener_nombre_aparato
 from editar_postulante import EditarPostulante
+from tabla_virtual import TablaVirtual, VistaFilas
+from tareas_segundo_plano import CargadorSegundoPlano
+
+# Milisegundos sin teclear antes de lanzar la búsqueda incremental
+RETARDO_BUSQUEDA_MS = 150
+
+# Caracteres mínimos para buscar mientras se escribe
+MINIMO_CARACTERES = 2
+
+# Intervalo de revisión de los lotes recibidos mientras hay una búsqueda en curso
+INTERVALO_LOTES_MS = 30
 
 class BuscarPostulantes(tk.Toplevel):
     def __init__(self, parent, user_data):
@@ -20,6 +32,17 @@ class BuscarPostulantes(tk.Toplevel):
         self.total_items = 0
         self.all_postulantes = []
         
+        # Búsqueda en segundo plano: una consulta a la vez, con una sola conexión
+        self.busqueda = BusquedaIncremental()
+        self.cargador = CargadorSegundoPlano(self, max_workers=1, intervalo_ms=20, nombre='busqueda')
+        self.generacion = 0             # Búsqueda vigente (devuelta por BusquedaIncremental.cancelar)
+        self.generacion_mostrada = None # Búsqueda cuyos resultados están en la tabla
+        self.buscando = False
+        self.busqueda_pendiente = None  # after() del retardo entre teclas
+        self.revision_lotes = None
+        self.lotes_recibidos = []       # (generación, filas) escritos por el hilo de trabajo
+        self.lotes_lock = threading.Lock()
+        
         self.title("Buscar Postulantes")
         self.geometry('')
         self.resizable(True, True)
@@ -31,6 +54,18 @@ class BuscarPostulantes(tk.Toplevel):
         self.setup_ui()
         self.center_window()
         
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+    def on_closing(self):
+        """Cancelar la búsqueda en curso y cerrar la ventana"""
+        self.cancel_pending_search()
+        if self.revision_lotes is not None:
+            self.after_cancel(self.revision_lotes)
+            self.revision_lotes = None
+        self.cargador.cerrar()
+        self.busqueda.cerrar()
+        self.destroy()
+        
     def setup_styles(self):
         """Configurar estilos modernos"""
         style = ttk.Style()
@@ -138,11 +173,16 @@ class BuscarPostulantes(tk.Toplevel):
         ttk.Button(button_frame, text="Limpiar", style='Modern.TButton',
                   command=self.clear_search).pack(side='left')
         
+        self.incremental_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(button_frame, text="Buscar mientras escribe",
+                       variable=self.incremental_var).pack(side='left', padx=(20, 0))
+        
         # Configurar grid
         grid_frame.columnconfigure(1, weight=1)
         
         # Configurar eventos
         self.search_entry.bind('<Return>', lambda e: self.search_postulantes())
+        self.search_term.trace_add('write', self.on_search_term_change)
         
     def create_results_table(self, parent):
         """Crear tabla de resultados con diseño mejorado"""
@@ -150,9 +190,10 @@ class BuscarPostulantes(tk.Toplevel):
         table_frame = ttk.Frame(parent, style='Modern.TFrame')
         table_frame.pack(fill='both', expand=True, pady=(0, 15))
         
-        # Crear Treeview con estilos modernos (cambiar ID por Aparato)
+        # Crear tabla virtual con estilos modernos (cambiar ID por Aparato)
         columns = ('Aparato', 'Nombre', 'Apellido', 'Cédula', 'Teléfono', 'Fecha Registro')
-        self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=15)
+        self.tabla = TablaVirtual(table_frame, columns, height=15)
+        self.tree = self.tabla.tree
         
         # Configurar columnas con mejor formato
         self.tree.heading('Aparato', text='Aparato Biométrico - Dedo')
@@ -170,13 +211,8 @@ class BuscarPostulantes(tk.Toplevel):
         self.tree.column('Teléfono', width=120, minwidth=100, anchor='center')
         self.tree.column('Fecha Registro', width=140, minwidth=120, anchor='center')
         
-        # Scrollbar moderno
-        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Empaquetar con mejor distribución
-        self.tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        # Empaquetar con mejor distribución (la tabla incluye su scrollbar)
+        self.tabla.pack(side='left', fill='both', expand=True)
         
         # Configurar eventos
         self.tree.bind('<Double-1>', self.on_item_double_click)
@@ -232,6 +268,31 @@ class BuscarPostulantes(tk.Toplevel):
         self.search_entry.delete(0, tk.END)
         self.search_entry.focus()
             
+    def on_search_term_change(self, *args):
+        """Programar la búsqueda incremental cuando se deja de teclear"""
+        if not self.incremental_var.get():
+            return
+        if self.busqueda_pendiente is not None:
+            self.after_cancel(self.busqueda_pendiente)
+        self.busqueda_pendiente = self.after(RETARDO_BUSQUEDA_MS, self.incremental_search)
+        
+    def incremental_search(self):
+        """Buscar el término actual sin mensajes (búsqueda mientras se escribe)"""
+        self.busqueda_pendiente = None
+        search_term = self.search_term.get().strip()
+        
+        if len(search_term) < MINIMO_CARACTERES:
+            self.cancel_pending_search()
+            self.all_postulantes = []
+            self.total_items = 0
+            self.current_page = 1
+            self.update_pagination()
+            self.tabla.limpiar()
+            self.info_label.config(text="Ingrese criterios de búsqueda para comenzar")
+            return
+        
+        self.start_search(search_term, self.search_type.get(), manual=False)
+        
     def search_postulantes(self):
         """Buscar postulantes con paginación"""
         search_term = self.search_term.get().strip()
@@ -240,20 +301,96 @@ class BuscarPostulantes(tk.Toplevel):
         if not search_term:
             messagebox.showwarning("Advertencia", "Por favor ingrese un término de búsqueda")
             return
+        
+        self.start_search(search_term, search_type, manual=True)
+        
+    def cancel_pending_search(self):
+        """Descartar la búsqueda programada y cancelar la que está en curso"""
+        if self.busqueda_pendiente is not None:
+            self.after_cancel(self.busqueda_pendiente)
+            self.busqueda_pendiente = None
+        self.cargador.cancelar('busqueda')
+        self.generacion = self.busqueda.cancelar()
+        self.buscando = False
+        
+    def start_search(self, search_term, search_type, manual):
+        """
+        Lanzar una búsqueda en segundo plano, reemplazando la anterior
+        
+        Args:
+            search_term (str): Término de búsqueda
+            search_type (str): 'cedula' o 'nombre'
+            manual (bool): Pedida con el botón o Enter (avisa si no hay resultados)
+        """
+        self.cancel_pending_search()
+        generacion = self.generacion
+        criterios = {'cedula': search_term} if search_type == "cedula" else {'nombre': search_term}
+        
+        self.buscando = True
+        self.info_label.config(text="Buscando...")
+        self.cargador.enviar(
+            'busqueda', self.busqueda.buscar,
+            lambda filas: self.on_search_done(generacion, filas, search_term, search_type, manual),
+            generacion,
+            al_lote=lambda lote: self.receive_batch(generacion, lote),
+            al_fallar=self.on_search_error,
+            **criterios)
+        self.schedule_batch_check()
+        
+    def receive_batch(self, generacion, lote):
+        """Guardar un lote de filas (llamado desde el hilo de trabajo)"""
+        with self.lotes_lock:
+            self.lotes_recibidos.append((generacion, lote))
             
-        # Realizar búsqueda
-        if search_type == "cedula":
-            self.all_postulantes = buscar_postulante(cedula=search_term)
-        else:
-            self.all_postulantes = buscar_postulante(nombre=search_term)
+    def schedule_batch_check(self):
+        """Revisar los lotes recibidos mientras la búsqueda siga en curso"""
+        if self.revision_lotes is None:
+            self.revision_lotes = self.after(INTERVALO_LOTES_MS, self.check_batches)
+            
+    def check_batches(self):
+        """Mostrar los lotes llegados desde la última revisión"""
+        self.revision_lotes = None
+        self.apply_batches()
+        if self.buscando:
+            self.schedule_batch_check()
             
+    def apply_batches(self):
+        """Agregar a los resultados los lotes de la búsqueda vigente"""
+        with self.lotes_lock:
+            lotes, self.lotes_recibidos = self.lotes_recibidos, []
+        lotes = [lote for generacion, lote in lotes if generacion == self.generacion]
+        if not lotes:
+            return
+        
+        # El primer lote de una búsqueda nueva reemplaza los resultados anteriores
+        if self.generacion_mostrada != self.generacion:
+            self.generacion_mostrada = self.generacion
+            self.all_postulantes = []
+            self.current_page = 1
+        for lote in lotes:
+            self.all_postulantes.extend(lote)
         self.total_items = len(self.all_postulantes)
-        self.current_page = 1
         self.update_pagination()
-        self.display_current_page()
+        self.display_current_page(conservar_posicion=True)
+        
+    def on_search_done(self, generacion, filas, search_term, search_type, manual):
+        """Mostrar el resultado completo de una búsqueda"""
+        if filas is None or generacion != self.generacion:
+            return  # Reemplazada por otra búsqueda
+        
+        self.apply_batches()
+        nueva = self.generacion_mostrada != generacion
+        self.generacion_mostrada = generacion
+        self.buscando = False
+        self.all_postulantes = filas
+        self.total_items = len(filas)
+        if nueva:
+            self.current_page = 1
+        self.update_pagination()
+        self.display_current_page(conservar_posicion=not nueva)
         
-        # Mostrar mensaje si no hay resultados
-        if self.total_items == 0:
+        # Mostrar mensaje si no hay resultados (solo en búsquedas pedidas con el botón)
+        if self.total_items == 0 and manual:
             messagebox.showinfo("Sin resultados", 
                               f"No se encontraron postulantes con {search_type} '{search_term}'.\n\n"
                               "Sugerencias:\n"
@@ -262,9 +399,15 @@ class BuscarPostulantes(tk.Toplevel):
                               "• Use solo números para cédula\n"
                               "• Use solo letras para nombre")
             
+    def on_search_error(self, error):
+        """Informar un error de búsqueda"""
+        self.buscando = False
+        self.info_label.config(text=f"Error al buscar postulantes: {error}")
+            
     def clear_search(self):
         """Limpiar búsqueda"""
         self.search_term.set("")
+        self.cancel_pending_search()
         self.all_postulantes = []
         self.total_items = 0
         self.current_page = 1
@@ -272,13 +415,15 @@ class BuscarPostulantes(tk.Toplevel):
         self.display_current_page()
         self.info_label.config(text="Ingrese criterios de búsqueda para comenzar")
         
-    def display_current_page(self):
-        """Mostrar la página actual"""
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
+    def display_current_page(self, conservar_posicion=False):
+        """
+        Mostrar la página actual
+        
+        Args:
+            conservar_posicion (bool): Mantener desplazamiento y selección (al llegar más filas)
+        """
         if not self.all_postulantes:
+            self.tabla.limpiar()
             self.info_label.config(text="No se encontraron postulantes")
             return
             
@@ -287,33 +432,40 @@ class BuscarPostulantes(tk.Toplevel):
         end_idx = start_idx + self.items_per_page
         page_items = self.all_postulantes[start_idx:end_idx]
         
-        # Mostrar elementos de la página actual
-        for postulante in page_items:
-            fecha_registro = postulante[6].strftime('%d/%m/%Y') if postulante[6] else 'N/A'
-            
-            # Obtener nombre del aparato biométrico y dedo
-            # Los índices están basados en la consulta de buscar_postulante:
-            # id, nombre, apellido, cedula, fecha_nacimiento, telefono, fecha_registro, 
-            # usuario_registrador, registrado_por, aparato_id, dedo_registrado, usuario_ultima_edicion, fecha_ultima_edicion
-            
-            aparato_id = postulante[9]  # aparato_id está en la posición 9
-            nombre_aparato = obtener_nombre_aparato(aparato_id)
-            dedo_registrado = postulante[10] or 'N/A'  # dedo_registrado está en la posición 10
-            aparato_dedo = f"{nombre_aparato} - {dedo_registrado}"
-            
-            self.tree.insert('', 'end', values=(
-                aparato_dedo,  # Aparato biométrico - Dedo
-                postulante[1],  # Nombre
-                postulante[2],  # Apellido
-                postulante[3],  # Cédula
-                postulante[5] or 'N/A',  # Teléfono
-                fecha_registro
-            ))
+        # Las filas se formatean al mostrarse (solo las visibles)
+        filas = VistaFilas(page_items, self.valores_fila)
+        if conservar_posicion:
+            self.tabla.actualizar(filas)
+        else:
+            self.tabla.mostrar(filas)
             
         # Actualizar información
         total_pages = (self.total_items + self.items_per_page - 1) // self.items_per_page
         self.info_label.config(text=f"Mostrando {len(page_items)} de {self.total_items} postulante(s) - Página {self.current_page} de {total_pages}")
         
+    def valores_fila(self, postulante):
+        """Valores de la tabla para un postulante"""
+        fecha_registro = postulante[6].strftime('%d/%m/%Y') if postulante[6] else 'N/A'
+        
+        # Obtener nombre del aparato biométrico y dedo
+        # Los índices están basados en la consulta de buscar_postulante:
+        # id, nombre, apellido, cedula, fecha_nacimiento, telefono, fecha_registro, 
+        # usuario_registrador, registrado_por, aparato_id, dedo_registrado, usuario_ultima_edicion, fecha_ultima_edicion
+        
+        aparato_id = postulante[9]  # aparato_id está en la posición 9
+        nombre_aparato = obtener_nombre_aparato(aparato_id)
+        dedo_registrado = postulante[10] or 'N/A'  # dedo_registrado está en la posición 10
+        aparato_dedo = f"{nombre_aparato} - {dedo_registrado}"
+        
+        return (
+            aparato_dedo,  # Aparato biométrico - Dedo
+            postulante[1],  # Nombre
+            postulante[2],  # Apellido
+            postulante[3],  # Cédula
+            postulante[5] or 'N/A',  # Teléfono
+            fecha_registro
+        )
+        
     def update_pagination(self):
         """Actualizar controles de paginación"""
         total_pages = (self.total_items + self.items_per_page - 1) // self.items_per_page
@@ -972,15 +1124,14 @@ class BuscarPostulantes(tk.Toplevel):
         search_term = self.search_term.get().strip()
         search_type = self.search_type.get()
         
-        # Realizar búsqueda nuevamente
+        # Realizar búsqueda nuevamente (en segundo plano)
         if search_term:
-            if search_type == "cedula":
-                self.all_postulantes = buscar_postulante(cedula=search_term)
-            else:
-                self.all_postulantes = buscar_postulante(nombre=search_term)
-        else:
-            # Si no hay término de búsqueda, mostrar todos
-            self.all_postulantes = get_postulantes()
+            self.start_search(search_term, search_type, manual=False)
+            return
+        
+        # Si no hay término de búsqueda, mostrar todos
+        self.cancel_pending_search()
+        self.all_postulantes = get_postulantes()
             
         self.total_items = len(self.all_postulantes)
         self.current_page = 1
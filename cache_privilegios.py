@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Matriz de privilegios en memoria para Sistema QUIRA
+
+Carga la tabla privilegios una vez por sesión en una matriz inmutable
+(rol, permiso) -> activo. Se refresca cuando otro proceso notifica un cambio
+vía LISTEN/NOTIFY de PostgreSQL, con un TTL como respaldo si la escucha no
+está disponible.
+"""
+
+import logging
+import select
+import threading
+import time
+from types import MappingProxyType
+
+import psycopg2
+from psycopg2 import extensions
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Canal de notificación usado por database.actualizar_privilegio
+CANAL_PRIVILEGIOS = 'privilegios_cambiados'
+
+# Segundos máximos que la matriz se considera vigente sin notificaciones
+TTL_PRIVILEGIOS = 300
+
+
+class MatrizPrivilegios:
+    """Matriz inmutable rol→permiso con refresco por notificación y TTL"""
+
+    def __init__(self, ttl=TTL_PRIVILEGIOS):
+        """
+        Inicializar matriz (vacía hasta la primera consulta)
+
+        Args:
+            ttl (float): Segundos de vigencia de la matriz cargada
+        """
+        self.ttl = ttl
+        self._matriz = MappingProxyType({})
+        self._cargada = False
+        self._cargada_en = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo_escucha = None
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _vigente(self):
+        return (self._cargada_en is not None
+                and time.monotonic() - self._cargada_en < self.ttl)
+
+    def recargar(self):
+        """
+        Leer la tabla privilegios completa y reemplazar la matriz
+
+        Returns:
+            bool: True si se cargó correctamente
+        """
+        from database import connect_db
+
+        conn = None
+        try:
+            conn = connect_db()
+            if not conn:
+                return False
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT rol, permiso, activo FROM privilegios")
+            nueva = {(rol, permiso): bool(activo) for rol, permiso, activo in cursor.fetchall()}
+
+            # Reemplazo atómico: los lectores ven la matriz anterior o la nueva, nunca una mezcla
+            self._matriz = MappingProxyType(nueva)
+            self._cargada = True
+            self._cargada_en = time.monotonic()
+            logger.debug("Matriz de privilegios cargada (%s entradas)", len(nueva))
+            return True
+
+        except Exception as e:
+            logger.error("Error al cargar matriz de privilegios: %s", e)
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    def invalidar(self):
+        """Marcar la matriz como vencida; se recarga en la próxima consulta"""
+        self._cargada_en = None
+
+    def obtener_matriz(self):
+        """
+        Obtener la matriz vigente, recargándola si venció
+
+        Returns:
+            Mapping: {(rol, permiso): bool} de solo lectura
+        """
+        if not self._vigente():
+            with self._lock:
+                if not self._vigente():
+                    self.recargar()
+        return self._matriz
+
+    def tiene_privilegio(self, rol, permiso):
+        """
+        Verificar si un rol tiene un privilegio específico
+
+        Args:
+            rol (str): Rol del usuario
+            permiso (str): Permiso a verificar
+
+        Returns:
+            bool: True si tiene el privilegio, False en caso contrario
+                  (también si la matriz nunca pudo cargarse)
+        """
+        matriz = self.obtener_matriz()
+        if not self._cargada:
+            # Sin matriz no se sabe qué privilegios existen: no se concede ninguno
+            logger.error("Matriz de privilegios no disponible, se deniega %s a %s", permiso, rol)
+            return False
+        activo = matriz.get((rol, permiso))
+        if activo is None:
+            # Si no existe el privilegio, SUPERADMIN tiene todos los permisos
+            return rol == 'SUPERADMIN'
+        return activo
+
+    def actualizar_local(self, rol, permiso, activo):
+        """
+        Reflejar un cambio propio en la matriz sin esperar la notificación
+
+        Args:
+            rol (str): Rol del usuario
+            permiso (str): Permiso modificado
+            activo (bool): Nuevo estado
+        """
+        with self._lock:
+            if self._cargada_en is None:
+                return
+            nueva = dict(self._matriz)
+            nueva[(rol, permiso)] = bool(activo)
+            self._matriz = MappingProxyType(nueva)
+
+    # ------------------------------------------------------------------
+    # LISTEN/NOTIFY
+    # ------------------------------------------------------------------
+
+    def iniciar_escucha(self):
+        """
+        Iniciar (una sola vez) el hilo que escucha CANAL_PRIVILEGIOS
+        """
+        with self._lock:
+            if self._hilo_escucha is not None and self._hilo_escucha.is_alive():
+                return
+            self._detener.clear()
+            self._hilo_escucha = threading.Thread(
+                target=self._escuchar, name='escucha-privilegios', daemon=True)
+            self._hilo_escucha.start()
+
+    def detener_escucha(self):
+        """Detener el hilo de escucha"""
+        self._detener.set()
+
+    def _escuchar(self):
+        """
+        Bucle de escucha con conexión dedicada (fuera del pool, en autocommit).
+        Si la conexión cae se reintenta con espera creciente; mientras tanto
+        el TTL mantiene acotada la antigüedad de la matriz.
+        """
+        import database
+
+        espera = 5
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**database.DB_CONFIG)
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CANAL_PRIVILEGIOS}")
+                logger.info("[OK] Escuchando cambios de privilegios")
+
+                # Pudo haber cambios mientras no se escuchaba
+                self.invalidar()
+                espera = 5
+
+                while not self._detener.is_set():
+                    listos, _, _ = select.select([conn], [], [], 5)
+                    if not listos:
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        logger.info("Privilegios modificados, se recargará la matriz")
+                        self.invalidar()
+
+            except Exception as e:
+                logger.warning("[WARN] Escucha de privilegios interrumpida: %s", e)
+                self._detener.wait(espera)
+                espera = min(espera * 2, 300)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+# Instancia compartida por todo el proceso
+matriz_privilegios = MatrizPrivilegios()
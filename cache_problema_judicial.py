@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Lista de cédulas con problema judicial en memoria para Sistema QUIRA
+
+Carga cedulas_problema_judicial una vez por sesión en un conjunto compacto
+(las cédulas numéricas se guardan como enteros) y la mantiene al día de
+forma incremental: solo se leen las filas con id mayor a la última cargada,
+y se recarga completa si hubo eliminaciones. Un trigger de la base notifica
+los cambios por LISTEN/NOTIFY; el mismo hilo de escucha refresca la lista
+cuando vence el TTL, de modo que las verificaciones nunca esperan a la base
+salvo que la lista no se haya cargado nunca.
+
+Para listas muy grandes se puede usar un filtro de Bloom en lugar del
+conjunto: ocupa unos pocos bits por cédula y los positivos (reales o falsos)
+se confirman contra la base en una sola consulta por lote.
+"""
+
+import hashlib
+import logging
+import math
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Canal notificado por el trigger de cedulas_problema_judicial (migración 10)
+CANAL_PROBLEMA_JUDICIAL = 'problema_judicial_cambiado'
+
+# Segundos máximos que la lista se considera vigente sin notificaciones
+TTL_PROBLEMA_JUDICIAL = 60
+
+# Modo 'auto': a partir de esta cantidad de cédulas se usa el filtro de Bloom
+UMBRAL_BLOOM = 2_000_000
+
+# Tasa de falsos positivos del filtro de Bloom
+TASA_FALSOS_POSITIVOS = 0.001
+
+# Cédulas por consulta al confirmar positivos del filtro de Bloom
+LOTE_CONFIRMACION = 5000
+
+
+def _clave(cedula):
+    """Clave compacta de una cédula: entero si es numérica sin ceros a la izquierda"""
+    cedula = str(cedula).strip()
+    if cedula.isdigit() and not cedula.startswith('0'):
+        return int(cedula)
+    return cedula
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre un bytearray (doble hashing con blake2b)"""
+
+    def __init__(self, capacidad, tasa_falsos=TASA_FALSOS_POSITIVOS):
+        """
+        Args:
+            capacidad (int): Elementos previstos
+            tasa_falsos (float): Probabilidad de falso positivo con esa cantidad
+        """
+        self.capacidad = max(int(capacidad), 1)
+        self.bits = max(int(-self.capacidad * math.log(tasa_falsos) / (math.log(2) ** 2)), 64)
+        self.hashes = max(int(round(self.bits / self.capacidad * math.log(2))), 1)
+        self._arreglo = bytearray((self.bits + 7) // 8)
+        self.cantidad = 0
+
+    def _posiciones(self, elemento):
+        digest = hashlib.blake2b(str(elemento).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def agregar(self, elemento):
+        for posicion in self._posiciones(elemento):
+            self._arreglo[posicion >> 3] |= 1 << (posicion & 7)
+        self.cantidad += 1
+
+    def __contains__(self, elemento):
+        return all(self._arreglo[p >> 3] & (1 << (p & 7)) for p in self._posiciones(elemento))
+
+
+class ListaProblemaJudicial:
+    """Cédulas con problema judicial con refresco incremental, notificación y TTL"""
+
+    def __init__(self, ttl=TTL_PROBLEMA_JUDICIAL, modo='auto'):
+        """
+        Inicializar lista (vacía hasta la primera consulta)
+
+        Args:
+            ttl (float): Segundos de vigencia sin notificaciones
+            modo (str): 'conjunto', 'bloom' o 'auto' (según UMBRAL_BLOOM)
+        """
+        self.ttl = ttl
+        self.modo = modo
+        self._conjunto = None
+        self._bloom = None
+        self._cantidad = 0
+        self._ultimo_id = 0
+        self._cargada_en = None
+        self._lock = threading.Lock()
+        self._lock_escucha = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo_escucha = None
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _vigente(self):
+        return (self._cargada_en is not None
+                and time.monotonic() - self._cargada_en < self.ttl)
+
+    @property
+    def usa_bloom(self):
+        return self._bloom is not None
+
+    @staticmethod
+    def _agregar(cedulas, conjunto, bloom):
+        """Agregar cédulas al conjunto o al filtro; devuelve cuántas se procesaron"""
+        agregadas = 0
+        for cedula in cedulas:
+            if bloom is not None:
+                bloom.agregar(_clave(cedula))
+            else:
+                conjunto.add(_clave(cedula))
+            agregadas += 1
+        return agregadas
+
+    def _recargar(self, cursor):
+        """Leer la tabla completa (con el lock tomado)"""
+        cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM cedulas_problema_judicial")
+        cantidad, ultimo_id = cursor.fetchone()
+
+        usar_bloom = self.modo == 'bloom' or (self.modo == 'auto' and cantidad >= UMBRAL_BLOOM)
+        conjunto = None if usar_bloom else set()
+        # Margen para las altas incrementales antes de tener que reconstruir el filtro
+        bloom = FiltroBloom(cantidad * 2 + 1000) if usar_bloom else None
+
+        # Cursor con nombre: la tabla se recorre por bloques sin traerla entera a memoria
+        lector = cursor.connection.cursor(name='carga_problema_judicial')
+        lector.itersize = 50000
+        lector.execute("SELECT cedula FROM cedulas_problema_judicial WHERE id <= %s", (ultimo_id,))
+        cantidad = self._agregar((fila[0] for fila in lector), conjunto, bloom)
+        lector.close()
+
+        # Publicar la lista nueva solo cuando está completa: verificar_lote lee
+        # _conjunto/_bloom sin el lock y no debe ver una lista a medio cargar.
+        # Si entre ambas lecturas se confirmaron filas con id menor, el próximo
+        # refresco detecta la diferencia de cantidad y vuelve a cargar todo
+        self._conjunto, self._bloom, self._cantidad, self._ultimo_id = (
+            conjunto, bloom, cantidad, ultimo_id)
+        modo = "filtro de Bloom" if usar_bloom else "conjunto"
+        logger.info("[OK] Lista de problemas judiciales cargada: %s cédulas (%s)", cantidad, modo)
+
+    def refrescar(self):
+        """
+        Traer las cédulas agregadas desde la última carga (o recargar todo si
+        hubo eliminaciones o es la primera vez)
+
+        Returns:
+            bool: True si la lista quedó al día
+        """
+        from database import connect_db
+
+        conn = None
+        with self._lock:
+            try:
+                conn = connect_db()
+                if not conn:
+                    return False
+                cursor = conn.cursor()
+
+                if self._conjunto is None and self._bloom is None:
+                    self._recargar(cursor)
+                else:
+                    cursor.execute("""
+                        SELECT id, cedula FROM cedulas_problema_judicial
+                        WHERE id > %s ORDER BY id
+                    """, (self._ultimo_id,))
+                    nuevas = cursor.fetchall()
+                    cursor.execute("SELECT COUNT(*) FROM cedulas_problema_judicial")
+                    cantidad = cursor.fetchone()[0]
+
+                    excede_bloom = (self._bloom is not None
+                                    and self._bloom.cantidad + len(nuevas) > self._bloom.capacidad)
+                    if cantidad != self._cantidad + len(nuevas) or excede_bloom:
+                        # Hubo eliminaciones (o el filtro se llenó): no se pueden aplicar por diferencia
+                        self._recargar(cursor)
+                    elif nuevas:
+                        self._agregar((cedula for _, cedula in nuevas), self._conjunto, self._bloom)
+                        self._cantidad = cantidad
+                        self._ultimo_id = nuevas[-1][0]
+                        logger.info("Lista de problemas judiciales: +%s cédulas", len(nuevas))
+
+                self._cargada_en = time.monotonic()
+                return True
+
+            except Exception as e:
+                logger.error("Error al cargar lista de problemas judiciales: %s", e)
+                return False
+            finally:
+                if conn:
+                    conn.close()
+
+    def invalidar(self):
+        """Marcar la lista como vencida; el hilo de escucha la refresca en su próxima vuelta"""
+        self._cargada_en = None
+
+    def cargada(self):
+        """True si la lista se cargó al menos una vez"""
+        return self._conjunto is not None or self._bloom is not None
+
+    def asegurar_vigente(self):
+        """
+        Cargar la lista si nunca se cargó; devuelve False si no se pudo
+
+        Una lista ya cargada se sirve tal cual: el hilo de escucha la mantiene
+        al día (notificaciones y TTL) sin bloquear a quien consulta.
+        """
+        if not self.cargada():
+            self.refrescar()
+        return self.cargada()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def cantidad(self):
+        """Cantidad de cédulas en la lista"""
+        self.asegurar_vigente()
+        return self._cantidad
+
+    def contiene(self, cedula):
+        """
+        Verificar si una cédula tiene problemas judiciales
+
+        Args:
+            cedula (str): Número de cédula
+
+        Returns:
+            bool: True si la cédula está en la lista
+        """
+        return bool(self.verificar_lote([cedula]))
+
+    def verificar_lote(self, cedulas):
+        """
+        Verificar muchas cédulas a la vez sin una consulta por cédula
+
+        Args:
+            cedulas (iterable): Cédulas a verificar
+
+        Returns:
+            set: Las cédulas (tal como se recibieron) que están en la lista
+        """
+        # Se lee la lista publicada sin tomar el lock; solo se espera a la base
+        # si todavía no se cargó nunca
+        conjunto, bloom = self._conjunto, self._bloom
+        if conjunto is None and bloom is None:
+            if not self.asegurar_vigente():
+                return set()
+            conjunto, bloom = self._conjunto, self._bloom
+        if bloom is None:
+            return {c for c in cedulas if c is not None and _clave(c) in conjunto}
+
+        candidatas = [c for c in cedulas if c is not None and _clave(c) in bloom]
+        return self._confirmar(candidatas) if candidatas else set()
+
+    def _confirmar(self, candidatas):
+        """Confirmar contra la base los positivos del filtro de Bloom"""
+        from database import connect_db
+
+        conn = connect_db()
+        if not conn:
+            return set()
+        try:
+            cursor = conn.cursor()
+            por_texto = {}
+            for cedula in candidatas:
+                por_texto.setdefault(str(cedula).strip(), []).append(cedula)
+            textos = list(por_texto)
+
+            confirmadas = set()
+            for i in range(0, len(textos), LOTE_CONFIRMACION):
+                cursor.execute("""
+                    SELECT cedula FROM cedulas_problema_judicial WHERE cedula = ANY(%s)
+                """, (textos[i:i + LOTE_CONFIRMACION],))
+                for (texto,) in cursor.fetchall():
+                    confirmadas.update(por_texto.get(texto, ()))
+            return confirmadas
+        except Exception as e:
+            logger.error("Error al confirmar cédulas con problema judicial: %s", e)
+            return set()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # LISTEN/NOTIFY
+    # ------------------------------------------------------------------
+
+    def iniciar_escucha(self):
+        """
+        Iniciar (una sola vez) el hilo que escucha CANAL_PROBLEMA_JUDICIAL
+        """
+        # Lock propio: no debe esperar a una carga en curso (que toma self._lock)
+        with self._lock_escucha:
+            if self._hilo_escucha is not None and self._hilo_escucha.is_alive():
+                return
+            self._detener.clear()
+            self._hilo_escucha = threading.Thread(
+                target=self._escuchar, name='escucha-problema-judicial', daemon=True)
+            self._hilo_escucha.start()
+
+    def iniciar_en_segundo_plano(self):
+        """
+        Cargar la lista y empezar a escuchar cambios sin bloquear al llamador
+        (al iniciar la aplicación, para que la primera verificación no espere
+        la carga completa de la tabla)
+        """
+        def cargar():
+            self.refrescar()
+            self.iniciar_escucha()
+
+        threading.Thread(target=cargar, name='carga-problema-judicial', daemon=True).start()
+
+    def detener_escucha(self):
+        """Detener el hilo de escucha"""
+        self._detener.set()
+
+    def _escuchar(self):
+        """
+        Bucle de escucha con conexión dedicada (fuera del pool, en autocommit).
+        Al recibir una notificación o al vencer el TTL se refresca la lista en
+        este mismo hilo, así las verificaciones desde la interfaz no esperan a
+        la base.
+        """
+        import database
+
+        espera = 5
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**database.DB_CONFIG)
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CANAL_PROBLEMA_JUDICIAL}")
+                logger.info("[OK] Escuchando cambios de la lista de problemas judiciales")
+
+                # Pudo haber cambios mientras no se escuchaba
+                self.refrescar()
+                espera = 5
+
+                while not self._detener.is_set():
+                    listos, _, _ = select.select([conn], [], [], 5)
+                    if not listos:
+                        if not self._vigente():
+                            self.refrescar()
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.refrescar()
+
+            except Exception as e:
+                logger.warning("[WARN] Escucha de problemas judiciales interrumpida: %s", e)
+                self._detener.wait(espera)
+                espera = min(espera * 2, 300)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+# Instancia compartida por todo el proceso
+lista_problema_judicial = ListaProblemaJudicial()
@@ -5,14 +5,183 @@ Script para cargar cédulas con problemas judiciales en la base de datos
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from database import connect_db
+from database import conexion_dedicada, connect_db
+from tareas_segundo_plano import CargadorSegundoPlano
+from registro_eventos import configurar_registro
 import csv
+import itertools
 import logging
+import os
+import threading
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configurar_registro()
 logger = logging.getLogger(__name__)
 
+# Bytes por bloque enviado a COPY
+TAMANO_BLOQUE_COPY = 64 * 1024
+
+# Largo de la columna cedula en cedulas_problema_judicial
+LONGITUD_MAXIMA_CEDULA = 20
+
+# Cédulas mostradas en la vista previa
+FILAS_VISTA_PREVIA = 50
+
+
+class CargaCancelada(Exception):
+    """La carga masiva fue cancelada por el usuario"""
+
+
+def leer_cedulas_csv(ruta, progreso=None):
+    """
+    Leer de forma perezosa las cédulas válidas de un CSV
+    
+    El archivo puede tener una columna 'cedula' con encabezado o solo los
+    números; se toma la primera columna de cada fila.
+    
+    Args:
+        ruta (str): Ruta del archivo CSV
+        progreso (dict, optional): Se actualiza con 'bytes_leidos' e 'invalidas'
+        
+    Yields:
+        str: Cada cédula numérica encontrada
+    """
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as archivo:
+        def lineas():
+            for linea in archivo:
+                if progreso is not None:
+                    progreso['bytes_leidos'] += len(linea.encode('utf-8'))
+                yield linea
+        
+        reader = csv.reader(lineas())
+        for numero, row in enumerate(reader):
+            if not row:
+                continue
+            
+            # Si la primera línea parece ser un encabezado
+            if numero == 0 and 'cedula' in ','.join(row).lower():
+                continue
+            
+            cedula = row[0].strip()
+            if cedula.isdigit() and len(cedula) <= LONGITUD_MAXIMA_CEDULA:
+                yield cedula
+            elif cedula and progreso is not None:
+                progreso['invalidas'] += 1
+
+
+class _FlujoCopy:
+    """Objeto tipo archivo que alimenta COPY ... FROM STDIN desde un iterador de cédulas"""
+    
+    def __init__(self, cedulas, cancelar=None, progreso=None):
+        self._cedulas = iter(cedulas)
+        self._cancelar = cancelar
+        self._progreso = progreso
+        self._pendiente = b''
+        self.filas = 0
+    
+    def read(self, size=-1):
+        if self._cancelar is not None and self._cancelar.is_set():
+            raise CargaCancelada()
+        
+        objetivo = size if size and size > 0 else TAMANO_BLOQUE_COPY
+        partes = [self._pendiente]
+        total = len(self._pendiente)
+        while total < objetivo:
+            cedula = next(self._cedulas, None)
+            if cedula is None:
+                break
+            linea = (cedula + '\n').encode('ascii')
+            partes.append(linea)
+            total += len(linea)
+            self.filas += 1
+        
+        if self._progreso is not None:
+            self._progreso['leidas'] = self.filas
+        
+        datos = b''.join(partes)
+        self._pendiente = datos[objetivo:]
+        return datos[:objetivo]
+
+
+def cargar_cedulas_csv(ruta, cancelar=None, progreso=None):
+    """
+    Cargar masivamente las cédulas de un CSV en cedulas_problema_judicial
+    
+    El archivo se lee en streaming y se copia con COPY a una tabla temporal;
+    luego un único INSERT ... SELECT ... ON CONFLICT agrega las nuevas. Todo
+    ocurre en una transacción: si se cancela no queda nada cargado.
+    
+    Args:
+        ruta (str): Ruta del archivo CSV
+        cancelar (threading.Event, optional): Evento que interrumpe la carga
+        progreso (dict, optional): Se actualiza con 'fase', 'bytes_leidos',
+            'bytes_total', 'leidas' e 'invalidas' (para mostrar avance)
+        
+    Returns:
+        dict: {'leidas', 'insertadas', 'duplicadas', 'invalidas', 'cancelado'},
+              o None si falló la base de datos o la lectura del archivo
+    """
+    progreso = progreso if progreso is not None else {}
+    progreso.update(fase='copiando', bytes_leidos=0, bytes_total=os.path.getsize(ruta),
+                    leidas=0, invalidas=0)
+    
+    # Retiene la conexión toda la operación: una propia, fuera del pool
+    conn = conexion_dedicada()
+    if not conn:
+        return None
+    
+    flujo = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE carga_cedulas (cedula VARCHAR(20) NOT NULL) ON COMMIT DROP
+        """)
+        
+        flujo = _FlujoCopy(leer_cedulas_csv(ruta, progreso), cancelar, progreso)
+        cursor.copy_expert("COPY carga_cedulas (cedula) FROM STDIN", flujo, size=TAMANO_BLOQUE_COPY)
+        if cancelar is not None and cancelar.is_set():
+            raise CargaCancelada()
+        
+        progreso['fase'] = 'combinando'
+        cursor.execute("""
+            WITH nuevas AS (
+                INSERT INTO cedulas_problema_judicial (cedula)
+                SELECT DISTINCT cedula FROM carga_cedulas
+                ON CONFLICT (cedula) DO NOTHING
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM nuevas
+        """)
+        insertadas = cursor.fetchone()[0]
+        conn.commit()
+        
+        logger.info("[OK] Cédulas con problema judicial: %s nuevas de %s leídas", insertadas, flujo.filas)
+        return {
+            'leidas': flujo.filas,
+            'insertadas': insertadas,
+            'duplicadas': flujo.filas - insertadas,
+            'invalidas': progreso['invalidas'],
+            'cancelado': False,
+        }
+        
+    except Exception as e:
+        conn.rollback()
+        # La excepción de read() puede llegar envuelta por psycopg2
+        if isinstance(e, CargaCancelada) or (cancelar is not None and cancelar.is_set()):
+            logger.info("Carga de cédulas cancelada")
+            return {
+                'leidas': flujo.filas if flujo else 0,
+                'insertadas': 0,
+                'duplicadas': 0,
+                'invalidas': progreso['invalidas'],
+                'cancelado': True,
+            }
+        logger.error("Error al cargar cédulas desde %s: %s", ruta, e)
+        return None
+    finally:
+        progreso['fase'] = 'terminado'
+        conn.close()
+
 class CargarCedulasProblemaJudicial(tk.Toplevel):
     def __init__(self, parent):
         super().__init__(parent)
@@ -27,8 +196,14 @@ class CargarCedulasProblemaJudicial(tk.Toplevel):
         # Configurar estilo
         self.configure(bg='#f0f0f0')
         
+        # Carga masiva en segundo plano
+        self.cargador = CargadorSegundoPlano(self, max_workers=1, nombre='carga-cedulas')
+        self.cancelar_evento = None
+        self.progreso = {}
+        
         self.setup_ui()
         self.center_window()
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
         
     def setup_ui(self):
         """Configurar la interfaz"""
@@ -86,6 +261,16 @@ class CargarCedulasProblemaJudicial(tk.Toplevel):
         self.preview_tree.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
         
+        # Frame de progreso de la carga
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill='x', pady=(0, 10))
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        self.progress_bar.pack(fill='x')
+        
+        self.progress_label = ttk.Label(progress_frame, text="", font=('Segoe UI', 9))
+        self.progress_label.pack(anchor='w', pady=(5, 0))
+        
         # Frame de botones
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill='x', pady=(0, 10))
@@ -95,6 +280,11 @@ class CargarCedulasProblemaJudicial(tk.Toplevel):
                                      command=self.load_cedulas, state='disabled')
         self.load_button.pack(side='right', padx=(10, 0))
         
+        # Botón cancelar carga
+        self.cancel_button = ttk.Button(button_frame, text="Cancelar Carga", 
+                                       command=self.cancelar_carga, state='disabled')
+        self.cancel_button.pack(side='right', padx=(10, 0))
+        
         # Botón limpiar base de datos
         self.clear_button = ttk.Button(button_frame, text="Limpiar Base de Datos", 
                                       command=self.clear_database)
@@ -102,7 +292,6 @@ class CargarCedulasProblemaJudicial(tk.Toplevel):
         
         # Variables
         self.selected_file = None
-        self.cedulas_data = []
         
     def center_window(self):
         """Centrar la ventana en la pantalla"""
@@ -124,102 +313,120 @@ class CargarCedulasProblemaJudicial(tk.Toplevel):
             self.load_preview()
             
     def load_preview(self):
-        """Cargar vista previa del archivo"""
+        """Cargar vista previa del archivo (solo las primeras cédulas)"""
         try:
-            self.cedulas_data = []
-            
-            with open(self.selected_file, 'r', encoding='utf-8') as file:
-                # Detectar si tiene encabezados
-                first_line = file.readline().strip()
-                file.seek(0)  # Volver al inicio
-                
-                reader = csv.reader(file)
-                
-                # Si la primera línea parece ser un encabezado
-                if 'cedula' in first_line.lower():
-                    next(reader)  # Saltar encabezado
-                
-                # Leer todas las cédulas
-                for row in reader:
-                    if row:  # Si la fila no está vacía
-                        cedula = row[0].strip() if row[0] else ""
-                        if cedula and cedula.isdigit():  # Validar que sea numérico
-                            self.cedulas_data.append(cedula)
+            vista = list(itertools.islice(leer_cedulas_csv(self.selected_file), FILAS_VISTA_PREVIA + 1))
             
             # Limpiar vista previa
             for item in self.preview_tree.get_children():
                 self.preview_tree.delete(item)
             
-            # Mostrar primeras 50 cédulas en vista previa
-            for i, cedula in enumerate(self.cedulas_data[:50]):
+            # Mostrar primeras cédulas en vista previa
+            for cedula in vista[:FILAS_VISTA_PREVIA]:
                 self.preview_tree.insert('', 'end', values=(cedula,))
             
-            if len(self.cedulas_data) > 50:
-                self.preview_tree.insert('', 'end', values=(f"... y {len(self.cedulas_data) - 50} más",))
+            if len(vista) > FILAS_VISTA_PREVIA:
+                self.preview_tree.insert('', 'end', values=("...",))
+            
+            if not vista:
+                messagebox.showwarning("Vista Previa", "El archivo no contiene cédulas válidas")
+                self.load_button.config(state='disabled')
+                return
             
             # Habilitar botón de carga
+            tamano_mb = os.path.getsize(self.selected_file) / (1024 * 1024)
+            self.progress_bar['value'] = 0
+            self.progress_label.config(text=f"Archivo de {tamano_mb:.1f} MB listo para cargar")
             self.load_button.config(state='normal')
             
-            messagebox.showinfo("Vista Previa", f"Se cargaron {len(self.cedulas_data)} cédulas válidas")
-            
         except Exception as e:
             messagebox.showerror("Error", f"Error al leer el archivo: {e}")
             
     def load_cedulas(self):
-        """Cargar cédulas en la base de datos"""
-        if not self.cedulas_data:
+        """Cargar cédulas en la base de datos (en segundo plano)"""
+        if not self.selected_file:
             messagebox.showwarning("Advertencia", "No hay cédulas para cargar")
             return
-            
-        try:
-            conn = connect_db()
-            if not conn:
-                messagebox.showerror("Error", "No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Contador de cédulas cargadas
-            cargadas = 0
-            duplicadas = 0
-            
-            for cedula in self.cedulas_data:
-                try:
-                    cursor.execute("""
-                        INSERT INTO cedulas_problema_judicial (cedula) 
-                        VALUES (%s)
-                        ON CONFLICT (cedula) DO NOTHING
-                    """, (cedula,))
-                    
-                    if cursor.rowcount > 0:
-                        cargadas += 1
-                    else:
-                        duplicadas += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error al insertar cédula {cedula}: {e}")
-                    continue
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            messagebox.showinfo("Carga Completada", 
-                              f"Cédulas cargadas: {cargadas}\n"
-                              f"Cédulas duplicadas (ignoradas): {duplicadas}\n"
-                              f"Total procesadas: {len(self.cedulas_data)}")
-            
-            # Limpiar vista previa
-            for item in self.preview_tree.get_children():
-                self.preview_tree.delete(item)
-            
-            self.cedulas_data = []
-            self.selected_file = None
-            self.file_label.config(text="Ningún archivo seleccionado")
-            self.load_button.config(state='disabled')
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar cédulas: {e}")
+        
+        self.cancelar_evento = threading.Event()
+        self.progreso = {}
+        
+        self.load_button.config(state='disabled')
+        self.select_button.config(state='disabled')
+        self.clear_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.progress_bar['value'] = 0
+        self.progress_label.config(text="Iniciando carga...")
+        
+        self.cargador.enviar('carga', cargar_cedulas_csv, self.carga_terminada,
+                             self.selected_file, self.cancelar_evento, self.progreso,
+                             al_fallar=lambda e: self.carga_terminada(None))
+        self.after(200, self.actualizar_progreso)
+    
+    def actualizar_progreso(self):
+        """Mostrar el avance de la carga mientras dure"""
+        if self.cancelar_evento is None:
+            return
+        
+        fase = self.progreso.get('fase')
+        total = self.progreso.get('bytes_total') or 1
+        if fase == 'copiando':
+            porcentaje = min(100, self.progreso.get('bytes_leidos', 0) * 100 / total)
+            self.progress_bar['value'] = porcentaje
+            self.progress_label.config(text=f"Leídas {self.progreso.get('leidas', 0):,} cédulas ({porcentaje:.0f}%)")
+        elif fase == 'combinando':
+            self.progress_bar['value'] = 100
+            self.progress_label.config(text=f"Guardando {self.progreso.get('leidas', 0):,} cédulas...")
+        
+        self.after(200, self.actualizar_progreso)
+    
+    def cancelar_carga(self):
+        """Interrumpir la carga en curso (no se guarda nada)"""
+        if self.cancelar_evento is not None:
+            self.cancelar_evento.set()
+            self.cancel_button.config(state='disabled')
+            self.progress_label.config(text="Cancelando...")
+    
+    def carga_terminada(self, resultado):
+        """Mostrar el resultado de la carga"""
+        self.cancelar_evento = None
+        self.select_button.config(state='normal')
+        self.clear_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+        
+        if resultado is None:
+            self.load_button.config(state='normal')
+            self.progress_label.config(text="")
+            messagebox.showerror("Error", "Error al cargar cédulas. Revise el archivo y la conexión.")
+            return
+        
+        if resultado['cancelado']:
+            self.load_button.config(state='normal')
+            self.progress_bar['value'] = 0
+            self.progress_label.config(text="Carga cancelada: no se guardó ninguna cédula")
+            return
+        
+        self.progress_label.config(text=f"Carga completada: {resultado['insertadas']:,} cédulas nuevas")
+        messagebox.showinfo("Carga Completada", 
+                          f"Cédulas cargadas: {resultado['insertadas']}\n"
+                          f"Cédulas duplicadas (ignoradas): {resultado['duplicadas']}\n"
+                          f"Filas inválidas (ignoradas): {resultado['invalidas']}\n"
+                          f"Total procesadas: {resultado['leidas']}")
+        
+        # Limpiar vista previa
+        for item in self.preview_tree.get_children():
+            self.preview_tree.delete(item)
+        
+        self.selected_file = None
+        self.file_label.config(text="Ningún archivo seleccionado")
+        self.load_button.config(state='disabled')
+    
+    def cerrar(self):
+        """Cerrar la ventana cancelando una carga en curso"""
+        if self.cancelar_evento is not None:
+            self.cancelar_evento.set()
+        self.cargador.cerrar()
+        self.destroy()
             
     def clear_database(self):
         """Limpiar todas las cédulas de la base de datos"""
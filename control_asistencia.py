@@ -5,10 +5,18 @@ Módulo para visualizar logs de asistencia del sistema QUIRA
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import logging
 import threading
 from datetime import datetime, timedelta
-from zkteco_connector_v2 import ZKTecoK40V2
+from sesiones_zkteco import obtener_sesion
 from database import connect_db
+import sincronizacion_asistencia
+from espejo_usuarios_zkteco import espejo_de
+from almacen_logs_asistencia import AlmacenLogs, SIN_USUARIO
+from tabla_virtual import TablaVirtual, VistaFilas
+
+# Configurar logging
+logger = logging.getLogger(__name__)
 
 class ControlAsistencia(tk.Toplevel):
     def __init__(self, parent, user_data):
@@ -25,7 +33,7 @@ class ControlAsistencia(tk.Toplevel):
         self.current_page = 1
         self.items_per_page = 15
         self.total_pages = 1
-        self.all_logs = []  # Todos los logs sin filtrar
+        self.almacen = AlmacenLogs()  # Logs filtrados, en columnas ordenadas por fecha
         self.sort_recent_first = True  # Ordenamiento: True = más recientes primero
         
         self.title("Control de Asistencia - Sistema QUIRA")
@@ -147,10 +155,11 @@ class ControlAsistencia(tk.Toplevel):
         table_frame = ttk.Frame(parent)
         table_frame.pack(fill='both', expand=True)
         
-        # Crear Treeview con scrollbars
+        # Crear tabla virtual (Treeview con scrollbars que solo materializa las filas visibles)
         columns = ('user_id', 'name', 'date', 'time')
         
-        self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=10)
+        self.tabla = TablaVirtual(table_frame, columns, height=10, horizontal=True)
+        self.tree = self.tabla.tree
         
         # Configurar columnas
         self.tree.heading('user_id', text='UID en K40')
@@ -164,15 +173,8 @@ class ControlAsistencia(tk.Toplevel):
         self.tree.column('date', width=120, minwidth=100)
         self.tree.column('time', width=120, minwidth=100)
         
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
-        h_scrollbar = ttk.Scrollbar(table_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
-        
         # Empaquetar
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        v_scrollbar.grid(row=0, column=1, sticky='ns')
-        h_scrollbar.grid(row=1, column=0, sticky='ew')
+        self.tabla.grid(row=0, column=0, sticky='nsew')
         
         # Configurar grid
         table_frame.grid_rowconfigure(0, weight=1)
@@ -228,17 +230,24 @@ class ControlAsistencia(tk.Toplevel):
         self.total_records = tk.StringVar(value="0")
         self.today_records = tk.StringVar(value="0")
         self.unique_users = tk.StringVar(value="0")
+        self.busiest_day = tk.StringVar(value="-")
+        self.top_user = tk.StringVar(value="-")
         
-        # Crear etiquetas de estadísticas
+        # Crear etiquetas de estadísticas: una lista de (etiqueta, variable) por fila
         stats_data = [
-            ("Total de Registros en el dispositivo:", self.total_records),
-            ("Registros totales de hoy:", self.today_records),
-            ("Registros únicos:", self.unique_users)
+            [("Total de Registros en el dispositivo:", self.total_records),
+             ("Registros totales de hoy:", self.today_records),
+             ("Registros únicos:", self.unique_users)],
+            [("Día con más registros:", self.busiest_day),
+             ("Usuario con más registros:", self.top_user)],
         ]
         
-        for i, (label, var) in enumerate(stats_data):
-            ttk.Label(stats_frame, text=label, font=('Segoe UI', 10, 'bold')).grid(row=0, column=i*2, sticky='w', padx=(0, 5))
-            ttk.Label(stats_frame, textvariable=var, font=('Segoe UI', 10)).grid(row=0, column=i*2+1, sticky='w', padx=(0, 20))
+        for row, fila in enumerate(stats_data):
+            for i, (label, var) in enumerate(fila):
+                ttk.Label(stats_frame, text=label, font=('Segoe UI', 10, 'bold')).grid(
+                    row=row, column=i*2, sticky='w', padx=(0, 5), pady=(0, 5))
+                ttk.Label(stats_frame, textvariable=var, font=('Segoe UI', 10)).grid(
+                    row=row, column=i*2+1, sticky='w', padx=(0, 20), pady=(0, 5))
         
         # Configurar grid
         stats_frame.columnconfigure(7, weight=1)
@@ -278,34 +287,28 @@ class ControlAsistencia(tk.Toplevel):
                 return None, "No disponible"
                 
         except Exception as e:
-            print(f"Error al obtener información del dispositivo: {e}")
+            logger.error("Error al obtener información del dispositivo: %s", e)
             return None, "No disponible"
             
     def cargar_nombres_usuarios_dispositivo(self):
         """Cargar nombres de usuarios directamente del dispositivo ZKTeco"""
         try:
             if not self.zkteco_device or not self.connected:
-                print("DEBUG: No hay dispositivo conectado para obtener usuarios")
+                logger.debug("No hay dispositivo conectado para obtener usuarios")
                 return {}
             
-            # Obtener usuarios directamente del dispositivo
-            users = self.zkteco_device.get_user_list()
-            print(f"DEBUG: Usuarios obtenidos del dispositivo: {users}")
+            # Usuarios desde el espejo local (se descarga solo si hubo altas/bajas)
+            espejo = espejo_de(self.zkteco_device)
+            espejo.sincronizar(self.zkteco_device)
             
             # Crear diccionario {user_id: name}
-            nombres_usuarios = {}
-            for user in users:
-                user_id = user.get('user_id', '')
-                name = user.get('name', '')
-                if user_id and name:
-                    nombres_usuarios[str(user_id)] = name
-                    print(f"DEBUG: Usuario cargado - ID: {user_id}, Nombre: {name}")
+            nombres_usuarios = espejo.nombres_por_user_id()
             
-            print(f"DEBUG: Cargados {len(nombres_usuarios)} usuarios del dispositivo")
+            logger.debug("Cargados %s usuarios del dispositivo", len(nombres_usuarios))
             return nombres_usuarios
                 
         except Exception as e:
-            print(f"Error al cargar usuarios del dispositivo: {e}")
+            logger.error("Error al cargar usuarios del dispositivo: %s", e)
             return {}
         
     def connect_device(self):
@@ -328,8 +331,8 @@ class ControlAsistencia(tk.Toplevel):
         
         def connect_thread():
             try:
-                # Crear dispositivo
-                self.zkteco_device = ZKTecoK40V2(ip, port)
+                # Sesión compartida con las demás ventanas
+                self.zkteco_device = obtener_sesion(ip, port)
                 
                 # Intentar conectar
                 if self.zkteco_device.connect():
@@ -355,7 +358,7 @@ class ControlAsistencia(tk.Toplevel):
                             self.after(0, lambda: self.device_info_label.config(text=f"Conectado a: Dispositivo {serial_number}", foreground='#27ae60'))
                             
                     except Exception as e:
-                        print(f"Error obteniendo información del dispositivo: {e}")
+                        logger.error("Error obteniendo información del dispositivo: %s", e)
                         self.device_info = None
                         self.after(0, lambda: self.device_info_label.config(text=f"Conectado a: Dispositivo {serial_number}", foreground='#27ae60'))
                     
@@ -387,7 +390,7 @@ class ControlAsistencia(tk.Toplevel):
         # Limpiar datos
         self.clear_results()
         self.nombres_usuarios = {}
-        self.all_logs = []
+        self.almacen = AlmacenLogs()
         self.current_page = 1
         self.total_pages = 1
         
@@ -400,6 +403,15 @@ class ControlAsistencia(tk.Toplevel):
         # Limpiar resultados anteriores
         self.clear_results()
         
+        # Validar fechas (DD/MM/AAAA) en el hilo de Tk
+        try:
+            desde = self.parse_fecha_filtro(self.date_from_var.get())
+            hasta = self.parse_fecha_filtro(self.date_to_var.get())
+        except ValueError:
+            self.results_info.set("[ERROR] Formato de fecha incorrecto. Use DD/MM/AAAA")
+            return
+        usuario = self.user_filter_var.get().strip().lower()
+        
         # Mostrar indicador de carga
         self.results_info.set("[REFRESH] Cargando registros...")
         
@@ -407,123 +419,115 @@ class ControlAsistencia(tk.Toplevel):
             try:
                 # Cargar nombres de usuarios solo si no están cargados
                 if not self.nombres_usuarios:
-                    print("DEBUG: Cargando usuarios del dispositivo...")
+                    logger.debug("Cargando usuarios del dispositivo...")
                     self.nombres_usuarios = self.cargar_nombres_usuarios_dispositivo()
                 else:
-                    print("DEBUG: Usuarios ya cargados, reutilizando...")
+                    logger.debug("Usuarios ya cargados, reutilizando...")
                 
-                # Obtener logs del dispositivo
-                logs = self.zkteco_device.get_attendance_logs()
+                # Copiar solo los registros nuevos al almacén local y consultar allí
+                filtered_logs = self.obtener_logs_almacen(desde, hasta, usuario)
                 
-                if not logs:
-                    self.after(0, lambda: self.results_info.set("No se encontraron registros de asistencia"))
-                    return
+                if filtered_logs is not None:
+                    almacen = AlmacenLogs(filtered_logs)
+                else:
+                    # Sin almacén local: descarga completa y filtro en memoria
+                    logger.debug("Almacén local no disponible, leyendo el dispositivo")
+                    logs = self.zkteco_device.get_attendance_logs()
+                    
+                    if not logs:
+                        self.after(0, lambda: self.results_info.set("No se encontraron registros de asistencia"))
+                        return
+                    
+                    logger.debug("Se obtuvieron %s logs del dispositivo", len(logs))
+                    almacen = self.filter_logs(AlmacenLogs(logs), desde, hasta, usuario)
                 
-                # Debug: imprimir información de los logs
-                print(f"DEBUG: Se obtuvieron {len(logs)} logs del dispositivo")
-                if logs:
-                    print(f"DEBUG: Primer log: {logs[0]}")
-                    print(f"DEBUG: Tipos de datos del primer log:")
-                    for key, value in logs[0].items():
-                        print(f"  {key}: {value} (tipo: {type(value)})")
+                logger.debug("Después del filtro: %s logs", len(almacen))
                 
-                # Filtrar logs según criterios
-                filtered_logs = self.filter_logs(logs)
-                print(f"DEBUG: Después del filtro: {len(filtered_logs)} logs")
+                if not len(almacen):
+                    self.after(0, lambda: self.results_info.set("No se encontraron registros de asistencia"))
+                    return
                 
-                # Aplicar ordenamiento y guardar logs filtrados
-                self.all_logs = self.sort_logs(filtered_logs)
+                # Guardar logs filtrados (en columnas, ordenados por fecha)
+                self.almacen = almacen
                 self.current_page = 1
-                self.total_pages = max(1, (len(filtered_logs) + self.items_per_page - 1) // self.items_per_page)
+                self.total_pages = max(1, (len(self.almacen) + self.items_per_page - 1) // self.items_per_page)
                 
                 # Mostrar primera página
                 self.after(0, self.display_current_page)
                 
             except Exception as e:
-                print(f"DEBUG: Error en search_logs: {e}")
+                logger.error("Error en search_logs: %s", e)
                 self.after(0, lambda: self.results_info.set(f"Error al cargar registros: {str(e)}"))
                 self.after(0, lambda: messagebox.showerror("Error", f"Error al cargar registros: {str(e)}"))
         
         threading.Thread(target=search_thread, daemon=True).start()
         
-    def filter_logs(self, logs):
-        """Filtrar logs según criterios"""
-        filtered = []
-        
-        # Obtener filtros
-        date_from = self.date_from_var.get()
-        date_to = self.date_to_var.get()
-        user_filter = self.user_filter_var.get().strip().lower()
-        
-        # Si no hay filtros de fecha, mostrar todos los logs
-        if not date_from and not date_to and not user_filter:
-            return logs
-            
-        print(f"DEBUG: Aplicando filtros - Desde: '{date_from}', Hasta: '{date_to}', Usuario: '{user_filter}'")
-        print(f"DEBUG: Nombres de usuarios disponibles: {self.nombres_usuarios}")
-        
-        for log in logs:
-            # Filtrar por usuario
-            if user_filter:
-                user_id = str(log.get('user_id', '')).lower()
-                # Obtener nombre del usuario desde el diccionario cargado
-                user_name = self.nombres_usuarios.get(log.get('user_id', ''), '').lower()
-                
-                # Buscar en ID de usuario o en nombre
-                if user_filter not in user_id and user_filter not in user_name:
-                    print(f"DEBUG: Filtrado usuario - ID: {user_id}, Nombre: '{user_name}', Filtro: '{user_filter}'")
-                    continue
-                else:
-                    print(f"DEBUG: Usuario incluido - ID: {user_id}, Nombre: '{user_name}', Filtro: '{user_filter}'")
-            
-            # Filtrar por fecha
-            timestamp = log.get('timestamp', None)
-            if timestamp:
-                try:
-                    # Si timestamp es ya un objeto datetime
-                    if isinstance(timestamp, datetime):
-                        dt = timestamp
-                    else:
-                        # Si es un número, convertir a datetime
-                        dt = datetime.fromtimestamp(timestamp)
-                    
-                    # Convertir fecha del log a formato DD/MM/AAAA para comparación
-                    log_date = dt.strftime('%d/%m/%Y')
-                    
-                    # Comparar fechas en formato DD/MM/AAAA
-                    if date_from and log_date < date_from:
-                        print(f"DEBUG: Filtrado por fecha - Log: {log_date}, Desde: {date_from}")
-                        continue
-                    if date_to and log_date > date_to:
-                        print(f"DEBUG: Filtrado por fecha - Log: {log_date}, Hasta: {date_to}")
-                        continue
-                        
-                    print(f"DEBUG: Fecha incluida - Log: {log_date}, Desde: {date_from}, Hasta: {date_to}")
-                except Exception as e:
-                    print(f"DEBUG: Error filtrando por fecha: {e}")
-                    continue
+    def parse_fecha_filtro(self, texto):
+        """Convertir un filtro DD/MM/AAAA en fecha (None si está vacío)"""
+        texto = texto.strip()
+        if not texto:
+            return None
+        return datetime.strptime(texto, '%d/%m/%Y').date()
+        
+    def obtener_logs_almacen(self, desde, hasta, usuario):
+        """
+        Sincronizar el dispositivo con el almacén local y consultar los registros
+        
+        Returns:
+            list: Registros filtrados, o None si el almacén local no está disponible
+        """
+        info = self.device_info or {}
+        dispositivo = sincronizacion_asistencia.clave_dispositivo(
+            info.get('serial'), self.zkteco_device.ip_address, self.zkteco_device.port)
+        
+        resultado = sincronizacion_asistencia.sincronizar_dispositivo(
+            self.zkteco_device, dispositivo, info.get('id'))
+        if resultado is None:
+            return None
+        logger.debug("Sincronización de %s: %s", dispositivo, resultado)
+        
+        # IDs cuyo nombre (según el dispositivo) coincide con el filtro
+        user_ids = [user_id for user_id, nombre in self.nombres_usuarios.items()
+                    if usuario and usuario in nombre.lower()]
+        
+        return sincronizacion_asistencia.consultar_registros(
+            dispositivo, desde=desde, hasta=hasta, usuario=usuario, user_ids=user_ids)
+        
+    def filter_logs(self, almacen, desde, hasta, usuario):
+        """
+        Filtrar logs según criterios
+        
+        Args:
+            almacen (AlmacenLogs): Logs descargados del dispositivo
+            desde (date): Primer día incluido (None = sin límite)
+            hasta (date): Último día incluido (None = sin límite)
+            usuario (str): Texto (en minúsculas) contenido en el ID o el nombre
+        
+        Returns:
+            AlmacenLogs: Logs filtrados, ordenados por fecha
+        """
+        if not desde and not hasta and not usuario:
+            return almacen
             
-            filtered.append(log)
+        logger.debug("Aplicando filtros - Desde: %s, Hasta: %s, Usuario: '%s'", desde, hasta, usuario)
         
-        return filtered
+        coincide_usuario = None
+        if usuario:
+            def coincide_usuario(user_id):
+                # Buscar en ID de usuario o en nombre (una vez por usuario, no por registro)
+                nombre = self.nombres_usuarios.get(user_id, '').lower()
+                return usuario in user_id.lower() or usuario in nombre
         
-    def sort_logs(self, logs):
-        """Ordenar logs según el criterio seleccionado"""
-        if not logs:
-            return logs
-            
-        # Determinar el orden según la selección
-        sort_recent_first = self.sort_var.get() == "Más recientes primero"
-        
-        # Ordenar por timestamp
-        sorted_logs = sorted(logs, key=lambda log: log.get('timestamp', 0), reverse=sort_recent_first)
+        # Rango de fechas por búsqueda binaria sobre los segundos epoch ordenados
+        return almacen.consultar(desde, hasta, coincide_usuario)
         
-        return sorted_logs
+    def recientes_primero(self):
+        """Orden seleccionado: True = más recientes primero"""
+        return self.sort_var.get() == "Más recientes primero"
         
     def apply_sort(self):
-        """Aplicar ordenamiento a los logs actuales"""
-        if self.all_logs:
-            self.all_logs = self.sort_logs(self.all_logs)
+        """Aplicar ordenamiento a los logs actuales (el almacén ya está ordenado por fecha)"""
+        if len(self.almacen):
             self.current_page = 1
             self.display_current_page()
         
@@ -540,109 +544,55 @@ class ControlAsistencia(tk.Toplevel):
         except ValueError:
             messagebox.showwarning("Entrada inválida", "Por favor ingrese un número válido")
         
-    def update_results(self, logs):
+    def update_results(self, filas):
         """Actualizar resultados en la tabla"""
-        print(f"DEBUG: update_results llamado con {len(logs)} logs")
-        
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        logger.debug("update_results llamado con %s registros", len(filas))
         
-        # Agregar registros
-        for i, log in enumerate(logs):
-            print(f"DEBUG: Procesando log {i+1}: {log}")
-            
-            # Convertir timestamp a fecha y hora
-            timestamp = log.get('timestamp', None)
-            if timestamp:
-                try:
-                    # Si timestamp es ya un objeto datetime
-                    if isinstance(timestamp, datetime):
-                        dt = timestamp
-                    else:
-                        # Si es un número, convertir a datetime
-                        dt = datetime.fromtimestamp(timestamp)
-                    
-                    date = dt.strftime('%d/%m/%Y')
-                    time = dt.strftime('%H:%M:%S')
-                except Exception as e:
-                    print(f"DEBUG: Error convirtiendo timestamp {timestamp}: {e}")
-                    date = "N/A"
-                    time = "N/A"
-            else:
-                date = "N/A"
-                time = "N/A"
-            
-            # Obtener nombre del usuario desde el diccionario cargado
-            user_id = log.get('user_id', 'N/A')
-            if user_id != 'N/A':
-                nombre_usuario = self.nombres_usuarios.get(str(user_id), "")
-            else:
-                nombre_usuario = ""
-            
-            # Preparar valores para la tabla
-            values = (
-                user_id,
-                nombre_usuario,
-                date,
-                time
-            )
-            
-            print(f"DEBUG: Insertando en tabla: {values}")
-            
-            # Insertar en tabla
-            self.tree.insert('', 'end', values=values)
+        # Mostrar registros (fecha y hora ya formateadas por el almacén; el nombre
+        # del usuario se busca solo para las filas visibles)
+        self.tabla.mostrar(VistaFilas(filas, self.valores_fila))
         
         # Actualizar información
-        self.logs_data = logs
-        self.results_info.set(f"Mostrando {len(logs)} de {len(self.all_logs)} registros")
+        self.logs_data = filas
+        self.results_info.set(f"Mostrando {len(filas)} de {len(self.almacen)} registros")
         
         # Actualizar estadísticas con todos los logs
-        self.update_statistics(self.all_logs)
-        
-        print(f"DEBUG: update_results completado. Registros en tabla: {len(self.tree.get_children())}")
+        self.update_statistics(self.almacen)
         
-    def update_statistics(self, logs):
-        """Actualizar estadísticas"""
-        if not logs:
-            self.total_records.set("0")
-            self.today_records.set("0")
-            self.unique_users.set("0")
-            return
+        logger.debug("update_results completado. Registros en tabla: %s", len(self.tabla))
         
-        # Total de registros
-        self.total_records.set(str(len(logs)))
-        
-        # Registros de hoy
-        today = datetime.now().date()
-        today_count = 0
-        unique_users = set()
-        
-        for log in logs:
-            timestamp = log.get('timestamp', None)
-            if timestamp:
-                try:
-                    # Si timestamp es ya un objeto datetime
-                    if isinstance(timestamp, datetime):
-                        dt = timestamp
-                    else:
-                        # Si es un número, convertir a datetime
-                        dt = datetime.fromtimestamp(timestamp)
-                    
-                    log_date = dt.date()
-                    if log_date == today:
-                        today_count += 1
-                except Exception as e:
-                    print(f"DEBUG: Error en estadísticas de fecha: {e}")
-                    pass
-            
-            # Usuarios únicos
-            user_id = log.get('user_id', '')
-            if user_id and user_id != 'N/A':
-                unique_users.add(user_id)
+    def valores_fila(self, fila):
+        """Valores de la tabla para una fila (user_id, fecha, hora) del almacén"""
+        user_id, date, time = fila
+        # Obtener nombre del usuario desde el diccionario cargado
+        nombre_usuario = self.nombres_usuarios.get(user_id, "") if user_id else ""
+        return (user_id or 'N/A', nombre_usuario, date, time)
         
-        self.today_records.set(str(today_count))
-        self.unique_users.set(str(len(unique_users)))
+    def update_statistics(self, almacen):
+        """Actualizar estadísticas"""
+        # Total, registros de hoy (búsqueda binaria) y usuarios únicos (set sobre códigos)
+        self.total_records.set(str(len(almacen)))
+        self.today_records.set(str(almacen.contar_dia()))
+        self.unique_users.set(str(almacen.usuarios_unicos()))
+        
+        # Conteos por día (saltos con búsqueda binaria) y por usuario (Counter sobre códigos)
+        por_dia = almacen.conteo_por_dia()
+        if por_dia:
+            dia, cantidad = max(por_dia, key=lambda conteo: conteo[1])
+            self.busiest_day.set(f"{dia.strftime('%d/%m/%Y')} ({cantidad}) de {len(por_dia)} día(s)")
+        else:
+            self.busiest_day.set("-")
+        
+        por_usuario = almacen.conteo_por_usuario()
+        for sin_usuario in SIN_USUARIO:
+            por_usuario.pop(sin_usuario, None)  # Registros sin usuario
+        if por_usuario:
+            user_id, cantidad = max(por_usuario.items(), key=lambda conteo: conteo[1])
+            nombre = self.nombres_usuarios.get(user_id)
+            usuario = f"{user_id} - {nombre}" if nombre else user_id
+            self.top_user.set(f"{usuario} ({cantidad})")
+        else:
+            self.top_user.set("-")
         
     def prev_page(self):
         """Ir a la página anterior"""
@@ -658,18 +608,18 @@ class ControlAsistencia(tk.Toplevel):
     
     def display_current_page(self):
         """Mostrar la página actual"""
-        if not self.all_logs:
+        if not len(self.almacen):
             return
         
         # Calcular índices de inicio y fin
         start_idx = (self.current_page - 1) * self.items_per_page
         end_idx = start_idx + self.items_per_page
         
-        # Obtener logs de la página actual
-        page_logs = self.all_logs[start_idx:end_idx]
+        # Formatear solo las filas de la página actual
+        page_rows = list(self.almacen.filas(start_idx, end_idx, self.recientes_primero()))
         
         # Actualizar tabla
-        self.update_results(page_logs)
+        self.update_results(page_rows)
         
         # Actualizar controles de paginación
         self.update_pagination_controls()
@@ -695,11 +645,10 @@ class ControlAsistencia(tk.Toplevel):
         
     def clear_results(self):
         """Limpiar resultados"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tabla.limpiar()
         
         self.logs_data = []
-        self.all_logs = []
+        self.almacen = AlmacenLogs()
         self.current_page = 1
         self.total_pages = 1
         self.results_info.set("No hay registros para mostrar")
@@ -708,6 +657,8 @@ class ControlAsistencia(tk.Toplevel):
         self.total_records.set("0")
         self.today_records.set("0")
         self.unique_users.set("0")
+        self.busiest_day.set("-")
+        self.top_user.set("-")
         
         # Deshabilitar controles de paginación
         self.prev_btn.config(state='disabled')
@@ -715,7 +666,7 @@ class ControlAsistencia(tk.Toplevel):
         
     def download_logs(self):
         """Descargar logs filtrados actuales a archivo CSV"""
-        if not self.all_logs:
+        if not len(self.almacen):
             messagebox.showwarning("Advertencia", "No hay datos para descargar")
             return
         
@@ -737,48 +688,20 @@ class ControlAsistencia(tk.Toplevel):
                     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                     writer.writeheader()
                     
-                    # Escribir todos los logs filtrados
-                    for log in self.all_logs:
-                        # Procesar timestamp igual que en update_results
-                        timestamp = log.get('timestamp', None)
-                        if timestamp:
-                            try:
-                                # Si timestamp es ya un objeto datetime
-                                if isinstance(timestamp, datetime):
-                                    dt = timestamp
-                                else:
-                                    # Si es un número, convertir a datetime
-                                    dt = datetime.fromtimestamp(timestamp)
-                                
-                                date = dt.strftime('%d/%m/%Y')
-                                time = dt.strftime('%H:%M:%S')
-                            except Exception as e:
-                                print(f"DEBUG: Error convirtiendo timestamp {timestamp}: {e}")
-                                date = "N/A"
-                                time = "N/A"
-                        else:
-                            date = "N/A"
-                            time = "N/A"
-                        
-                        # Obtener nombre del usuario igual que en update_results
-                        user_id = log.get('user_id', 'N/A')
-                        if user_id != 'N/A':
-                            nombre_usuario = self.nombres_usuarios.get(str(user_id), "")
-                        else:
-                            nombre_usuario = ""
-                        
+                    # Escribir todos los logs filtrados, en el orden seleccionado
+                    for user_id, date, time in self.almacen.filas(recientes_primero=self.recientes_primero()):
                         writer.writerow({
-                            'uid_k40': user_id,
-                            'nombre': nombre_usuario,
+                            'uid_k40': user_id or 'N/A',
+                            'nombre': self.nombres_usuarios.get(user_id, "") if user_id else "",
                             'fecha': date,
                             'hora': time
                         })
                 
-                messagebox.showinfo("Éxito", f"Se descargaron {len(self.all_logs)} registros a {filename}")
+                messagebox.showinfo("Éxito", f"Se descargaron {len(self.almacen)} registros a {filename}")
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error al descargar registros: {e}")
-            print(f"DEBUG: Error en download_logs: {e}")
+            logger.error("Error en download_logs: %s", e)
         
     def on_closing(self):
         """Manejar cierre de ventana"""
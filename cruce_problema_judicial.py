@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Cruce de postulantes registrados con la lista de cédulas con problema judicial
+
+El cruce se resuelve en el servidor con un JOIN por cédula (ambas columnas
+tienen índice único) y las coincidencias se leen con un cursor con nombre,
+por bloques, de modo que el registro completo se revisa en una sola pasada
+sin traerlo a memoria. Cada ejecución guarda su marca de agua (último
+postulante, última cédula de la lista y hora de inicio) en
+cruces_problema_judicial; una ejecución incremental solo revisa:
+
+- postulantes agregados o editados desde la ejecución anterior, contra toda la lista;
+- cédulas agregadas a la lista desde entonces, contra todos los postulantes.
+"""
+
+import csv
+import logging
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from database import conexion_dedicada, connect_db
+from tareas_segundo_plano import CargadorSegundoPlano
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Filas traídas del servidor por bloque
+FILAS_POR_BLOQUE = 2000
+
+# Columnas de cada coincidencia
+COLUMNAS_CRUCE = ['postulante_id', 'cedula', 'nombre', 'apellido', 'fecha_registro', 'unidad', 'registrado_por']
+
+
+def ultima_ejecucion(cursor=None):
+    """
+    Última ejecución completada del cruce
+
+    Args:
+        cursor: Cursor de base de datos opcional (para usar conexión existente)
+
+    Returns:
+        dict: {'fecha_inicio', 'fecha_fin', 'incremental', 'ultimo_postulante_id',
+               'ultima_cedula_id', 'coincidencias', 'usuario'}, o None si no hay
+    """
+    conn = None
+    try:
+        if cursor is None:
+            conn = connect_db()
+            if not conn:
+                return None
+            cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT fecha_inicio, fecha_fin, incremental, ultimo_postulante_id,
+                   ultima_cedula_id, coincidencias, usuario
+            FROM cruces_problema_judicial
+            ORDER BY id DESC
+            LIMIT 1
+        """)
+        fila = cursor.fetchone()
+        if fila is None:
+            return None
+        claves = ['fecha_inicio', 'fecha_fin', 'incremental', 'ultimo_postulante_id',
+                  'ultima_cedula_id', 'coincidencias', 'usuario']
+        return dict(zip(claves, fila))
+
+    except Exception as e:
+        logger.error("Error al obtener la última ejecución del cruce: %s", e)
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def ejecutar_cruce(al_coincidir=None, incremental=True, cancelar=None, usuario=None):
+    """
+    Cruzar los postulantes con la lista de problemas judiciales
+
+    La lectura se hace en una transacción REPEATABLE READ: las coincidencias
+    y la marca de agua registrada corresponden a la misma foto de la base.
+
+    Args:
+        al_coincidir (callable, optional): Recibe cada coincidencia (dict con
+            COLUMNAS_CRUCE) a medida que llega del servidor
+        incremental (bool): Revisar solo lo nuevo desde la última ejecución
+            (si no hay ejecución previa se revisa todo)
+        cancelar (threading.Event, optional): Evento que interrumpe el cruce
+        usuario (str, optional): Quién ejecuta el cruce (queda registrado)
+
+    Returns:
+        dict: {'coincidencias', 'incremental', 'desde', 'cancelado'},
+              o None si falló la base de datos
+    """
+    # Retiene la conexión toda la operación: una propia, fuera del pool
+    conn = conexion_dedicada()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+
+        previa = ultima_ejecucion(cursor) if incremental else None
+        incremental = previa is not None
+
+        cursor.execute("""
+            SELECT now(),
+                   (SELECT COALESCE(MAX(id), 0) FROM postulantes),
+                   (SELECT COALESCE(MAX(id), 0) FROM cedulas_problema_judicial)
+        """)
+        inicio, ultimo_postulante_id, ultima_cedula_id = cursor.fetchone()
+
+        condicion = "TRUE"
+        params = []
+        if incremental:
+            condicion = """(p.id > %s
+                            OR p.fecha_ultima_edicion >= %s
+                            OR c.id > %s)"""
+            params = [previa['ultimo_postulante_id'], previa['fecha_inicio'], previa['ultima_cedula_id']]
+
+        lector = conn.cursor(name='cruce_problema_judicial')
+        lector.itersize = FILAS_POR_BLOQUE
+        lector.execute(f"""
+            SELECT p.id, p.cedula, p.nombre, p.apellido, p.fecha_registro, p.unidad, p.registrado_por
+            FROM postulantes p
+            JOIN cedulas_problema_judicial c ON c.cedula = p.cedula
+            WHERE {condicion}
+            ORDER BY p.id
+        """, params)
+
+        coincidencias = 0
+        for fila in lector:
+            if cancelar is not None and cancelar.is_set():
+                lector.close()
+                conn.rollback()
+                logger.info("Cruce de problemas judiciales cancelado")
+                return {'coincidencias': coincidencias, 'incremental': incremental,
+                        'desde': previa['fecha_inicio'] if previa else None, 'cancelado': True}
+            coincidencias += 1
+            if al_coincidir is not None:
+                al_coincidir(dict(zip(COLUMNAS_CRUCE, fila)))
+        lector.close()
+
+        cursor.execute("""
+            INSERT INTO cruces_problema_judicial
+                (fecha_inicio, incremental, ultimo_postulante_id, ultima_cedula_id, coincidencias, usuario)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (inicio, incremental, ultimo_postulante_id, ultima_cedula_id, coincidencias, usuario))
+        conn.commit()
+
+        tipo = "incremental" if incremental else "completo"
+        logger.info("[OK] Cruce %s de problemas judiciales: %s coincidencias", tipo, coincidencias)
+        return {'coincidencias': coincidencias, 'incremental': incremental,
+                'desde': previa['fecha_inicio'] if previa else None, 'cancelado': False}
+
+    except Exception as e:
+        logger.error("Error en el cruce de problemas judiciales: %s", e)
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def exportar_cruce_csv(ruta, incremental=True, cancelar=None, usuario=None, al_coincidir=None):
+    """
+    Ejecutar el cruce escribiendo las coincidencias en un CSV a medida que llegan
+
+    Args:
+        ruta (str): Archivo CSV de salida (se elimina si el cruce no termina)
+        incremental, cancelar, usuario: Ver ejecutar_cruce
+        al_coincidir (callable, optional): Recibe además cada coincidencia
+
+    Returns:
+        dict: Resultado de ejecutar_cruce, o None si falló
+    """
+    with open(ruta, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=COLUMNAS_CRUCE)
+        writer.writeheader()
+
+        def escribir(coincidencia):
+            writer.writerow(coincidencia)
+            if al_coincidir is not None:
+                al_coincidir(coincidencia)
+
+        resultado = ejecutar_cruce(escribir, incremental, cancelar, usuario)
+
+    if resultado is None or resultado['cancelado']:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+    return resultado
+
+
+class CruceProblemaJudicial(tk.Toplevel):
+    """Ventana para cruzar todo el registro de postulantes con la lista judicial"""
+
+    def __init__(self, parent, user_data=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.user_data = user_data or {}
+
+        self.title("Cruce de Postulantes con Problemas Judiciales")
+        self.geometry("900x550")
+        self.resizable(True, True)
+        self.transient(parent)
+
+        # Configurar estilo
+        self.configure(bg='#f0f0f0')
+
+        # Cruce en segundo plano; las coincidencias se acumulan hasta que la interfaz las muestra
+        self.cargador = CargadorSegundoPlano(self, max_workers=1, nombre='cruce-judicial')
+        self.cancelar_evento = None
+        self.pendientes = []
+        self.pendientes_lock = threading.Lock()
+        self.mostradas = 0
+
+        self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.cargar_ultima_ejecucion()
+
+    def setup_ui(self):
+        """Configurar la interfaz"""
+        main_frame = ttk.Frame(self, padding=20)
+        main_frame.pack(expand=True, fill='both')
+
+        # Título
+        title_label = ttk.Label(main_frame, text="Cruce de Postulantes con Problemas Judiciales",
+                                font=('Segoe UI', 16, 'bold'))
+        title_label.pack(pady=(0, 10))
+
+        self.ultima_label = ttk.Label(main_frame, text="", font=('Segoe UI', 9), foreground='gray')
+        self.ultima_label.pack(anchor='w', pady=(0, 10))
+
+        # Opciones
+        options_frame = ttk.LabelFrame(main_frame, text="Opciones", padding=10)
+        options_frame.pack(fill='x', pady=(0, 10))
+
+        self.incremental_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Solo lo nuevo desde la última ejecución",
+                        variable=self.incremental_var).pack(side='left')
+
+        self.csv_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Guardar coincidencias en CSV",
+                        variable=self.csv_var).pack(side='left', padx=(20, 0))
+
+        self.cancel_button = ttk.Button(options_frame, text="Cancelar", command=self.cancelar_cruce,
+                                        state='disabled')
+        self.cancel_button.pack(side='right')
+
+        self.run_button = ttk.Button(options_frame, text="Ejecutar Cruce", command=self.ejecutar)
+        self.run_button.pack(side='right', padx=(0, 10))
+
+        # Resultados
+        results_frame = ttk.LabelFrame(main_frame, text="Coincidencias", padding=10)
+        results_frame.pack(fill='both', expand=True)
+
+        columnas = ('id', 'cedula', 'nombre', 'apellido', 'fecha_registro', 'unidad', 'registrado_por')
+        self.results_tree = ttk.Treeview(results_frame, columns=columnas, show='headings')
+        encabezados = ['ID', 'Cédula', 'Nombre', 'Apellido', 'Fecha Registro', 'Unidad', 'Registrado por']
+        anchos = [60, 100, 150, 150, 130, 120, 150]
+        for columna, encabezado, ancho in zip(columnas, encabezados, anchos):
+            self.results_tree.heading(columna, text=encabezado)
+            self.results_tree.column(columna, width=ancho, anchor='center')
+
+        scrollbar = ttk.Scrollbar(results_frame, orient='vertical', command=self.results_tree.yview)
+        self.results_tree.configure(yscrollcommand=scrollbar.set)
+        self.results_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        self.status_label = ttk.Label(main_frame, text="", font=('Segoe UI', 9))
+        self.status_label.pack(anchor='w', pady=(10, 0))
+
+    def cargar_ultima_ejecucion(self):
+        """Mostrar cuándo se ejecutó el cruce por última vez"""
+        def mostrar(previa):
+            if previa is None:
+                self.ultima_label.config(text="El cruce nunca se ejecutó: se revisará todo el registro")
+            else:
+                fecha = previa['fecha_inicio'].strftime('%d/%m/%Y %H:%M')
+                self.ultima_label.config(text=f"Última ejecución: {fecha} - "
+                                              f"{previa['coincidencias']} coincidencias")
+        self.cargador.enviar('ultima', ultima_ejecucion, mostrar)
+
+    def ejecutar(self):
+        """Lanzar el cruce en segundo plano"""
+        ruta = None
+        if self.csv_var.get():
+            ruta = filedialog.asksaveasfilename(
+                parent=self,
+                defaultextension=".csv",
+                filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")],
+                title="Guardar coincidencias"
+            )
+            if not ruta:
+                return
+
+        for item in self.results_tree.get_children():
+            self.results_tree.delete(item)
+        self.mostradas = 0
+        with self.pendientes_lock:
+            self.pendientes = []
+
+        usuario = f"{self.user_data.get('nombre', '')} {self.user_data.get('apellido', '')}".strip() or None
+        self.cancelar_evento = threading.Event()
+        self.run_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.status_label.config(text="Cruzando registros...")
+
+        if ruta:
+            self.cargador.enviar('cruce', exportar_cruce_csv, self.cruce_terminado,
+                                 ruta, self.incremental_var.get(), self.cancelar_evento, usuario,
+                                 self.acumular, al_fallar=lambda e: self.cruce_terminado(None))
+        else:
+            self.cargador.enviar('cruce', ejecutar_cruce, self.cruce_terminado,
+                                 self.acumular, self.incremental_var.get(), self.cancelar_evento, usuario,
+                                 al_fallar=lambda e: self.cruce_terminado(None))
+        self.after(200, self.mostrar_pendientes)
+
+    def acumular(self, coincidencia):
+        """Recibir una coincidencia (desde el hilo del cruce)"""
+        with self.pendientes_lock:
+            self.pendientes.append(coincidencia)
+
+    def mostrar_pendientes(self):
+        """Agregar a la tabla las coincidencias llegadas desde la última revisión"""
+        with self.pendientes_lock:
+            nuevas, self.pendientes = self.pendientes, []
+
+        for c in nuevas:
+            fecha = c['fecha_registro'].strftime('%d/%m/%Y %H:%M') if c['fecha_registro'] else ''
+            self.results_tree.insert('', 'end', values=(
+                c['postulante_id'], c['cedula'], c['nombre'], c['apellido'],
+                fecha, c['unidad'] or '', c['registrado_por'] or ''
+            ))
+        self.mostradas += len(nuevas)
+
+        if self.cancelar_evento is not None:
+            self.status_label.config(text=f"Cruzando registros... {self.mostradas} coincidencias")
+            self.after(200, self.mostrar_pendientes)
+
+    def cancelar_cruce(self):
+        """Interrumpir el cruce en curso (no se registra la ejecución)"""
+        if self.cancelar_evento is not None:
+            self.cancelar_evento.set()
+            self.cancel_button.config(state='disabled')
+            self.status_label.config(text="Cancelando...")
+
+    def cruce_terminado(self, resultado):
+        """Mostrar el resultado del cruce"""
+        self.cancelar_evento = None
+        self.mostrar_pendientes()
+        self.run_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+
+        if resultado is None:
+            self.status_label.config(text="")
+            messagebox.showerror("Error", "No se pudo completar el cruce", parent=self)
+            return
+
+        if resultado['cancelado']:
+            self.status_label.config(text=f"Cruce cancelado ({self.mostradas} coincidencias parciales)")
+            return
+
+        alcance = "postulantes y cédulas nuevos o editados" if resultado['incremental'] else "todo el registro"
+        self.status_label.config(text=f"Cruce completado sobre {alcance}: "
+                                      f"{resultado['coincidencias']} coincidencias")
+        self.cargar_ultima_ejecucion()
+
+    def cerrar(self):
+        """Cerrar la ventana cancelando un cruce en curso"""
+        if self.cancelar_evento is not None:
+            self.cancelar_evento.set()
+        self.cargador.cerrar()
+        self.destroy()
+
+
+if __name__ == "__main__":
+    # Prueba básica: cruce completo por consola
+    resultado = ejecutar_cruce(lambda c: print(f"  - {c['cedula']}: {c['nombre']} {c['apellido']}"),
+                               incremental=False)
+    print(f"Resultado: {resultado}")
@@ -5,44 +5,159 @@ Módulo de base de datos para Sistema QUIRA
 
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import bcrypt
 import logging
+import atexit
+import threading
+from contextlib import contextmanager
+
+from db_pool import ConnectionPool, PoolAgotadoError
+from registro_eventos import configurar_registro
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configurar_registro()
 logger = logging.getLogger(__name__)
 
 # Variable global para el usuario actual
 USUARIO_ACTUAL = None
 
-def connect_db():
+# Parámetros de conexión al servidor PostgreSQL
+DB_CONFIG = {
+    'dbname': "sistema_postulantes",
+    'user': "postgres",
+    'password': "decfespa67",  # Contraseña del servidor remoto
+    'host': "decfespaxsilco.ddns.net",
+    'port': "5432"
+}
+
+# Parámetros del pool de conexiones. Alcanza para los 4 hilos de estadísticas,
+# los 4 sondeos de la flota y el hilo de Tk a la vez; las conexiones que se
+# retienen mucho tiempo (búsqueda incremental, cruce, carga de cédulas,
+# escuchas LISTEN) no salen del pool (ver conexion_dedicada)
+POOL_CONFIG = {
+    'maxconn': 12,                 # Conexiones simultáneas como máximo
+    'minconn': 1,                  # Conexiones inactivas que nunca se expiran
+    'max_idle': 300,               # Segundos antes de cerrar una conexión inactiva
+    'health_check_interval': 30,   # Segundos de inactividad antes de verificar con SELECT 1
+    'acquire_timeout': 15          # Segundos de espera por una conexión libre
+}
+
+# Segundos que el hilo de Tk espera una conexión libre: con el pool agotado
+# es preferible informar el error a congelar la interfaz
+ACQUIRE_TIMEOUT_UI = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Modo de búsqueda de postulantes: 'auto' usa índices trigram si existen,
+# 'indexado' los exige y 'clasico' usa LOWER(...) LIKE sin índices
+BUSQUEDA_MODO = 'auto'
+_busqueda_indexada = None  # None = aún no verificado
+
+# Filas por lote que la búsqueda incremental entrega mientras llegan
+LOTE_BUSQUEDA_INCREMENTAL = 20
+
+# Caché en memoria de nombres de aparatos biométricos (aparato_id -> nombre)
+_cache_aparatos = {}
+_cache_aparatos_lock = threading.Lock()
+
+def get_pool():
     """
-    Conectar a la base de datos PostgreSQL
+    Obtener el pool de conexiones, creándolo (o recreándolo si cambió
+    DB_CONFIG / POOL_CONFIG) de forma perezosa
     
     Returns:
-        psycopg2.connection: Conexión a la base de datos
+        ConnectionPool: Pool de conexiones compartido por todo el proceso
+    """
+    global _pool
+    
+    with _pool_lock:
+        if (_pool is None or _pool.connect_kwargs != DB_CONFIG
+                or _pool.maxconn != POOL_CONFIG['maxconn']):
+            if _pool is not None:
+                _pool.closeall()
+            _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+        return _pool
+
+def cerrar_pool():
+    """
+    Cerrar todas las conexiones del pool (al salir de la aplicación)
+    """
+    global _pool
+    
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+atexit.register(cerrar_pool)
+
+def connect_db(timeout=None):
     """
+    Obtener una conexión PostgreSQL del pool
+    
+    La conexión devuelta se usa igual que una conexión psycopg2; al llamar
+    a close() vuelve al pool en lugar de cerrarse.
+    
+    Args:
+        timeout (float, optional): Segundos de espera por una conexión libre;
+            por defecto ACQUIRE_TIMEOUT_UI desde el hilo principal (Tk) y
+            POOL_CONFIG['acquire_timeout'] desde los demás
+    
+    Returns:
+        ConexionPooled: Conexión a la base de datos, o None si falla
+    """
+    if timeout is None and threading.current_thread() is threading.main_thread():
+        timeout = ACQUIRE_TIMEOUT_UI
     try:
-        # Conectar directamente con la contraseña correcta
-        conn = psycopg2.connect(
-            dbname="sistema_postulantes",
-            user="postgres",
-            password="decfespa67",  # Contraseña del servidor remoto
-            host="decfespaxsilco.ddns.net",
-            port="5432"
-        )
-        return conn
+        return get_pool().acquire(timeout)
+    except PoolAgotadoError as e:
+        logger.error("No hay conexiones libres en el pool: %s", e)
+        return None
     except psycopg2.OperationalError as e:
         logger.error("Error de conexión a PostgreSQL. Verifique:")
         logger.error("1. PostgreSQL esté instalado y ejecutándose")
         logger.error("2. Base de datos 'sistema_postulantes' exista")
         logger.error("3. Usuario 'postgres' tenga permisos")
         logger.error("4. Configure la contraseña en database.py si es necesario")
+        logger.error("Detalle: %s", e)
         return None
     except Exception as e:
-        logger.error(f"Error al conectar a la base de datos: {e}")
+        logger.error("Error al conectar a la base de datos: %s", e)
         return None
 
+def conexion_dedicada():
+    """
+    Abrir una conexión PostgreSQL propia, fuera del pool
+    
+    Para quien la retiene mucho tiempo (una ventana de búsqueda abierta, un
+    cruce o una carga masiva) sin quitarle conexiones al resto de la
+    aplicación. close() la cierra de verdad.
+    
+    Returns:
+        connection: Conexión psycopg2, o None si falla
+    """
+    try:
+        return psycopg2.connect(**DB_CONFIG)
+    except Exception as e:
+        logger.error("Error al abrir conexión dedicada a la base de datos: %s", e)
+        return None
+
+@contextmanager
+def conexion_db():
+    """
+    Context manager para usar una conexión del pool
+    
+    Hace commit al salir sin errores, rollback si hubo excepción, y siempre
+    devuelve la conexión al pool.
+    
+    Raises:
+        psycopg2.OperationalError: Si no se pudo obtener una conexión
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
 def validate_user(username, password):
     """
     Validar credenciales de usuario
@@ -91,17 +206,17 @@ def validate_user(username, password):
                     'primer_inicio': user[10]
                 }
                 
-                logger.info(f"Usuario autenticado: {USUARIO_ACTUAL['nombre']} {USUARIO_ACTUAL['apellido']}")
+                logger.info("Usuario autenticado: %s %s", USUARIO_ACTUAL['nombre'], USUARIO_ACTUAL['apellido'])
                 return USUARIO_ACTUAL
             else:
-                logger.warning(f"Contraseña incorrecta para usuario: {username}")
+                logger.warning("Contraseña incorrecta para usuario: %s", username)
                 return None
         else:
-            logger.warning(f"Usuario no encontrado: {username}")
+            logger.warning("Usuario no encontrado: %s", username)
             return None
             
     except Exception as e:
-        logger.error(f"Error en validación de usuario: {e}")
+        logger.error("Error en validación de usuario: %s", e)
         return None
     finally:
         if conn:
@@ -134,72 +249,40 @@ def update_password(user_id, new_password):
         cursor.execute(query, (hashed_password, user_id))
         
         conn.commit()
-        logger.info(f"Contraseña actualizada para usuario ID: {user_id}")
+        logger.info("Contraseña actualizada para usuario ID: %s", user_id)
         return True
         
     except Exception as e:
-        logger.error(f"Error al actualizar contraseña: {e}")
+        logger.error("Error al actualizar contraseña: %s", e)
         return False
     finally:
         if conn:
             conn.close()
 
-def create_default_admin():
-    """
-    Crear usuario administrador por defecto si no existe
-    """
-    try:
-        conn = connect_db()
-        if not conn:
-            return False
-            
-        cursor = conn.cursor()
-        
-        # Verificar si ya existe un usuario admin
-        cursor.execute("SELECT * FROM usuarios WHERE usuario = 'admin'")
-        existing_admin = cursor.fetchone()
-        
-        if not existing_admin:
-            # Crear usuario admin por defecto
-            hashed_password = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt()).decode()
-            
-            query = sql.SQL("""
-                INSERT INTO usuarios (usuario, contrasena, rol, nombre, apellido, 
-                                    grado, cedula, numero_credencial, telefono, 
-                                    primer_inicio) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """)
-            
-            cursor.execute(query, (
-                "admin", hashed_password, "SUPERADMIN", "Admin", "General",
-                "Comisario", "00000000", "CRED-ADMIN", "0000000000", True
-            ))
-            
-            conn.commit()
-            logger.info("[OK] Usuario admin creado con éxito")
-            return True
-        else:
-            logger.info("Usuario admin ya existe")
-            return True
-            
-    except Exception as e:
-        logger.error(f"Error al crear usuario admin: {e}")
-        return False
-    finally:
-        if conn:
-            conn.close()
+# Columnas de postulantes para listados (índice 19 = nombre del aparato)
+_COLUMNAS_POSTULANTES = """
+    p.id, p.nombre, p.apellido, p.cedula, p.fecha_nacimiento, 
+    p.telefono, p.fecha_registro, p.usuario_registrador, p.id_k40, 
+    p.huella_dactilar, p.observaciones, p.edad, p.unidad, p.dedo_registrado, 
+    p.registrado_por, p.aparato_id, p.uid_k40, p.usuario_ultima_edicion, 
+    p.fecha_ultima_edicion, a.nombre AS aparato_nombre
+"""
 
 def get_postulantes(limit=None, offset=None):
     """
     Obtener lista de postulantes con soporte para paginación
     
+    Incluye el nombre del aparato biométrico mediante LEFT JOIN, de modo que
+    una página completa se obtiene con una sola consulta.
+    
     Args:
         limit (int, optional): Número máximo de registros a retornar
         offset (int, optional): Número de registros a saltar
         
     Returns:
-        list: Lista de postulantes
+        list: Lista de postulantes (la última columna, índice 19, es el nombre del aparato)
     """
+    conn = None
     try:
         conn = connect_db()
         if not conn:
@@ -208,29 +291,32 @@ def get_postulantes(limit=None, offset=None):
         cursor = conn.cursor()
         
         # Construir query base
-        query = """
-            SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
-                   telefono, fecha_registro, usuario_registrador, id_k40, 
-                   huella_dactilar, observaciones, edad, unidad, dedo_registrado, 
-                   registrado_por, aparato_id, uid_k40, usuario_ultima_edicion, 
-                   fecha_ultima_edicion
-            FROM postulantes 
-            ORDER BY fecha_registro DESC
+        query = f"""
+            SELECT {_COLUMNAS_POSTULANTES}
+            FROM postulantes p
+            LEFT JOIN aparatos_biometricos a ON a.id = p.aparato_id
+            ORDER BY p.fecha_registro DESC, p.id DESC
         """
         
         # Agregar paginación si se especifica
+        params = []
         if limit is not None:
-            query += f" LIMIT {limit}"
+            query += " LIMIT %s"
+            params.append(int(limit))
             if offset is not None:
-                query += f" OFFSET {offset}"
+                query += " OFFSET %s"
+                params.append(int(offset))
         
-        cursor.execute(query)
+        cursor.execute(query, params)
         postulantes = cursor.fetchall()
         
+        # Aprovechar el JOIN para alimentar la caché de nombres de aparatos
+        _cachear_nombres_aparatos((row[15], row[19]) for row in postulantes)
+        
         return postulantes
         
     except Exception as e:
-        logger.error(f"Error al obtener postulantes: {e}")
+        logger.error("Error al obtener postulantes: %s", e)
         return []
     finally:
         if conn:
@@ -256,16 +342,203 @@ def get_total_postulantes():
         return total
         
     except Exception as e:
-        logger.error(f"Error al obtener total de postulantes: {e}")
+        logger.error("Error al obtener total de postulantes: %s", e)
+        return 0
+    finally:
+        if conn:
+            conn.close()
+
+def _patron_contiene(texto):
+    """
+    Convertir texto libre en patrón LIKE '%texto%' escapando comodines
+    """
+    texto = str(texto).strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{texto}%"
+
+def construir_filtros_postulantes(filtros=None):
+    """
+    Construir la cláusula WHERE para filtrar postulantes en el servidor
+    
+    Args:
+        filtros (dict, optional): Claves admitidas (todas opcionales):
+            nombre, apellido, cedula (texto contenido, sin distinguir mayúsculas),
+            fecha_desde, fecha_hasta (date/datetime, inclusivas),
+            unidad, dedo (coincidencia exacta),
+            aparato_id (int) o aparato (nombre del aparato)
+        
+    Returns:
+        tuple: (str cláusula WHERE sin la palabra WHERE o 'TRUE', list parámetros)
+    """
+    from datetime import datetime, date, timedelta
+    
+    filtros = filtros or {}
+    condiciones = []
+    params = []
+    
+    if filtros.get('nombre'):
+        condiciones.append("p.nombre ILIKE %s")
+        params.append(_patron_contiene(filtros['nombre']))
+    
+    if filtros.get('apellido'):
+        condiciones.append("p.apellido ILIKE %s")
+        params.append(_patron_contiene(filtros['apellido']))
+    
+    if filtros.get('cedula'):
+        condiciones.append("CAST(p.cedula AS TEXT) ILIKE %s")
+        params.append(_patron_contiene(filtros['cedula']))
+    
+    fecha_desde = filtros.get('fecha_desde')
+    if fecha_desde:
+        if isinstance(fecha_desde, datetime):
+            fecha_desde = fecha_desde.date()
+        condiciones.append("p.fecha_registro >= %s")
+        params.append(fecha_desde)
+    
+    fecha_hasta = filtros.get('fecha_hasta')
+    if fecha_hasta:
+        if isinstance(fecha_hasta, datetime):
+            fecha_hasta = fecha_hasta.date()
+        # Fecha hasta inclusiva: todo el día seleccionado (rango semiabierto, usa índice)
+        condiciones.append("p.fecha_registro < %s")
+        params.append(fecha_hasta + timedelta(days=1))
+    
+    if filtros.get('unidad'):
+        condiciones.append("p.unidad = %s")
+        params.append(filtros['unidad'])
+    
+    if filtros.get('dedo'):
+        condiciones.append("p.dedo_registrado = %s")
+        params.append(filtros['dedo'])
+    
+    if filtros.get('aparato_id'):
+        condiciones.append("p.aparato_id = %s")
+        params.append(filtros['aparato_id'])
+    elif filtros.get('aparato'):
+        condiciones.append("a.nombre = %s")
+        params.append(filtros['aparato'])
+    
+    where = " AND ".join(condiciones) if condiciones else "TRUE"
+    return where, params
+
+def contar_postulantes(filtros=None, cursor=None):
+    """
+    Contar postulantes que cumplen los filtros
+    
+    Args:
+        filtros (dict, optional): Ver construir_filtros_postulantes
+        cursor: Cursor de base de datos opcional (para usar conexión existente)
+        
+    Returns:
+        int: Cantidad de postulantes
+    """
+    conn = None
+    try:
+        if cursor is None:
+            conn = connect_db()
+            if not conn:
+                return 0
+            cursor = conn.cursor()
+        
+        where, params = construir_filtros_postulantes(filtros)
+        
+        # El JOIN solo es necesario si se filtra por nombre de aparato
+        filtra_por_nombre_aparato = bool(filtros and filtros.get('aparato') and not filtros.get('aparato_id'))
+        join = "LEFT JOIN aparatos_biometricos a ON a.id = p.aparato_id" if filtra_por_nombre_aparato else ""
+        cursor.execute(f"SELECT COUNT(*) FROM postulantes p {join} WHERE {where}", params)
+        return cursor.fetchone()[0]
+        
+    except Exception as e:
+        logger.error("Error al contar postulantes: %s", e)
         return 0
     finally:
         if conn:
             conn.close()
 
+def get_postulantes_pagina(filtros=None, limit=10, posicion=None, direccion='primera', incluir_total=False):
+    """
+    Obtener una página de postulantes filtrada en el servidor con paginación
+    por clave (keyset) sobre (fecha_registro, id), más reciente primero
+    
+    A diferencia de LIMIT/OFFSET, el costo no crece con la profundidad de la
+    página: cada página es un recorrido del índice desde la clave de corte.
+    
+    Args:
+        filtros (dict, optional): Ver construir_filtros_postulantes
+        limit (int): Cantidad de registros de la página
+        posicion (tuple, optional): Clave (fecha_registro, id) de corte. Para
+            'siguiente' es la última fila de la página actual; para 'anterior'
+            la primera
+        direccion (str): 'primera', 'siguiente', 'anterior' o 'ultima'
+        incluir_total (bool): Si también se debe contar el total filtrado
+        
+    Returns:
+        dict: {'postulantes': list (mismas columnas que get_postulantes),
+               'total': int o None si no se pidió}
+    """
+    conn = None
+    resultado = {'postulantes': [], 'total': None}
+    try:
+        conn = connect_db()
+        if not conn:
+            return resultado
+            
+        cursor = conn.cursor()
+        
+        where, params = construir_filtros_postulantes(filtros)
+        
+        if direccion in ('siguiente', 'anterior') and posicion is None:
+            direccion = 'primera'
+        
+        if direccion == 'siguiente':
+            where += " AND (p.fecha_registro, p.id) < (%s, %s)"
+            params.extend(posicion)
+        elif direccion == 'anterior':
+            where += " AND (p.fecha_registro, p.id) > (%s, %s)"
+            params.extend(posicion)
+        
+        # Para retroceder (o ir a la última página) se recorre el índice en sentido
+        # ascendente y luego se invierte el resultado
+        ascendente = direccion in ('anterior', 'ultima')
+        orden = "ASC" if ascendente else "DESC"
+        
+        query = f"""
+            SELECT {_COLUMNAS_POSTULANTES}
+            FROM postulantes p
+            LEFT JOIN aparatos_biometricos a ON a.id = p.aparato_id
+            WHERE {where}
+            ORDER BY p.fecha_registro {orden}, p.id {orden}
+            LIMIT %s
+        """
+        params.append(int(limit))
+        
+        cursor.execute(query, params)
+        postulantes = cursor.fetchall()
+        if ascendente:
+            postulantes.reverse()
+        
+        _cachear_nombres_aparatos((row[15], row[19]) for row in postulantes)
+        resultado['postulantes'] = postulantes
+        
+        if incluir_total:
+            resultado['total'] = contar_postulantes(filtros, cursor=cursor)
+        
+        return resultado
+        
+    except Exception as e:
+        logger.error("Error al obtener página de postulantes: %s", e)
+        return resultado
+    finally:
+        if conn:
+            conn.close()
+
 def verificar_cedula_problema_judicial(cedula, cursor=None):
     """
     Verificar si una cédula tiene problemas judiciales
     
+    Sin cursor se consulta la lista en memoria (cache_problema_judicial), que
+    se carga una vez y se refresca de forma incremental por LISTEN/NOTIFY o
+    vencimiento. Con cursor se consulta la tabla dentro de esa transacción.
+    
     Args:
         cedula (str): Número de cédula a verificar
         cursor: Cursor de base de datos opcional (para usar conexión existente)
@@ -284,30 +557,31 @@ def verificar_cedula_problema_judicial(cedula, cursor=None):
             resultado = cursor.fetchone()
             return resultado is not None
         
-        # Si no se proporciona cursor, crear nueva conexión
-        else:
-            conn = connect_db()
-            if not conn:
-                return False
-                
-            cursor = conn.cursor()
-            
-            # Verificar si la cédula existe en la tabla de problemas judiciales
-            cursor.execute("""
-                SELECT id FROM cedulas_problema_judicial 
-                WHERE cedula = %s
-            """, (cedula,))
-            
-            resultado = cursor.fetchone()
-            
-            return resultado is not None
+        from cache_problema_judicial import lista_problema_judicial
+        lista_problema_judicial.iniciar_escucha()
+        return lista_problema_judicial.contiene(cedula)
             
     except Exception as e:
-        logger.error(f"Error al verificar cédula problema judicial: {e}")
+        logger.error("Error al verificar cédula problema judicial: %s", e)
         return False
-    finally:
-        if not cursor and 'conn' in locals():
-            conn.close()
+
+def verificar_cedulas_problema_judicial(cedulas):
+    """
+    Verificar un lote de cédulas contra la lista de problemas judiciales
+    
+    Args:
+        cedulas (iterable): Cédulas a verificar
+        
+    Returns:
+        set: Cédulas del lote que tienen problemas judiciales
+    """
+    try:
+        from cache_problema_judicial import lista_problema_judicial
+        lista_problema_judicial.iniciar_escucha()
+        return lista_problema_judicial.verificar_lote(cedulas)
+    except Exception as e:
+        logger.error("Error al verificar lote de cédulas problema judicial: %s", e)
+        return set()
 
 def agregar_postulante(postulante_data):
     """
@@ -332,11 +606,11 @@ def agregar_postulante(postulante_data):
         # Opción 1: Usar el nombre proporcionado directamente (más confiable)
         if postulante_data.get('nombre_registrador'):
             nombre_registrador = postulante_data['nombre_registrador']
-            logger.info(f"[OK] Usando nombre proporcionado: {nombre_registrador}")
+            logger.info("[OK] Usando nombre proporcionado: %s", nombre_registrador)
         
         # Opción 2: Buscar por ID como fallback
         elif postulante_data.get('usuario_registrador'):
-            logger.info(f"[SEARCH] Buscando usuario registrador ID: {postulante_data['usuario_registrador']}")
+            logger.info("[SEARCH] Buscando usuario registrador ID: %s", postulante_data['usuario_registrador'])
             cursor.execute("""
                 SELECT grado, nombre, apellido FROM usuarios 
                 WHERE id = %s
@@ -348,9 +622,9 @@ def agregar_postulante(postulante_data):
                 nombre = usuario_data[1] or ""
                 apellido = usuario_data[2] or ""
                 nombre_registrador = f"{grado} {nombre} {apellido}".strip()
-                logger.info(f"[OK] Usuario encontrado por ID: {nombre_registrador}")
+                logger.info("[OK] Usuario encontrado por ID: %s", nombre_registrador)
             else:
-                logger.warning(f"[WARN] Usuario con ID {postulante_data['usuario_registrador']} no encontrado en la base de datos")
+                logger.warning("[WARN] Usuario con ID %s no encontrado en la base de datos", postulante_data['usuario_registrador'])
         else:
             logger.warning("[WARN] No se proporcionó usuario_registrador ni nombre_registrador en los datos")
         
@@ -380,7 +654,7 @@ def agregar_postulante(postulante_data):
         ))
         
         conn.commit()
-        logger.info(f"Postulante agregado: {postulante_data['nombre']} {postulante_data['apellido']} por {nombre_registrador}")
+        logger.info("Postulante agregado: %s %s por %s", postulante_data['nombre'], postulante_data['apellido'], nombre_registrador)
         
         return {
             'success': True, 
@@ -388,119 +662,420 @@ def agregar_postulante(postulante_data):
         }
         
     except Exception as e:
-        logger.error(f"Error al agregar postulante: {e}")
+        logger.error("Error al agregar postulante: %s", e)
         return {'success': False, 'message': f'Error al agregar postulante: {e}'}
     finally:
         if conn:
             conn.close()
 
-def buscar_postulante(cedula=None, nombre=None):
+def _buscar_postulante_clasico(cursor, cedula=None, nombre=None):
     """
-    Buscar postulante por cédula o nombre (OPTIMIZADO)
-    
-    Args:
-        cedula (str): Número de cédula
-        nombre (str): Nombre del postulante
-        
-    Returns:
-        list: Lista de postulantes encontrados
+    Búsqueda con LOWER(...) LIKE (sin índices, recorre toda la tabla)
     """
-    try:
-        conn = connect_db()
-        if not conn:
-            return []
+    if cedula:
+        # Búsqueda optimizada por cédula con ordenamiento por relevancia (case-insensitive)
+        query = sql.SQL("""
+            SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
+                   telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
+                   usuario_ultima_edicion, fecha_ultima_edicion
+            FROM postulantes 
+            WHERE LOWER(CAST(cedula AS TEXT)) LIKE LOWER(%s)
+            ORDER BY 
+                CASE 
+                    WHEN LOWER(CAST(cedula AS TEXT)) = LOWER(%s) THEN 1  -- Coincidencia exacta
+                    WHEN LOWER(CAST(cedula AS TEXT)) LIKE LOWER(%s) THEN 2  -- Empieza con
+                    ELSE 3  -- Contiene
+                END,
+                fecha_registro DESC
+            LIMIT 100
+        """)
+        search_term = f"%{cedula}%"
+        starts_with = f"{cedula}%"
+        cursor.execute(query, (search_term, cedula, starts_with))
+    elif nombre:
+        # Búsqueda optimizada por nombre con ordenamiento por relevancia
+        search_terms = nombre.strip().split()
+        
+        if len(search_terms) > 1:
+            # Búsqueda con múltiples palabras
+            conditions = []
+            params = []
             
-        cursor = conn.cursor()
-        
-        if cedula:
-            # Búsqueda optimizada por cédula con ordenamiento por relevancia (case-insensitive)
-            query = sql.SQL("""
-                SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
-                       telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
-                       usuario_ultima_edicion, fecha_ultima_edicion
-                FROM postulantes 
-                WHERE LOWER(CAST(cedula AS TEXT)) LIKE LOWER(%s)
-                ORDER BY 
-                    CASE 
-                        WHEN LOWER(CAST(cedula AS TEXT)) = LOWER(%s) THEN 1  -- Coincidencia exacta
-                        WHEN LOWER(CAST(cedula AS TEXT)) LIKE LOWER(%s) THEN 2  -- Empieza con
-                        ELSE 3  -- Contiene
-                    END,
-                    fecha_registro DESC
-                LIMIT 100
-            """)
-            search_term = f"%{cedula}%"
-            starts_with = f"{cedula}%"
-            cursor.execute(query, (search_term, cedula, starts_with))
-        elif nombre:
-            # Búsqueda optimizada por nombre con ordenamiento por relevancia
-            search_terms = nombre.strip().split()
+            for term in search_terms:
+                if term.strip():
+                    conditions.append("(LOWER(nombre) LIKE LOWER(%s) OR LOWER(apellido) LIKE LOWER(%s))")
+                    params.extend([f"%{term}%", f"%{term}%"])
             
-            if len(search_terms) > 1:
-                # Búsqueda con múltiples palabras
-                conditions = []
-                params = []
-                
-                for term in search_terms:
-                    if term.strip():
-                        conditions.append("(LOWER(nombre) LIKE LOWER(%s) OR LOWER(apellido) LIKE LOWER(%s))")
-                        params.extend([f"%{term}%", f"%{term}%"])
-                
-                if conditions:
-                    query = sql.SQL(f"""
-                        SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
-                               telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
-                               usuario_ultima_edicion, fecha_ultima_edicion
-                        FROM postulantes 
-                        WHERE {' AND '.join(conditions)}
-                        ORDER BY 
-                            CASE 
-                                WHEN LOWER(nombre) LIKE LOWER(%s) THEN 1  -- Nombre empieza con
-                                WHEN LOWER(apellido) LIKE LOWER(%s) THEN 2  -- Apellido empieza con
-                                ELSE 3
-                            END,
-                            fecha_registro DESC
-                        LIMIT 100
-                    """)
-                    params.extend([f"{nombre}%", f"{nombre}%"])
-                    cursor.execute(query, params)
-                else:
-                    return []
-            else:
-                # Búsqueda con una sola palabra optimizada
-                query = sql.SQL("""
+            if conditions:
+                query = sql.SQL(f"""
                     SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
                            telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
                            usuario_ultima_edicion, fecha_ultima_edicion
                     FROM postulantes 
-                    WHERE LOWER(nombre) LIKE LOWER(%s) OR LOWER(apellido) LIKE LOWER(%s)
+                    WHERE {' AND '.join(conditions)}
                     ORDER BY 
                         CASE 
                             WHEN LOWER(nombre) LIKE LOWER(%s) THEN 1  -- Nombre empieza con
                             WHEN LOWER(apellido) LIKE LOWER(%s) THEN 2  -- Apellido empieza con
-                            WHEN LOWER(nombre) LIKE LOWER(%s) THEN 3  -- Nombre contiene
-                            WHEN LOWER(apellido) LIKE LOWER(%s) THEN 4  -- Apellido contiene
-                            ELSE 5
+                            ELSE 3
                         END,
                         fecha_registro DESC
                     LIMIT 100
                 """)
-                search_term = f"%{nombre}%"
-                starts_with = f"{nombre}%"
-                cursor.execute(query, (search_term, search_term, starts_with, starts_with, search_term, search_term))
+                params.extend([f"{nombre}%", f"{nombre}%"])
+                cursor.execute(query, params)
+            else:
+                return []
         else:
+            # Búsqueda con una sola palabra optimizada
+            query = sql.SQL("""
+                SELECT id, nombre, apellido, cedula, fecha_nacimiento, 
+                       telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
+                       usuario_ultima_edicion, fecha_ultima_edicion
+                FROM postulantes 
+                WHERE LOWER(nombre) LIKE LOWER(%s) OR LOWER(apellido) LIKE LOWER(%s)
+                ORDER BY 
+                    CASE 
+                        WHEN LOWER(nombre) LIKE LOWER(%s) THEN 1  -- Nombre empieza con
+                        WHEN LOWER(apellido) LIKE LOWER(%s) THEN 2  -- Apellido empieza con
+                        WHEN LOWER(nombre) LIKE LOWER(%s) THEN 3  -- Nombre contiene
+                        WHEN LOWER(apellido) LIKE LOWER(%s) THEN 4  -- Apellido contiene
+                        ELSE 5
+                    END,
+                    fecha_registro DESC
+                LIMIT 100
+            """)
+            search_term = f"%{nombre}%"
+            starts_with = f"{nombre}%"
+            cursor.execute(query, (search_term, search_term, starts_with, starts_with, search_term, search_term))
+    else:
+        return []
+    
+    return cursor.fetchall()
+
+_COLUMNAS_BUSQUEDA = """
+    id, nombre, apellido, cedula, fecha_nacimiento, 
+    telefono, fecha_registro, usuario_registrador, registrado_por, aparato_id, dedo_registrado,
+    usuario_ultima_edicion, fecha_ultima_edicion
+"""
+
+def _buscar_postulante_indexado(cursor, cedula=None, nombre=None):
+    """
+    Búsqueda sin distinguir mayúsculas ni acentos apoyada en índices GIN
+    trigram sobre quira_normalizar(nombre/apellido/cedula)
+    
+    El orden por relevancia es el mismo que el de la búsqueda clásica.
+    """
+    if cedula:
+        termino = str(cedula).strip()
+        contiene = _patron_contiene(termino)
+        empieza = contiene[1:]
+        cursor.execute(f"""
+            SELECT {_COLUMNAS_BUSQUEDA}
+            FROM postulantes 
+            WHERE quira_normalizar(cedula) LIKE quira_normalizar(%s)
+            ORDER BY 
+                CASE 
+                    WHEN quira_normalizar(cedula) = quira_normalizar(%s) THEN 1  -- Coincidencia exacta
+                    WHEN quira_normalizar(cedula) LIKE quira_normalizar(%s) THEN 2  -- Empieza con
+                    ELSE 3  -- Contiene
+                END,
+                fecha_registro DESC
+            LIMIT 100
+        """, (contiene, termino, empieza))
+        return cursor.fetchall()
+    
+    if nombre:
+        terminos = [t for t in nombre.strip().split() if t.strip()]
+        if not terminos:
             return []
         
-        postulantes = cursor.fetchall()
-        return postulantes
+        # Cada palabra debe aparecer en el nombre o en el apellido
+        condiciones = []
+        params = []
+        for termino in terminos:
+            patron = _patron_contiene(termino)
+            condiciones.append("(quira_normalizar(nombre) LIKE quira_normalizar(%s) "
+                               "OR quira_normalizar(apellido) LIKE quira_normalizar(%s))")
+            params.extend([patron, patron])
+        
+        empieza = _patron_contiene(nombre)[1:]
+        if len(terminos) > 1:
+            orden = """
+                    WHEN quira_normalizar(nombre) LIKE quira_normalizar(%s) THEN 1  -- Nombre empieza con
+                    WHEN quira_normalizar(apellido) LIKE quira_normalizar(%s) THEN 2  -- Apellido empieza con
+                    ELSE 3
+            """
+            params.extend([empieza, empieza])
+        else:
+            contiene = _patron_contiene(nombre)
+            orden = """
+                    WHEN quira_normalizar(nombre) LIKE quira_normalizar(%s) THEN 1  -- Nombre empieza con
+                    WHEN quira_normalizar(apellido) LIKE quira_normalizar(%s) THEN 2  -- Apellido empieza con
+                    WHEN quira_normalizar(nombre) LIKE quira_normalizar(%s) THEN 3  -- Nombre contiene
+                    WHEN quira_normalizar(apellido) LIKE quira_normalizar(%s) THEN 4  -- Apellido contiene
+                    ELSE 5
+            """
+            params.extend([empieza, empieza, contiene, contiene])
+        
+        cursor.execute(f"""
+            SELECT {_COLUMNAS_BUSQUEDA}
+            FROM postulantes 
+            WHERE {' AND '.join(condiciones)}
+            ORDER BY 
+                CASE 
+                    {orden}
+                END,
+                fecha_registro DESC
+            LIMIT 100
+        """, params)
+        return cursor.fetchall()
+    
+    return []
+
+def busqueda_indexada_disponible(cursor=None):
+    """
+    Verificar (una vez por sesión) si existen la función quira_normalizar y
+    los índices trigram creados por init_database
+    
+    Args:
+        cursor: Cursor de base de datos opcional (para usar conexión existente)
+        
+    Returns:
+        bool: True si la búsqueda indexada puede usarse
+    """
+    global _busqueda_indexada
+    
+    if _busqueda_indexada is not None:
+        return _busqueda_indexada
+    
+    conn = None
+    try:
+        if cursor is None:
+            conn = connect_db()
+            if not conn:
+                return False
+            cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM pg_indexes 
+            WHERE tablename = 'postulantes' 
+            AND indexname IN ('idx_postulantes_nombre_trgm', 'idx_postulantes_apellido_trgm', 
+                              'idx_postulantes_cedula_trgm')
+        """)
+        _busqueda_indexada = cursor.fetchone()[0] == 3
+        if not _busqueda_indexada:
+            logger.warning("[WARN] Índices trigram no disponibles, se usará búsqueda clásica")
+        return _busqueda_indexada
+        
+    except Exception as e:
+        logger.error("Error al verificar búsqueda indexada: %s", e)
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+def buscar_postulante(cedula=None, nombre=None, modo=None):
+    """
+    Buscar postulante por cédula o nombre (OPTIMIZADO)
+    
+    Args:
+        cedula (str): Número de cédula
+        nombre (str): Nombre del postulante
+        modo (str, optional): 'auto', 'indexado' o 'clasico'; por defecto BUSQUEDA_MODO
+        
+    Returns:
+        list: Lista de postulantes encontrados
+    """
+    conn = None
+    try:
+        if not cedula and not nombre:
+            return []
+        
+        conn = connect_db()
+        if not conn:
+            return []
+            
+        cursor = conn.cursor()
+        
+        modo = modo or BUSQUEDA_MODO
+        if modo == 'indexado' or (modo == 'auto' and busqueda_indexada_disponible(cursor)):
+            return _buscar_postulante_indexado(cursor, cedula, nombre)
+        return _buscar_postulante_clasico(cursor, cedula, nombre)
         
     except Exception as e:
-        logger.error(f"Error al buscar postulante: {e}")
+        logger.error("Error al buscar postulante: %s", e)
         return []
     finally:
         if conn:
             conn.close()
 
+class _CursorPorLotes:
+    """
+    Cursor con nombre (del lado del servidor) cuyo fetchall() trae las filas
+    con fetchmany y entrega cada lote apenas llega, así las funciones de
+    búsqueda se reutilizan sin cambios
+    """
+
+    def __init__(self, cursor, al_lote=None, tamano=LOTE_BUSQUEDA_INCREMENTAL, vigente=None):
+        self._cursor = cursor
+        self._al_lote = al_lote
+        self._tamano = tamano
+        self._vigente = vigente
+
+    def execute(self, query, params=None):
+        return self._cursor.execute(query, params)
+
+    def fetchall(self):
+        filas = []
+        while True:
+            lote = self._cursor.fetchmany(self._tamano)
+            if not lote:
+                break
+            if self._vigente is not None and not self._vigente():
+                break  # Búsqueda reemplazada: no seguir leyendo
+            filas.extend(lote)
+            if self._al_lote:
+                self._al_lote(lote)
+        return filas
+
+class BusquedaIncremental:
+    """
+    Búsqueda de postulantes mientras se escribe
+
+    Cada ventana usa una sola conexión dedicada, fuera del pool (no una por
+    búsqueda), y una consulta a la vez. Al pedir una búsqueda nueva, la que está en curso se
+    cancela en el servidor con connection.cancel(), que puede llamarse desde
+    cualquier hilo; las filas se entregan por lotes a medida que llegan.
+    """
+
+    def __init__(self, modo=None):
+        """
+        Args:
+            modo (str, optional): 'auto', 'indexado' o 'clasico'; por defecto BUSQUEDA_MODO
+        """
+        self.modo = modo
+        self._conn = None
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._en_curso = False
+        self._cerrada = False
+
+    def cancelar(self):
+        """
+        Invalidar la búsqueda anterior y cancelar en el servidor la consulta en curso
+
+        Returns:
+            int: Generación que debe pasarse a buscar() para la próxima búsqueda
+        """
+        with self._lock:
+            self._generacion += 1
+            if self._en_curso and self._conn is not None:
+                # cancel() abre una conexión aparte al servidor: no esperar en el hilo de Tk
+                threading.Thread(target=self._enviar_cancelacion, args=(self._conn.cancel,),
+                                 name='cancelar-busqueda', daemon=True).start()
+            return self._generacion
+
+    @staticmethod
+    def _enviar_cancelacion(cancelar):
+        try:
+            cancelar()
+        except Exception as e:
+            logger.warning("[WARN] No se pudo cancelar la búsqueda en curso: %s", e)
+
+    def vigente(self, generacion):
+        """True si no se pidió otra búsqueda después de esta generación"""
+        return generacion == self._generacion and not self._cerrada
+
+    def buscar(self, generacion, cedula=None, nombre=None, al_lote=None):
+        """
+        Ejecutar una búsqueda (desde un hilo de trabajo)
+
+        Args:
+            generacion (int): Valor devuelto por cancelar() al pedir la búsqueda
+            cedula (str): Número de cédula
+            nombre (str): Nombre del postulante
+            al_lote (callable, optional): Recibe cada lote de filas en el hilo de trabajo
+
+        Returns:
+            list: Postulantes encontrados, o None si la búsqueda fue reemplazada por otra
+        """
+        if not cedula and not nombre:
+            return []
+
+        with self._lock:
+            if not self.vigente(generacion):
+                return None
+            self._en_curso = True
+
+        try:
+            # Una cancelación enviada justo cuando terminaba la consulta anterior
+            # puede llegar a esta; en ese caso se reintenta una vez
+            for intento in range(2):
+                conn = self._conexion()
+                if not conn:
+                    return []
+                try:
+                    modo = self.modo or BUSQUEDA_MODO
+                    indexada = modo == 'indexado' or (
+                        modo == 'auto' and busqueda_indexada_disponible(conn.cursor()))
+                    cursor = _CursorPorLotes(conn.cursor(name='busqueda_incremental'), al_lote,
+                                             vigente=lambda: self.vigente(generacion))
+                    if indexada:
+                        filas = _buscar_postulante_indexado(cursor, cedula, nombre)
+                    else:
+                        filas = _buscar_postulante_clasico(cursor, cedula, nombre)
+                    conn.rollback()  # Cierra el cursor del servidor
+                    return filas if self.vigente(generacion) else None
+
+                except psycopg2.extensions.QueryCanceledError:
+                    conn.rollback()
+                    if not self.vigente(generacion):
+                        return None
+                    if intento:
+                        raise
+
+        except Exception as e:
+            logger.error("Error en búsqueda incremental: %s", e)
+            self._descartar_conexion()
+            return []
+        finally:
+            with self._lock:
+                self._en_curso = False
+                if self._cerrada:
+                    self._liberar_conexion()
+
+    def cerrar(self):
+        """Cancelar la búsqueda en curso y cerrar la conexión"""
+        self.cancelar()
+        with self._lock:
+            self._cerrada = True
+            if not self._en_curso:
+                self._liberar_conexion()
+
+    def _conexion(self):
+        """Conexión de la sesión, abierta la primera vez (o si se perdió)"""
+        with self._lock:
+            if self._conn is not None and self._conn.closed:
+                self._liberar_conexion()
+            if self._conn is None:
+                self._conn = conexion_dedicada()
+            return self._conn
+
+    def _descartar_conexion(self):
+        """Cerrar la conexión tras un error; la próxima búsqueda abre otra"""
+        with self._lock:
+            self._liberar_conexion()
+
+    def _liberar_conexion(self):
+        # Llamar con self._lock tomado
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
 def get_usuarios():
     """
     Obtener lista de usuarios del sistema
@@ -528,7 +1103,7 @@ def get_usuarios():
         return usuarios
         
     except Exception as e:
-        logger.error(f"Error al obtener usuarios: {e}")
+        logger.error("Error al obtener usuarios: %s", e)
         return []
     finally:
         if conn:
@@ -575,11 +1150,11 @@ def crear_usuario(usuario_data):
         ))
         
         conn.commit()
-        logger.info(f"Usuario creado: {usuario_data['nombre']} {usuario_data['apellido']}")
+        logger.info("Usuario creado: %s %s", usuario_data['nombre'], usuario_data['apellido'])
         return True
         
     except Exception as e:
-        logger.error(f"Error al crear usuario: {e}")
+        logger.error("Error al crear usuario: %s", e)
         return False
     finally:
         if conn:
@@ -613,7 +1188,7 @@ def actualizar_postulante(postulante_id, postulante_data, user_data=None):
         
         datos_actuales = cursor.fetchone()
         if not datos_actuales:
-            logger.error(f"Postulante con ID {postulante_id} no encontrado")
+            logger.error("Postulante con ID %s no encontrado", postulante_id)
             return False
         
         # Preparar información del usuario que edita
@@ -710,18 +1285,6 @@ def actualizar_postulante(postulante_id, postulante_data, user_data=None):
         
         # Registrar en historial de ediciones si hay cambios
         if cambios:
-            # Crear tabla de historial si no existe
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS historial_ediciones_postulantes (
-                    id SERIAL PRIMARY KEY,
-                    postulante_id INTEGER NOT NULL,
-                    usuario_editor VARCHAR(100) NOT NULL,
-                    fecha_edicion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    cambios TEXT NOT NULL,
-                    FOREIGN KEY (postulante_id) REFERENCES postulantes(id) ON DELETE CASCADE
-                )
-            """)
-            
             # Insertar registro en historial con hora local
             cambios_texto = "; ".join(cambios)
             from datetime import datetime
@@ -733,11 +1296,11 @@ def actualizar_postulante(postulante_id, postulante_data, user_data=None):
             """, (postulante_id, usuario_editor, hora_local, cambios_texto))
         
         conn.commit()
-        logger.info(f"Postulante actualizado: {postulante_data['nombre']} {postulante_data['apellido']} por {usuario_editor}")
+        logger.info("Postulante actualizado: %s %s por %s", postulante_data['nombre'], postulante_data['apellido'], usuario_editor)
         return True
         
     except Exception as e:
-        logger.error(f"Error al actualizar postulante: {e}")
+        logger.error("Error al actualizar postulante: %s", e)
         return False
     finally:
         if conn:
@@ -765,18 +1328,18 @@ def eliminar_postulante(postulante_id):
         postulante = cursor.fetchone()
         
         if not postulante:
-            logger.error(f"Postulante con ID {postulante_id} no encontrado")
+            logger.error("Postulante con ID %s no encontrado", postulante_id)
             return False
         
         # Eliminar el postulante
         cursor.execute("DELETE FROM postulantes WHERE id = %s", (postulante_id,))
         
         conn.commit()
-        logger.info(f"Postulante eliminado: {postulante[0]} {postulante[1]}")
+        logger.info("Postulante eliminado: %s %s", postulante[0], postulante[1])
         return True
         
     except Exception as e:
-        logger.error(f"Error al eliminar postulante: {e}")
+        logger.error("Error al eliminar postulante: %s", e)
         return False
     finally:
         if conn:
@@ -815,7 +1378,7 @@ def obtener_postulante_por_id(postulante_id):
         return postulante
         
     except Exception as e:
-        logger.error(f"Error al obtener postulante: {e}")
+        logger.error("Error al obtener postulante: %s", e)
         return None
     finally:
         if conn:
@@ -838,17 +1401,6 @@ def obtener_historial_ediciones(postulante_id):
             
         cursor = conn.cursor()
         
-        # Verificar si la tabla existe
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'historial_ediciones_postulantes'
-            )
-        """)
-        
-        if not cursor.fetchone()[0]:
-            return []  # Tabla no existe, no hay historial
-        
         query = sql.SQL("""
             SELECT usuario_editor, fecha_edicion, cambios
             FROM historial_ediciones_postulantes 
@@ -862,7 +1414,7 @@ def obtener_historial_ediciones(postulante_id):
         return historial
         
     except Exception as e:
-        logger.error(f"Error al obtener historial de ediciones: {e}")
+        logger.error("Error al obtener historial de ediciones: %s", e)
         return []
     finally:
         if conn:
@@ -935,11 +1487,11 @@ def actualizar_usuario(user_id, usuario_data):
         cursor.execute(query, values)
         conn.commit()
         
-        logger.info(f"Usuario actualizado: {usuario_data['nombre']} {usuario_data['apellido']}")
+        logger.info("Usuario actualizado: %s %s", usuario_data['nombre'], usuario_data['apellido'])
         return True
         
     except Exception as e:
-        logger.error(f"Error al actualizar usuario: {e}")
+        logger.error("Error al actualizar usuario: %s", e)
         return False
     finally:
         if conn:
@@ -967,7 +1519,7 @@ def eliminar_usuario(user_id):
         usuario = cursor.fetchone()
         
         if not usuario:
-            logger.error(f"Usuario con ID {user_id} no encontrado")
+            logger.error("Usuario con ID %s no encontrado", user_id)
             return False
         
         # Verificar que no sea el último SUPERADMIN
@@ -985,11 +1537,11 @@ def eliminar_usuario(user_id):
         cursor.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
         
         conn.commit()
-        logger.info(f"Usuario eliminado: {usuario[0]} {usuario[1]} ({usuario[2]})")
+        logger.info("Usuario eliminado: %s %s (%s)", usuario[0], usuario[1], usuario[2])
         return True
         
     except Exception as e:
-        logger.error(f"Error al eliminar usuario: {e}")
+        logger.error("Error al eliminar usuario: %s", e)
         return False
     finally:
         if conn:
@@ -1025,7 +1577,7 @@ def obtener_usuario_por_id(user_id):
         return usuario
         
     except Exception as e:
-        logger.error(f"Error al obtener usuario: {e}")
+        logger.error("Error al obtener usuario: %s", e)
         return None
     finally:
         if conn:
@@ -1057,12 +1609,36 @@ def obtener_nombre_registrador(user_id):
             return "Desconocido"
             
     except Exception as e:
-        logger.error(f"Error al obtener nombre del registrador: {e}")
+        logger.error("Error al obtener nombre del registrador: %s", e)
         return "Desconocido"
 
+def _cachear_nombres_aparatos(pares):
+    """
+    Guardar pares (aparato_id, nombre) en la caché de aparatos
+    """
+    with _cache_aparatos_lock:
+        for aparato_id, nombre in pares:
+            if aparato_id and nombre:
+                _cache_aparatos[aparato_id] = nombre
+
+def invalidar_cache_aparatos(aparato_id=None):
+    """
+    Invalidar la caché de nombres de aparatos biométricos
+    
+    Debe llamarse después de crear, renombrar o eliminar aparatos.
+    
+    Args:
+        aparato_id (int, optional): Invalidar solo este aparato; None invalida todos
+    """
+    with _cache_aparatos_lock:
+        if aparato_id is None:
+            _cache_aparatos.clear()
+        else:
+            _cache_aparatos.pop(aparato_id, None)
+
 def obtener_nombre_aparato(aparato_id):
     """
-    Obtener el nombre del aparato biométrico
+    Obtener el nombre del aparato biométrico (con caché en memoria)
     
     Args:
         aparato_id (int): ID del aparato biométrico
@@ -1070,9 +1646,15 @@ def obtener_nombre_aparato(aparato_id):
     Returns:
         str: Nombre del aparato o "Desconocido" si no se encuentra
     """
+    conn = None
     try:
         if not aparato_id:
             return "Desconocido"
+        
+        with _cache_aparatos_lock:
+            nombre = _cache_aparatos.get(aparato_id)
+        if nombre:
+            return nombre
             
         conn = connect_db()
         if not conn:
@@ -1089,221 +1671,647 @@ def obtener_nombre_aparato(aparato_id):
         resultado = cursor.fetchone()
         
         if resultado:
+            _cachear_nombres_aparatos([(aparato_id, resultado[0])])
             return resultado[0]
         else:
             return "Desconocido"
             
     except Exception as e:
-        logger.error(f"Error al obtener nombre del aparato: {e}")
+        logger.error("Error al obtener nombre del aparato: %s", e)
         return "Desconocido"
     finally:
         if conn:
             conn.close()
 
-def update_postulantes_table_structure(cursor, conn):
+# ============================================================================
+# MIGRACIONES DE ESQUEMA
+# ============================================================================
+
+# Clave del advisory lock que serializa las migraciones entre terminales
+MIGRACIONES_LOCK = 7301
+
+def _migracion_tablas_base(cursor):
+    """Tablas principales del sistema"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id SERIAL PRIMARY KEY,
+            usuario VARCHAR(50) UNIQUE NOT NULL,
+            contrasena VARCHAR(255) NOT NULL,
+            rol VARCHAR(20) NOT NULL DEFAULT 'USUARIO',
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            grado VARCHAR(50),
+            cedula VARCHAR(20),
+            numero_credencial VARCHAR(50),
+            telefono VARCHAR(20),
+            primer_inicio BOOLEAN DEFAULT TRUE,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # aparatos_biometricos antes que postulantes (referenciada por aparato_id)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS aparatos_biometricos (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            serial VARCHAR(100) UNIQUE NOT NULL,
+            ip_address VARCHAR(15),
+            puerto INTEGER DEFAULT 4370,
+            ubicacion VARCHAR(200),
+            estado VARCHAR(20) DEFAULT 'ACTIVO',
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS postulantes (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            cedula VARCHAR(20) UNIQUE NOT NULL,
+            fecha_nacimiento DATE,
+            telefono VARCHAR(20),
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario_registrador INTEGER,
+            edad INTEGER,
+            unidad VARCHAR(50),
+            dedo_registrado VARCHAR(20),
+            registrado_por VARCHAR(100),
+            aparato_id INTEGER REFERENCES aparatos_biometricos(id),
+            uid_k40 INTEGER,
+            huella_dactilar BYTEA,
+            observaciones TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS privilegios (
+            id SERIAL PRIMARY KEY,
+            rol VARCHAR(20) NOT NULL,
+            permiso VARCHAR(50) NOT NULL,
+            descripcion TEXT,
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(rol, permiso)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cedulas_problema_judicial (
+            id SERIAL PRIMARY KEY,
+            cedula VARCHAR(20) UNIQUE NOT NULL
+        )
+    """)
+
+def _migracion_seguimiento_postulantes(cursor):
+    """Campos de seguimiento de ediciones y sexo de postulantes"""
+    cursor.execute("ALTER TABLE postulantes ADD COLUMN IF NOT EXISTS usuario_ultima_edicion VARCHAR(100)")
+    cursor.execute("""
+        ALTER TABLE postulantes
+        ADD COLUMN IF NOT EXISTS fecha_ultima_edicion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """)
+    cursor.execute("ALTER TABLE postulantes ADD COLUMN IF NOT EXISTS sexo VARCHAR(10)")
+
+def _migracion_historial_ediciones(cursor):
+    """Historial de ediciones de postulantes (antes se creaba en cada edición)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS historial_ediciones_postulantes (
+            id SERIAL PRIMARY KEY,
+            postulante_id INTEGER NOT NULL,
+            usuario_editor VARCHAR(100) NOT NULL,
+            fecha_edicion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cambios TEXT NOT NULL,
+            FOREIGN KEY (postulante_id) REFERENCES postulantes(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_historial_ediciones_postulante
+        ON historial_ediciones_postulantes (postulante_id, fecha_edicion DESC)
+    """)
+
+def _migracion_indices_postulantes(cursor):
+    """Índices para listados filtrados, paginación por clave y marca de agua de estadísticas"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_postulantes_fecha_registro_id
+        ON postulantes (fecha_registro DESC, id DESC)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_postulantes_unidad ON postulantes (unidad)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_postulantes_dedo ON postulantes (dedo_registrado)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_postulantes_aparato ON postulantes (aparato_id)")
+
+    # Marca de agua del cache de estadísticas (MAX(fecha_ultima_edicion))
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_postulantes_fecha_ultima_edicion
+        ON postulantes (fecha_ultima_edicion)
+    """)
+
+def init_busqueda_indexada(cursor):
+    """
+    Crear las extensiones pg_trgm y unaccent, la función inmutable
+    quira_normalizar y los índices GIN trigram usados por buscar_postulante
+    """
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() no es IMMUTABLE; se envuelve fijando el diccionario para poder indexarla
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_normalizar(texto TEXT) RETURNS TEXT AS $$
+            SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto))
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_postulantes_nombre_trgm
+        ON postulantes USING gin (quira_normalizar(nombre) gin_trgm_ops)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_postulantes_apellido_trgm
+        ON postulantes USING gin (quira_normalizar(apellido) gin_trgm_ops)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_postulantes_cedula_trgm
+        ON postulantes USING gin (quira_normalizar(cedula) gin_trgm_ops)
+    """)
+
+def init_estadisticas_resumen(cursor):
+    """
+    Crear (de forma idempotente) la tabla estadisticas_resumen y los triggers
+    que la mantienen al día con cada INSERT/UPDATE/DELETE de postulantes
+    
+    Cada fila guarda, para una dimensión (sexo, dia_semana, anio, hora,
+    edad_sexo, unidad, dedo, usuario, total) y un valor, la cantidad de
+    postulantes y la suma/cantidad de edades para calcular promedios.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estadisticas_resumen (
+            dimension VARCHAR(20) NOT NULL,
+            clave TEXT NOT NULL,
+            cantidad BIGINT NOT NULL DEFAULT 0,
+            suma_edad BIGINT NOT NULL DEFAULT 0,
+            cantidad_edad BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, clave)
+        )
+    """)
+
+    # Sumar (o restar) una fila en una dimensión
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_estadisticas_sumar(
+            p_dimension TEXT, p_clave TEXT, p_signo INTEGER, p_edad INTEGER
+        ) RETURNS void AS $$
+        BEGIN
+            IF p_clave IS NULL THEN
+                RETURN;
+            END IF;
+            INSERT INTO estadisticas_resumen AS r (dimension, clave, cantidad, suma_edad, cantidad_edad)
+            VALUES (p_dimension, p_clave, p_signo, p_signo * COALESCE(p_edad, 0),
+                    CASE WHEN p_edad IS NULL THEN 0 ELSE p_signo END)
+            ON CONFLICT (dimension, clave) DO UPDATE SET
+                cantidad = r.cantidad + EXCLUDED.cantidad,
+                suma_edad = r.suma_edad + EXCLUDED.suma_edad,
+                cantidad_edad = r.cantidad_edad + EXCLUDED.cantidad_edad;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Aplicar un postulante completo a todas las dimensiones
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_estadisticas_fila(p postulantes, p_signo INTEGER)
+        RETURNS void AS $$
+        BEGIN
+            PERFORM quira_estadisticas_sumar('total', '', p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('sexo', COALESCE(p.sexo, 'No especificado'), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('dia_semana', EXTRACT(DOW FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('anio', EXTRACT(YEAR FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('hora', EXTRACT(HOUR FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('edad_sexo',
+                CASE
+                    WHEN p.edad < 25 THEN '18-24 años'
+                    WHEN p.edad < 35 THEN '25-34 años'
+                    WHEN p.edad < 45 THEN '35-44 años'
+                    WHEN p.edad < 55 THEN '45-54 años'
+                    ELSE '55+ años'
+                END || '|' || COALESCE(p.sexo, 'No especificado'), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('unidad', NULLIF(p.unidad, ''), p_signo, p.edad);
+            PERFORM quira_estadisticas_sumar('dedo', NULLIF(p.dedo_registrado, ''), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('usuario', NULLIF(p.registrado_por, ''), p_signo, NULL);
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_estadisticas_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM quira_estadisticas_fila(OLD, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM quira_estadisticas_fila(NEW, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Reconstrucción completa (respaldo tras TRUNCATE, cargas masivas o primera instalación)
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_estadisticas_reconstruir() RETURNS void AS $$
+        DECLARE
+            fila postulantes;
+        BEGIN
+            LOCK TABLE postulantes IN SHARE MODE;
+            DELETE FROM estadisticas_resumen;
+            FOR fila IN SELECT * FROM postulantes LOOP
+                PERFORM quira_estadisticas_fila(fila, 1);
+            END LOOP;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_estadisticas_insert_delete ON postulantes")
+    cursor.execute("""
+        CREATE TRIGGER trg_estadisticas_insert_delete
+        AFTER INSERT OR DELETE ON postulantes
+        FOR EACH ROW EXECUTE FUNCTION quira_estadisticas_trigger()
+    """)
+
+    # En UPDATE solo interesa si cambió alguna columna resumida
+    cursor.execute("DROP TRIGGER IF EXISTS trg_estadisticas_update ON postulantes")
+    cursor.execute("""
+        CREATE TRIGGER trg_estadisticas_update
+        AFTER UPDATE OF sexo, fecha_registro, edad, unidad, dedo_registrado, registrado_por
+        ON postulantes
+        FOR EACH ROW
+        WHEN ((OLD.sexo, OLD.fecha_registro, OLD.edad, OLD.unidad, OLD.dedo_registrado, OLD.registrado_por)
+              IS DISTINCT FROM
+              (NEW.sexo, NEW.fecha_registro, NEW.edad, NEW.unidad, NEW.dedo_registrado, NEW.registrado_por))
+        EXECUTE FUNCTION quira_estadisticas_trigger()
+    """)
+
+    # Poblar por primera vez si el resumen está vacío
+    cursor.execute("SELECT 1 FROM estadisticas_resumen WHERE dimension = 'total'")
+    if cursor.fetchone() is None:
+        cursor.execute("SELECT quira_estadisticas_reconstruir()")
+        logger.info("[OK] Resumen de estadísticas reconstruido")
+
+    logger.info("[OK] Resumen de estadísticas disponible")
+
+def _migracion_resumen_dia_edad(cursor):
+    """
+    Agregar al resumen de estadísticas las dimensiones dia, edad y nacimiento
+    y dejar de mantener la fila 'total' (migración 6)
+    
+    El total pasa a ser la suma de la dimensión sexo: es una fila menos que
+    actualizar en cada alta, aunque las altas siguen coincidiendo en las
+    pocas filas de sexo y en la del día actual.
+    
+    La edad efectiva de quien no tiene la columna edad depende del día en
+    que se consulta, así que se guarda su fecha de nacimiento (dimensión
+    nacimiento) y la edad se calcula al leer.
+    """
+    cursor.execute("SELECT to_regclass('estadisticas_resumen')")
+    if cursor.fetchone()[0] is None:
+        # Queda 'omitida' y se reintenta junto con la migración 6
+        raise RuntimeError("estadisticas_resumen no existe (migración 6 omitida)")
+    
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_estadisticas_fila(p postulantes, p_signo INTEGER)
+        RETURNS void AS $$
+        BEGIN
+            PERFORM quira_estadisticas_sumar('sexo', COALESCE(p.sexo, 'No especificado'), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('dia', to_char(p.fecha_registro, 'YYYY-MM-DD'), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('edad', NULLIF(p.edad, 0)::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('nacimiento',
+                CASE WHEN NULLIF(p.edad, 0) IS NULL THEN to_char(p.fecha_nacimiento, 'YYYY-MM-DD') END,
+                p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('dia_semana', EXTRACT(DOW FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('anio', EXTRACT(YEAR FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('hora', EXTRACT(HOUR FROM p.fecha_registro)::int::text, p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('edad_sexo',
+                CASE
+                    WHEN p.edad < 25 THEN '18-24 años'
+                    WHEN p.edad < 35 THEN '25-34 años'
+                    WHEN p.edad < 45 THEN '35-44 años'
+                    WHEN p.edad < 55 THEN '45-54 años'
+                    ELSE '55+ años'
+                END || '|' || COALESCE(p.sexo, 'No especificado'), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('unidad', NULLIF(p.unidad, ''), p_signo, p.edad);
+            PERFORM quira_estadisticas_sumar('dedo', NULLIF(p.dedo_registrado, ''), p_signo, NULL);
+            PERFORM quira_estadisticas_sumar('usuario', NULLIF(p.registrado_por, ''), p_signo, NULL);
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    
+    # La fecha de nacimiento ahora también es una columna resumida
+    cursor.execute("DROP TRIGGER IF EXISTS trg_estadisticas_update ON postulantes")
+    cursor.execute("""
+        CREATE TRIGGER trg_estadisticas_update
+        AFTER UPDATE OF sexo, fecha_registro, edad, fecha_nacimiento, unidad, dedo_registrado, registrado_por
+        ON postulantes
+        FOR EACH ROW
+        WHEN ((OLD.sexo, OLD.fecha_registro, OLD.edad, OLD.fecha_nacimiento, OLD.unidad,
+               OLD.dedo_registrado, OLD.registrado_por)
+              IS DISTINCT FROM
+              (NEW.sexo, NEW.fecha_registro, NEW.edad, NEW.fecha_nacimiento, NEW.unidad,
+               NEW.dedo_registrado, NEW.registrado_por))
+        EXECUTE FUNCTION quira_estadisticas_trigger()
+    """)
+    
+    cursor.execute("SELECT quira_estadisticas_reconstruir()")
+    logger.info("[OK] Resumen de estadísticas reconstruido con dimensiones por día y edad")
+
+def init_asistencia_local(cursor):
+    """
+    Crear el almacén local de registros de asistencia de los ZKTeco y la
+    marca de agua de sincronización por dispositivo (ver sincronizacion_asistencia)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registros_asistencia (
+            id BIGSERIAL PRIMARY KEY,
+            dispositivo VARCHAR(100) NOT NULL,
+            aparato_id INTEGER REFERENCES aparatos_biometricos(id) ON DELETE SET NULL,
+            user_id VARCHAR(50) NOT NULL,
+            uid INTEGER,
+            fecha_hora TIMESTAMP NOT NULL,
+            punch SMALLINT,
+            status SMALLINT,
+            UNIQUE (dispositivo, user_id, fecha_hora, punch)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_registros_asistencia_fecha
+        ON registros_asistencia (dispositivo, fecha_hora)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_registros_asistencia_usuario
+        ON registros_asistencia (user_id, fecha_hora)
+    """)
+
+    # Marca de agua: último registro copiado y tamaño del buffer del dispositivo
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sincronizacion_asistencia (
+            dispositivo VARCHAR(100) PRIMARY KEY,
+            aparato_id INTEGER REFERENCES aparatos_biometricos(id) ON DELETE SET NULL,
+            ultima_marca TIMESTAMP,
+            registros_dispositivo INTEGER NOT NULL DEFAULT 0,
+            ultima_sincronizacion TIMESTAMP
+        )
+    """)
+
+def _migracion_admin_por_defecto(cursor):
+    """Usuario administrador por defecto (solo si no existe)"""
+    cursor.execute("SELECT 1 FROM usuarios WHERE usuario = 'admin'")
+    if cursor.fetchone():
+        logger.info("Usuario admin ya existe")
+        return
+
+    hashed_password = bcrypt.hashpw("admin123".encode(), bcrypt.gensalt()).decode()
+    cursor.execute("""
+        INSERT INTO usuarios (usuario, contrasena, rol, nombre, apellido,
+                            grado, cedula, numero_credencial, telefono,
+                            primer_inicio)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        "admin", hashed_password, "SUPERADMIN", "Admin", "General",
+        "Comisario", "00000000", "CRED-ADMIN", "0000000000", True
+    ))
+    logger.info("[OK] Usuario admin creado con éxito")
+
+# Privilegios disponibles; todos los roles reciben la lista completa
+PRIVILEGIOS_POR_DEFECTO = [
+    ('buscar_postulantes', 'Puede buscar y ver postulantes'),
+    ('agregar_postulante', 'Puede agregar nuevos postulantes'),
+    ('lista_postulantes', 'Puede ver la lista de postulantes'),
+    ('estadisticas_basicas', 'Puede ver estadísticas básicas'),
+    ('estadisticas_completas', 'Puede ver todas las estadísticas'),
+    ('gestion_zkteco_basica', 'Puede usar dispositivos ZKTeco'),
+    ('gestion_zkteco_completa', 'Puede gestionar dispositivos ZKTeco'),
+    ('editar_postulantes_propios', 'Puede editar sus propios postulantes'),
+    ('editar_postulantes_otros', 'Puede editar postulantes de otros usuarios'),
+    ('eliminar_postulantes_propios', 'Puede eliminar sus propios postulantes'),
+    ('eliminar_postulantes_otros', 'Puede eliminar postulantes de otros usuarios'),
+    ('eliminar_postulantes', 'Puede eliminar postulantes (permiso general)'),
+    ('gestion_usuarios', 'Puede gestionar usuarios del sistema'),
+    ('gestion_privilegios', 'Puede gestionar privilegios del sistema'),
+]
+ROLES = ['USUARIO', 'ADMIN', 'SUPERADMIN']
+
+def init_default_privileges(cursor):
+    """
+    Insertar los privilegios por defecto de cada rol en una sola sentencia
+    (los ya existentes, posiblemente desactivados, no se modifican)
+    """
+    execute_values(cursor, """
+        INSERT INTO privilegios (rol, permiso, descripcion, activo)
+        VALUES %s
+        ON CONFLICT (rol, permiso) DO NOTHING
+    """, [(rol, permiso, descripcion, True)
+          for rol in ROLES for permiso, descripcion in PRIVILEGIOS_POR_DEFECTO])
+    logger.info("[OK] Privilegios por defecto inicializados correctamente")
+
+def _migracion_notificar_problema_judicial(cursor):
     """
-    Actualizar la estructura de la tabla postulantes para agregar campos de seguimiento
+    Trigger por sentencia que notifica los cambios de cedulas_problema_judicial
+    a las listas en memoria de cada terminal (ver cache_problema_judicial)
+    """
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION quira_notificar_problema_judicial() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('problema_judicial_cambiado', TG_OP);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_problema_judicial_notificar ON cedulas_problema_judicial")
+    cursor.execute("""
+        CREATE TRIGGER trg_problema_judicial_notificar
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cedulas_problema_judicial
+        FOR EACH STATEMENT EXECUTE FUNCTION quira_notificar_problema_judicial()
+    """)
+
+def _migracion_cruces_problema_judicial(cursor):
+    """Marcas de agua de cada ejecución del cruce (ver cruce_problema_judicial)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cruces_problema_judicial (
+            id SERIAL PRIMARY KEY,
+            fecha_inicio TIMESTAMP NOT NULL,
+            fecha_fin TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            incremental BOOLEAN NOT NULL,
+            ultimo_postulante_id INTEGER NOT NULL,
+            ultima_cedula_id INTEGER NOT NULL,
+            coincidencias INTEGER NOT NULL,
+            usuario VARCHAR(100)
+        )
+    """)
+
+# Pasos del esquema en orden: (versión, descripción, función, opcional).
+# Un paso opcional que falla (p. ej. sin permiso para CREATE EXTENSION) no
+# detiene el arranque y se reintenta en la próxima ejecución. Los pasos son
+# idempotentes, así que una base creada antes de existir schema_version
+# simplemente los registra. Para cambiar el esquema se agrega un paso nuevo
+# al final; nunca se modifica uno ya publicado.
+MIGRACIONES = [
+    (1, "tablas base", _migracion_tablas_base, False),
+    (2, "seguimiento de ediciones y sexo de postulantes", _migracion_seguimiento_postulantes, False),
+    (3, "historial de ediciones de postulantes", _migracion_historial_ediciones, False),
+    (4, "índices de postulantes", _migracion_indices_postulantes, False),
+    (5, "búsqueda indexada (trigram)", init_busqueda_indexada, True),
+    (6, "resumen de estadísticas", init_estadisticas_resumen, True),
+    (7, "almacén local de asistencia", init_asistencia_local, True),
+    (8, "usuario admin por defecto", _migracion_admin_por_defecto, False),
+    (9, "privilegios por defecto", init_default_privileges, False),
+    (10, "notificación de cambios en cédulas con problema judicial", _migracion_notificar_problema_judicial, False),
+    (11, "ejecuciones del cruce de postulantes con problemas judiciales", _migracion_cruces_problema_judicial, False),
+    (12, "resumen de estadísticas por día y edad", _migracion_resumen_dia_edad, True),
+]
+
+ESQUEMA_VERSION = MIGRACIONES[-1][0]
+
+def obtener_versiones_aplicadas(cursor, incluir_omitidas=True):
+    """
+    Versiones de esquema registradas en la base de datos
+    
+    Args:
+        cursor: Cursor de base de datos
+        incluir_omitidas (bool): Contar también los pasos opcionales que
+            fallaron y quedaron registrados como 'omitida'
+    
+    Returns:
+        set: Versiones registradas (vacío si la tabla schema_version no existe)
+    """
+    cursor.execute("SELECT to_regclass('public.schema_version')")
+    if cursor.fetchone()[0] is None:
+        return set()
+    if incluir_omitidas:
+        cursor.execute("SELECT version FROM schema_version")
+    else:
+        cursor.execute("SELECT version FROM schema_version WHERE estado = 'aplicada'")
+    return {fila[0] for fila in cursor.fetchall()}
+
+def migraciones_pendientes(aplicadas):
+    """Pasos de MIGRACIONES que aún no figuran en schema_version"""
+    return [m for m in MIGRACIONES if m[0] not in aplicadas]
+
+def init_database(reintentar_opcionales=False):
     """
+    Aplicar las migraciones de esquema pendientes
+    
+    Cada paso corre en su propia transacción junto con su registro en
+    schema_version; si el esquema está al día no se ejecuta ningún DDL.
+    Un paso opcional que falla (p. ej. sin permiso para CREATE EXTENSION)
+    queda registrado como 'omitida' y no se reintenta en cada arranque.
+    
+    Args:
+        reintentar_opcionales (bool): Volver a intentar los pasos opcionales omitidos
+    
+    Returns:
+        bool: True si quedaron aplicados todos los pasos obligatorios
+    """
+    global _busqueda_indexada
+    
+    conn = None
     try:
-        # Verificar si existen los campos de seguimiento
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'postulantes' 
-            AND column_name IN ('usuario_ultima_edicion', 'fecha_ultima_edicion', 'sexo')
-        """)
-        existing_columns = [row[0] for row in cursor.fetchall()]
+        conn = connect_db()
+        if not conn:
+            return False
+            
+        cursor = conn.cursor()
         
-        # Agregar campos si no existen
-        if 'usuario_ultima_edicion' not in existing_columns:
-            cursor.execute("""
-                ALTER TABLE postulantes 
-                ADD COLUMN usuario_ultima_edicion VARCHAR(100)
-            """)
-            logger.info("[OK] Campo usuario_ultima_edicion agregado")
+        # Varias terminales pueden arrancar a la vez: solo una migra
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRACIONES_LOCK,))
+        try:
+            pendientes = migraciones_pendientes(obtener_versiones_aplicadas(cursor))
+            if not pendientes and not reintentar_opcionales:
+                return True
             
-        if 'fecha_ultima_edicion' not in existing_columns:
             cursor.execute("""
-                ALTER TABLE postulantes 
-                ADD COLUMN fecha_ultima_edicion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    fecha_aplicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
             """)
-            logger.info("[OK] Campo fecha_ultima_edicion agregado")
-            
-        if 'sexo' not in existing_columns:
+            # 'aplicada' u 'omitida' (paso opcional que falló)
             cursor.execute("""
-                ALTER TABLE postulantes 
-                ADD COLUMN sexo VARCHAR(10)
+                ALTER TABLE schema_version
+                ADD COLUMN IF NOT EXISTS estado VARCHAR(10) NOT NULL DEFAULT 'aplicada'
             """)
-            logger.info("[OK] Campo sexo agregado")
+            conn.commit()
             
-        conn.commit()
+            if reintentar_opcionales:
+                pendientes = migraciones_pendientes(
+                    obtener_versiones_aplicadas(cursor, incluir_omitidas=False))
+            
+            for version, descripcion, paso, opcional in pendientes:
+                try:
+                    paso(cursor)
+                    cursor.execute("""
+                        INSERT INTO schema_version (version, estado) VALUES (%s, 'aplicada')
+                        ON CONFLICT (version) DO UPDATE SET
+                            estado = 'aplicada', fecha_aplicacion = CURRENT_TIMESTAMP
+                    """, (version,))
+                    conn.commit()
+                    if paso is init_busqueda_indexada:
+                        # Recién ahora los índices son visibles para otras conexiones
+                        _busqueda_indexada = True
+                    logger.info("[OK] Migración %s aplicada: %s", version, descripcion)
+                except Exception as e:
+                    conn.rollback()
+                    if not opcional:
+                        logger.error("Error en migración %s (%s): %s", version, descripcion, e)
+                        return False
+                    logger.warning("[WARN] Migración opcional %s (%s) omitida: %s", version, descripcion, e)
+                    cursor.execute("""
+                        INSERT INTO schema_version (version, estado) VALUES (%s, 'omitida')
+                        ON CONFLICT (version) DO NOTHING
+                    """, (version,))
+                    conn.commit()
+            
+            logger.info("[OK] Base de datos inicializada correctamente")
+            return True
+            
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRACIONES_LOCK,))
+            conn.commit()
         
     except Exception as e:
-        logger.error(f"Error al actualizar estructura de tabla postulantes: {e}")
-        conn.rollback()
+        logger.error("Error al inicializar base de datos: %s", e)
+        return False
+    finally:
+        if conn:
+            conn.close()
 
-def init_database():
+def esquema_al_dia():
     """
-    Inicializar la base de datos con tablas necesarias
+    Verificar (con una sola consulta liviana) si no hay migraciones pendientes
+    
+    Los pasos opcionales registrados como 'omitida' no cuentan como
+    pendientes; se reintentan con init_database(reintentar_opcionales=True).
+    
+    Returns:
+        bool: True si no hace falta ejecutar init_database, None si no hay conexión
     """
+    conn = connect_db()
+    if not conn:
+        return None
     try:
-        conn = connect_db()
-        if not conn:
-            return False
-            
         cursor = conn.cursor()
-        
-        # Crear tabla de usuarios si no existe
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id SERIAL PRIMARY KEY,
-                usuario VARCHAR(50) UNIQUE NOT NULL,
-                contrasena VARCHAR(255) NOT NULL,
-                rol VARCHAR(20) NOT NULL DEFAULT 'USUARIO',
-                nombre VARCHAR(100) NOT NULL,
-                apellido VARCHAR(100) NOT NULL,
-                grado VARCHAR(50),
-                cedula VARCHAR(20),
-                numero_credencial VARCHAR(50),
-                telefono VARCHAR(20),
-                primer_inicio BOOLEAN DEFAULT TRUE,
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Crear tabla de postulantes si no existe
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS postulantes (
-                id SERIAL PRIMARY KEY,
-                nombre VARCHAR(100) NOT NULL,
-                apellido VARCHAR(100) NOT NULL,
-                cedula VARCHAR(20) UNIQUE NOT NULL,
-                fecha_nacimiento DATE,
-                telefono VARCHAR(20),
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario_registrador INTEGER,
-                edad INTEGER,
-                unidad VARCHAR(50),
-                dedo_registrado VARCHAR(20),
-                registrado_por VARCHAR(100),
-                aparato_id INTEGER REFERENCES aparatos_biometricos(id),
-                uid_k40 INTEGER,
-                huella_dactilar BYTEA,
-                observaciones TEXT
-            )
-        """)
-        
-        # Crear tabla de aparatos biométricos si no existe
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS aparatos_biometricos (
-                id SERIAL PRIMARY KEY,
-                nombre VARCHAR(100) NOT NULL,
-                serial VARCHAR(100) UNIQUE NOT NULL,
-                ip_address VARCHAR(15),
-                puerto INTEGER DEFAULT 4370,
-                ubicacion VARCHAR(200),
-                estado VARCHAR(20) DEFAULT 'ACTIVO',
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Crear tabla de privilegios si no existe
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS privilegios (
-                id SERIAL PRIMARY KEY,
-                rol VARCHAR(20) NOT NULL,
-                permiso VARCHAR(50) NOT NULL,
-                descripcion TEXT,
-                activo BOOLEAN DEFAULT TRUE,
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(rol, permiso)
-            )
-        """)
-        
-        # Crear tabla de problemas judiciales si no existe
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cedulas_problema_judicial (
-                id SERIAL PRIMARY KEY,
-                cedula VARCHAR(20) UNIQUE NOT NULL
-            )
-        """)
-
-        
-        conn.commit()
-        logger.info("[OK] Base de datos inicializada correctamente")
-        
-        # Actualizar estructura de tabla postulantes si es necesario
-        update_postulantes_table_structure(cursor, conn)
-        
-        # Crear usuario admin por defecto
-        create_default_admin()
-        
-        # Inicializar privilegios por defecto
-        init_default_privileges(cursor, conn)
-        
-        return True
-        
+        return not migraciones_pendientes(obtener_versiones_aplicadas(cursor))
     except Exception as e:
-        logger.error(f"Error al inicializar base de datos: {e}")
+        logger.error("Error al verificar versión de esquema: %s", e)
         return False
     finally:
-        if conn:
-            conn.close()
+        conn.close()
 
 # ============================================================================
 # FUNCIONES PARA PRIVILEGIOS
 # ============================================================================
 
-def init_default_privileges(cursor, conn):
-    """
-    Inicializar privilegios por defecto para cada rol
-    """
-    try:
-        # Definir TODOS los privilegios disponibles para TODOS los roles
-        todos_los_privilegios = [
-            ('buscar_postulantes', 'Puede buscar y ver postulantes'),
-            ('agregar_postulante', 'Puede agregar nuevos postulantes'),
-            ('lista_postulantes', 'Puede ver la lista de postulantes'),
-            ('estadisticas_basicas', 'Puede ver estadísticas básicas'),
-            ('estadisticas_completas', 'Puede ver todas las estadísticas'),
-            ('gestion_zkteco_basica', 'Puede usar dispositivos ZKTeco'),
-            ('gestion_zkteco_completa', 'Puede gestionar dispositivos ZKTeco'),
-            ('editar_postulantes_propios', 'Puede editar sus propios postulantes'),
-            ('editar_postulantes_otros', 'Puede editar postulantes de otros usuarios'),
-            ('eliminar_postulantes_propios', 'Puede eliminar sus propios postulantes'),
-            ('eliminar_postulantes_otros', 'Puede eliminar postulantes de otros usuarios'),
-            ('eliminar_postulantes', 'Puede eliminar postulantes (permiso general)'),
-            ('gestion_usuarios', 'Puede gestionar usuarios del sistema'),
-            ('gestion_privilegios', 'Puede gestionar privilegios del sistema'),
-        ]
-        
-        # Crear privilegios para todos los roles con la misma lista completa
-        default_privileges = []
-        roles = ['USUARIO', 'ADMIN', 'SUPERADMIN']
-        
-        for rol in roles:
-            for permiso, descripcion in todos_los_privilegios:
-                default_privileges.append((rol, permiso, descripcion))
-        
-        # Insertar privilegios por defecto
-        for rol, permiso, descripcion in default_privileges:
-            cursor.execute("""
-                INSERT INTO privilegios (rol, permiso, descripcion, activo)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (rol, permiso) DO NOTHING
-            """, (rol, permiso, descripcion, True))
-        
-        conn.commit()
-        logger.info("[OK] Privilegios por defecto inicializados correctamente")
-        
-    except Exception as e:
-        logger.error(f"Error al inicializar privilegios: {e}")
-        conn.rollback()
-
 def verificar_privilegio(rol, permiso):
     """
     Verificar si un rol tiene un privilegio específico
     
+    Consulta la matriz de privilegios en memoria (cache_privilegios), que se
+    carga una vez por sesión y se refresca por LISTEN/NOTIFY o vencimiento.
+    
     Args:
         rol (str): Rol del usuario
         permiso (str): Permiso a verificar
@@ -1311,32 +2319,15 @@ def verificar_privilegio(rol, permiso):
     Returns:
         bool: True si tiene el privilegio, False en caso contrario
     """
+    from cache_privilegios import matriz_privilegios
+    
     try:
-        conn = connect_db()
-        if not conn:
-            return False
-            
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT activo FROM privilegios 
-            WHERE rol = %s AND permiso = %s
-        """, (rol, permiso))
-        
-        result = cursor.fetchone()
-        
-        if result:
-            return result[0]  # Retorna el valor de 'activo'
-        else:
-            # Si no existe el privilegio, SUPERADMIN tiene todos los permisos
-            return rol == 'SUPERADMIN'
+        matriz_privilegios.iniciar_escucha()
+        return matriz_privilegios.tiene_privilegio(rol, permiso)
             
     except Exception as e:
-        logger.error(f"Error al verificar privilegio: {e}")
+        logger.error("Error al verificar privilegio: %s", e)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def obtener_privilegios_rol(rol):
     """
@@ -1366,7 +2357,7 @@ def obtener_privilegios_rol(rol):
         return privilegios
         
     except Exception as e:
-        logger.error(f"Error al obtener privilegios del rol: {e}")
+        logger.error("Error al obtener privilegios del rol: %s", e)
         return []
     finally:
         if conn:
@@ -1397,12 +2388,17 @@ def actualizar_privilegio(rol, permiso, activo):
             WHERE rol = %s AND permiso = %s
         """, (activo, rol, permiso))
         
+        # Avisar a las demás sesiones (se entrega al confirmar la transacción)
+        from cache_privilegios import CANAL_PRIVILEGIOS, matriz_privilegios
+        cursor.execute("SELECT pg_notify(%s, %s)", (CANAL_PRIVILEGIOS, f"{rol}:{permiso}"))
+        
         conn.commit()
-        logger.info(f"Privilegio {permiso} para rol {rol} actualizado a {activo}")
+        matriz_privilegios.actualizar_local(rol, permiso, activo)
+        logger.info("Privilegio %s para rol %s actualizado a %s", permiso, rol, activo)
         return True
         
     except Exception as e:
-        logger.error(f"Error al actualizar privilegio: {e}")
+        logger.error("Error al actualizar privilegio: %s", e)
         return False
     finally:
         if conn:
@@ -1444,7 +2440,7 @@ def obtener_todos_privilegios():
         return privilegios_por_rol
         
     except Exception as e:
-        logger.error(f"Error al obtener todos los privilegios: {e}")
+        logger.error("Error al obtener todos los privilegios: %s", e)
         return {}
     finally:
         if conn:
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Pool de conexiones PostgreSQL para Sistema QUIRA
+
+Mantiene conexiones abiertas hacia el servidor remoto para evitar pagar el
+handshake TCP + autenticación en cada consulta.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class PoolAgotadoError(psycopg2.OperationalError):
+    """No se obtuvo una conexión libre dentro del tiempo de espera"""
+
+
+class ConexionPooled:
+    """
+    Envoltorio de una conexión psycopg2 prestada por el pool.
+
+    Se comporta como la conexión original, pero close() la devuelve al pool
+    en lugar de cerrarla. Así el código existente que hace
+    ``conn = connect_db() ... conn.close()`` reutiliza conexiones sin cambios.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise psycopg2.InterfaceError("La conexión ya fue devuelta al pool")
+        return getattr(conn, name)
+
+    @property
+    def closed(self):
+        """Reportar como cerrada una conexión ya devuelta al pool"""
+        if self._conn is None:
+            return 1
+        return self._conn.closed
+
+    @property
+    def raw(self):
+        """Conexión psycopg2 subyacente"""
+        return self._conn
+
+    def close(self):
+        """Devolver la conexión al pool (idempotente)"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is not None and not self._conn.closed:
+            try:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+            except Exception:
+                pass
+        self.close()
+        return False
+
+    def __del__(self):
+        # Red de seguridad para llamadores que olvidan cerrar la conexión
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe con verificación de salud y expiración
+    de conexiones inactivas.
+    """
+
+    def __init__(self, connect_kwargs, maxconn=5, minconn=0, max_idle=300,
+                 health_check_interval=30, acquire_timeout=15):
+        """
+        Inicializar pool
+
+        Args:
+            connect_kwargs (dict): Parámetros para psycopg2.connect
+            maxconn (int): Máximo de conexiones abiertas simultáneamente
+            minconn (int): Conexiones inactivas que se conservan aunque expiren
+            max_idle (float): Segundos tras los cuales se cierra una conexión inactiva
+            health_check_interval (float): Segundos de inactividad a partir de los
+                cuales se verifica la conexión con SELECT 1 antes de prestarla
+            acquire_timeout (float): Segundos máximos de espera por una conexión libre
+        """
+        self.connect_kwargs = dict(connect_kwargs)
+        self.maxconn = max(1, int(maxconn))
+        self.minconn = max(0, min(int(minconn), self.maxconn))
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (conexión, instante en que quedó libre)
+        self._en_uso = 0
+        self._cerrado = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de conexiones
+    # ------------------------------------------------------------------
+
+    def _crear_conexion(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        logger.debug(f"Nueva conexión al pool ({self.connect_kwargs.get('host')})")
+        return conn
+
+    @staticmethod
+    def _descartar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _conexion_sana(self, conn, inactiva_desde):
+        """Verificar que una conexión inactiva siga utilizable"""
+        if conn.closed:
+            return False
+        if time.monotonic() - inactiva_desde < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexión del pool descartada por health check: {e}")
+            return False
+
+    def _expirar_inactivas(self):
+        """Cerrar conexiones inactivas más antiguas que max_idle (con lock tomado)"""
+        if self.max_idle is None:
+            return
+        ahora = time.monotonic()
+        while len(self._idle) > self.minconn:
+            conn, desde = self._idle[0]
+            if ahora - desde < self.max_idle:
+                break
+            self._idle.popleft()
+            self._descartar(conn)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def acquire(self, timeout=None):
+        """
+        Obtener una conexión del pool
+
+        Args:
+            timeout (float, optional): Segundos de espera; por defecto acquire_timeout
+
+        Returns:
+            ConexionPooled: Conexión prestada; close() la devuelve al pool
+
+        Raises:
+            psycopg2.OperationalError: Si no se pudo conectar o el pool está agotado
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        limite = time.monotonic() + timeout
+
+        while True:
+            candidata = None
+            with self._lock:
+                if self._cerrado:
+                    raise psycopg2.InterfaceError("El pool de conexiones está cerrado")
+
+                self._expirar_inactivas()
+
+                if self._idle:
+                    # LIFO: la conexión usada más recientemente es la más probable de estar viva
+                    candidata = self._idle.pop()
+                    self._en_uso += 1
+                elif self._en_uso < self.maxconn:
+                    self._en_uso += 1
+                else:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise PoolAgotadoError(
+                            f"Pool agotado: {self.maxconn} conexiones en uso")
+                    self._lock.wait(restante)
+                    continue
+
+            # Fuera del lock: health check o conexión nueva (pueden tardar por la WAN)
+            try:
+                if candidata is not None:
+                    conn, desde = candidata
+                    if self._conexion_sana(conn, desde):
+                        return ConexionPooled(self, conn)
+                    self._descartar(conn)
+                return ConexionPooled(self, self._crear_conexion())
+            except BaseException:
+                with self._lock:
+                    self._en_uso -= 1
+                    self._lock.notify()
+                raise
+
+    def release(self, conn):
+        """
+        Devolver una conexión al pool
+
+        Args:
+            conn: Conexión psycopg2 (sin envoltorio)
+        """
+        reutilizable = not conn.closed
+        if reutilizable:
+            try:
+                # Terminar cualquier transacción abierta (consultas sin commit)
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                reutilizable = False
+
+        with self._lock:
+            self._en_uso = max(0, self._en_uso - 1)
+            if reutilizable and not self._cerrado:
+                self._idle.append((conn, time.monotonic()))
+                self._expirar_inactivas()
+            else:
+                self._descartar(conn)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager que presta una conexión, hace commit al salir sin
+        errores (rollback en caso contrario) y la devuelve al pool.
+        """
+        with self.acquire(timeout) as conn:
+            yield conn
+
+    def stats(self):
+        """
+        Estado actual del pool
+
+        Returns:
+            dict: {'en_uso': int, 'inactivas': int, 'maximo': int}
+        """
+        with self._lock:
+            return {
+                'en_uso': self._en_uso,
+                'inactivas': len(self._idle),
+                'maximo': self.maxconn,
+            }
+
+    def closeall(self):
+        """Cerrar todas las conexiones inactivas y rechazar nuevos préstamos"""
+        with self._lock:
+            self._cerrado = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._descartar(conn)
+            self._lock.notify_all()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Espejo local de los usuarios de cada dispositivo ZKTeco
+
+Descargar la tabla de usuarios de un K40 tarda segundos y el protocolo no
+permite leer solo los cambios. El espejo guarda en memoria los usuarios de
+cada dispositivo (por UID) y solo vuelve a descargarlos cuando el contador
+de usuarios del dispositivo (read_sizes, una sola consulta liviana) difiere
+del del espejo. Las altas/ediciones hechas desde este proceso con set_user
+se reflejan directamente, sin descarga.
+
+El contador no detecta una baja y un alta hechas desde otra estación (la
+cantidad queda igual), así que antes de escribir en el dispositivo con un
+UID elegido del espejo se sincroniza con forzar=True.
+
+Consultas servidas desde el espejo: últimos N usuarios, UID → nombre,
+user_id → nombre, UID máximo y cantidad.
+"""
+
+import logging
+import threading
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Cantidad mínima pedida a get_user_list para obtener la tabla completa
+MINIMO_DESCARGA = 3000
+
+
+class EspejoUsuarios:
+    """Usuarios de un dispositivo, indexados por UID"""
+
+    def __init__(self, dispositivo):
+        """
+        Inicializar espejo vacío
+
+        Args:
+            dispositivo (str): Identificador del dispositivo ("ip:puerto")
+        """
+        self.dispositivo = dispositivo
+        self._usuarios = {}
+        self._cantidad_dispositivo = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Sincronización
+    # ------------------------------------------------------------------
+
+    def sincronizar(self, zkteco_device, forzar=False):
+        """
+        Actualizar el espejo si la cantidad de usuarios del dispositivo cambió
+
+        Args:
+            zkteco_device (ZKTecoK40V2): Dispositivo con conexión activa
+            forzar (bool): Descargar la tabla aunque la cantidad coincida
+
+        Returns:
+            bool: True si el espejo está al día
+        """
+        with self._lock:
+            cantidad = zkteco_device.get_user_count()
+            if not forzar and self._cantidad_dispositivo is not None and cantidad == self._cantidad_dispositivo:
+                return True
+
+            usuarios = zkteco_device.get_user_list(count=max(cantidad, MINIMO_DESCARGA),
+                                                   include_fingerprints=False)
+            if cantidad and not usuarios:
+                logger.warning("[WARN] No se pudo descargar la tabla de usuarios de %s", self.dispositivo)
+                return False
+
+            nuevos = {}
+            for usuario in usuarios:
+                try:
+                    nuevos[int(usuario['uid'])] = usuario
+                except (TypeError, ValueError):
+                    continue
+
+            agregados = len(nuevos.keys() - self._usuarios.keys())
+            eliminados = len(self._usuarios.keys() - nuevos.keys())
+            self._usuarios = nuevos
+            self._cantidad_dispositivo = len(usuarios)
+            logger.info("Espejo de usuarios de %s: %s usuarios (+%s/-%s)",
+                        self.dispositivo, len(nuevos), agregados, eliminados)
+            return True
+
+    def actualizar_usuario(self, uid, **campos):
+        """
+        Reflejar un set_user exitoso sin volver a descargar la tabla
+
+        Args:
+            uid (int): UID del usuario
+            **campos: Campos modificados (name, privilege, user_id, group_id...)
+        """
+        with self._lock:
+            uid = int(uid)
+            if uid in self._usuarios:
+                self._usuarios[uid] = {**self._usuarios[uid], **campos}
+            elif self._cantidad_dispositivo is not None:
+                self._usuarios[uid] = {'uid': uid, 'user_id': '', 'name': '', 'privilege': 0,
+                                       'password': '', 'group_id': '', 'card': '',
+                                       'fingerprints': 0, 'status': 0, **campos}
+                self._cantidad_dispositivo += 1
+
+    def eliminar_usuario(self, uid):
+        """Reflejar la eliminación de un usuario en el dispositivo"""
+        with self._lock:
+            if self._usuarios.pop(int(uid), None) is not None and self._cantidad_dispositivo:
+                self._cantidad_dispositivo -= 1
+
+    def invalidar(self):
+        """Forzar la descarga completa en la próxima sincronización"""
+        with self._lock:
+            self._usuarios = {}
+            self._cantidad_dispositivo = None
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def cantidad(self):
+        """Cantidad de usuarios del dispositivo (None si nunca se sincronizó)"""
+        return self._cantidad_dispositivo
+
+    def usuarios(self):
+        """Todos los usuarios, ordenados por UID"""
+        with self._lock:
+            return [self._usuarios[uid] for uid in sorted(self._usuarios)]
+
+    def ultimos(self, n):
+        """Los n usuarios de UID más alto (los más recientes), en orden ascendente"""
+        with self._lock:
+            return [self._usuarios[uid] for uid in sorted(self._usuarios)[-n:]] if n > 0 else []
+
+    def usuario(self, uid):
+        """Usuario con ese UID, o None"""
+        try:
+            return self._usuarios.get(int(uid))
+        except (TypeError, ValueError):
+            return None
+
+    def nombre(self, uid):
+        """Nombre del usuario con ese UID ('' si no existe)"""
+        usuario = self.usuario(uid)
+        return usuario.get('name', '') if usuario else ''
+
+    def nombres_por_user_id(self):
+        """
+        Returns:
+            dict: {user_id (str): nombre} de los usuarios con ambos datos
+        """
+        with self._lock:
+            return {str(u['user_id']): u['name'] for u in self._usuarios.values()
+                    if u.get('user_id') and u.get('name')}
+
+    def max_uid(self):
+        """UID más alto del dispositivo, o None si no hay usuarios"""
+        with self._lock:
+            return max(self._usuarios) if self._usuarios else None
+
+
+# Espejos por dispositivo, compartidos por todas las ventanas del proceso
+_espejos = {}
+_espejos_lock = threading.Lock()
+
+
+def obtener_espejo(ip_address, port=4370):
+    """
+    Obtener (o crear) el espejo de usuarios de un dispositivo
+
+    Args:
+        ip_address (str): IP del dispositivo
+        port (int): Puerto del dispositivo
+
+    Returns:
+        EspejoUsuarios: Espejo compartido del dispositivo
+    """
+    dispositivo = f"{ip_address}:{port}"
+    with _espejos_lock:
+        if dispositivo not in _espejos:
+            _espejos[dispositivo] = EspejoUsuarios(dispositivo)
+        return _espejos[dispositivo]
+
+
+def espejo_de(zkteco_device):
+    """Espejo de usuarios del dispositivo de un ZKTecoK40V2"""
+    return obtener_espejo(zkteco_device.ip_address, zkteco_device.port)
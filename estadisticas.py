@@ -6,7 +6,11 @@ Módulo de estadísticas del sistema - Versión simplificada y funcional
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import connect_db
+import servicio_estadisticas
+from tareas_segundo_plano import CargadorSegundoPlano
+from tabla_virtual import TablaVirtual
 from datetime import datetime, timedelta
+import time
 import ctypes
 import locale
 
@@ -69,6 +73,9 @@ except:
     pass
 
 class Estadisticas(tk.Toplevel):
+    # Segundos que se reutiliza el histograma del día actual (sigue recibiendo registros)
+    VIGENCIA_MINUTOS_HOY = 60
+    
     def __init__(self, parent, user_data):
         super().__init__(parent)
         self.parent = parent
@@ -86,12 +93,23 @@ class Estadisticas(tk.Toplevel):
         # Configurar estilo consistente con el resto del sistema
         self.configure(bg='white')
         
+        # Consultas en segundo plano: la ventana responde mientras llegan los datos
+        self.cargador = CargadorSegundoPlano(self, max_workers=4, nombre='estadisticas')
+        
+        # Histogramas por minuto ya consultados: fecha -> (acumulado, momento de la consulta)
+        self.minutos_por_fecha = {}
+        
         self.setup_ui()
         self.center_window()
         
         # Cargar estadísticas después de que la interfaz esté completamente creada
         self.after(200, self.load_statistics)
         
+    def destroy(self):
+        """Cancelar las consultas pendientes al cerrar la ventana"""
+        self.cargador.cerrar()
+        super().destroy()
+        
     def setup_ui(self):
         """Configurar la interfaz principal"""
         # Configurar el fondo de la ventana principal
@@ -361,13 +379,13 @@ class Estadisticas(tk.Toplevel):
                  foreground=[('selected', '#1565c0'),
                             ('active', '#2d3748')])
         
-        # Crear tabla (Treeview) con columnas (sin columna ordinal)
+        # Crear tabla virtual (Treeview) con columnas (sin columna ordinal)
         columns = ("unidad", "registros", "porcentaje")
-        self.stats_table = ttk.Treeview(table_frame, 
-                                      columns=columns, 
-                                      show='headings',
-                                      style="Modern.Treeview",
-                                      height=12)
+        self.tabla_estadisticas = TablaVirtual(table_frame, 
+                                               columns, 
+                                               style="Modern.Treeview",
+                                               height=12)
+        self.stats_table = self.tabla_estadisticas.tree
         
         # Configurar headers de columnas
         self.stats_table.heading("unidad", text="UNIDAD DE INSCRIPCIÓN")
@@ -379,13 +397,8 @@ class Estadisticas(tk.Toplevel):
         self.stats_table.column("registros", width=120, anchor="center")
         self.stats_table.column("porcentaje", width=120, anchor="center")
         
-        # Scrollbar vertical para la tabla
-        table_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.stats_table.yview)
-        self.stats_table.configure(yscrollcommand=table_scrollbar.set)
-        
-        # Empaquetar tabla y scrollbar
-        self.stats_table.pack(side="left", fill="both", expand=True)
-        table_scrollbar.pack(side="right", fill="y")
+        # Empaquetar tabla (incluye scrollbar vertical)
+        self.tabla_estadisticas.pack(side="left", fill="both", expand=True)
         
         # Paginación para navegar entre estadísticas
         pagination_frame = tk.Frame(content_frame, bg='white', height=60)
@@ -507,7 +520,7 @@ class Estadisticas(tk.Toplevel):
             # Buscar y eliminar el interruptor del content_frame
             try:
                 # Buscar el content_frame
-                content_frame = self.stats_table.master.master
+                content_frame = self.tabla_estadisticas.master.master
                 
                 # Buscar y eliminar el frame del interruptor
                 for child in content_frame.winfo_children():
@@ -539,70 +552,157 @@ class Estadisticas(tk.Toplevel):
         elif self.current_stat == 9:
             self.load_usuario_data_simple()
         
-    def load_unidad_data_simple(self):
-        """Cargar datos de distribución por unidad en tabla real"""
+    # Configuración de cada página de estadísticas específicas:
+    # (encabezados de columnas, mensaje si no hay datos)
+    STAT_CONFIG = [
+        (("UNIDAD DE INSCRIPCIÓN", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de unidades"),
+        (("DEDO REGISTRADO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de dedos registrados"),
+        (("GRUPO ETARIO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de edades"),
+        (("SEXO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de sexo"),
+        (("DÍA DE LA SEMANA", "REGISTROS", "PORCENTAJE"), "No se encontraron datos por día de la semana"),
+        (("AÑO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos por años"),
+        (("HORARIO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de horarios"),
+        (("RANGO ETARIO Y SEXO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos por rango de edad y sexo"),
+        (("UNIDAD", "EDAD PROMEDIO", "TOTAL PERSONAS"), "No se encontraron datos de edad promedio por unidad"),
+        (("NOMBRE COMPLETO", "REGISTROS", "PORCENTAJE"), "No se encontraron datos de usuarios"),
+    ]
+    
+    def obtener_datos_estadistica(self, indice, individual=False):
+        """
+        Consultar al servicio de estadísticas y formatear las filas de una página
+        
+        No toca widgets, por lo que puede ejecutarse fuera del hilo de Tk.
+        
+        Args:
+            indice (int): Índice de la estadística (ver stat_names)
+            individual (bool): Edades individuales en lugar de grupos (solo índice 2)
+            
+        Returns:
+            list: Filas (columna1, columna2, columna3) ya formateadas, o None sin conexión
+        """
+        def distribucion(filas, etiqueta=str):
+            return [(etiqueta(valor), formatear_numero(cantidad), formatear_porcentaje(porcentaje))
+                    for valor, cantidad, porcentaje in filas]
+        
+        if indice == 0:
+            filas = servicio_estadisticas.distribucion_unidad()
+        elif indice == 1:
+            filas = servicio_estadisticas.distribucion_dedo()
+        elif indice == 2:
+            filas = servicio_estadisticas.distribucion_edad(individual)
+        elif indice == 3:
+            filas = servicio_estadisticas.distribucion_sexo()
+        elif indice == 4:
+            filas = servicio_estadisticas.distribucion_dia_semana()
+        elif indice == 5:
+            filas = servicio_estadisticas.distribucion_anios()
+            return filas if filas is None else distribucion(filas, lambda anio: str(int(anio)))
+        elif indice == 6:
+            filas = servicio_estadisticas.distribucion_horas()
+            return filas if filas is None else distribucion(
+                filas, lambda hora: f"{int(hora):02d}:00 - {int(hora):02d}:59")
+        elif indice == 7:
+            filas = servicio_estadisticas.distribucion_edad_sexo()
+            if filas is None:
+                return None
+            return [(f"{rango_edad} - {sexo}", formatear_numero(cantidad), formatear_porcentaje(porcentaje))
+                    for rango_edad, sexo, cantidad, porcentaje in filas]
+        elif indice == 8:
+            filas = servicio_estadisticas.edad_promedio_por_unidad()
+            if filas is None:
+                return None
+            return [(unidad, f"{formatear_numero(edad_promedio, 1)} años", f"{formatear_numero(total_personas)} personas")
+                    for unidad, edad_promedio, total_personas in filas]
+        elif indice == 9:
+            filas = servicio_estadisticas.distribucion_usuario()
+        else:
+            return []
+        
+        return filas if filas is None else distribucion(filas)
+    
+    def preparar_tabla_estadistica(self, indice, individual=False):
+        """Limpiar la tabla y configurar los encabezados de una página"""
+        self.tabla_estadisticas.limpiar()
+        
+        encabezados, _ = self.STAT_CONFIG[indice]
+        if indice == 2 and individual:
+            encabezados = ("EDAD",) + encabezados[1:]
+        for columna, texto in zip(("unidad", "registros", "porcentaje"), encabezados):
+            self.stats_table.heading(columna, text=texto)
+    
+    def mostrar_estadistica(self, indice, filas):
+        """Mostrar en la tabla las filas ya formateadas de una estadística"""
+        if filas is None:
+            self.show_error_in_table("Error: No se pudo conectar a la base de datos")
+            return
+        if not filas:
+            self.show_error_in_table(self.STAT_CONFIG[indice][1])
+            return
+        
+        self.tabla_estadisticas.mostrar(filas)
+        
+        print(f"[OK] {self.stat_names[indice]}: {len(filas)} filas")
+    
+    def cargar_estadistica(self, indice):
+        """Cargar y mostrar una página de estadísticas específicas"""
         try:
-            print("[REFRESH] Cargando datos de unidades...")
+            print(f"[REFRESH] Cargando {self.stat_names[indice]}...")
             
-            # Verificar que la tabla existe
             if not hasattr(self, 'stats_table'):
-                print("[ERROR] Widget stats_table no existe")
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para unidades
-            self.stats_table.heading("unidad", text="UNIDAD DE INSCRIPCIÓN")
-            self.update_idletasks()
-            
-            # Conectar a la base de datos
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Obtener datos de postulantes con sus unidades
-            cursor.execute("""
-                SELECT unidad 
-                FROM postulantes 
-                WHERE unidad IS NOT NULL AND unidad != ''
-                ORDER BY unidad
-            """)
-            
-            unidades_data = cursor.fetchall()
-            conn.close()
-            
-            if not unidades_data:
-                self.show_error_in_table("No se encontraron datos de unidades")
                 return
-                
-            # Contar unidades
-            unidad_count = {}
-            for row in unidades_data:
-                unidad = row[0]
-                unidad_count[unidad] = unidad_count.get(unidad, 0) + 1
-                
-            # Insertar datos en la tabla ordenados por cantidad (mayor a menor)
-            total = sum(unidad_count.values())
-            sorted_unidades = sorted(unidad_count.items(), key=lambda x: x[1], reverse=True)
             
-            for unidad, count in sorted_unidades:
-                porcentaje = (count / total) * 100
-                self.stats_table.insert("", "end", values=(
-                    unidad,
-                    formatear_numero(count),
-                    formatear_porcentaje(porcentaje)
-                ))
+            individual = indice == 2 and self.show_individual_ages.get()
+            self.preparar_tabla_estadistica(indice, individual)
+            if indice == 2:
+                self.agregar_interruptor_edades()
+            self.tabla_estadisticas.mostrar([("Cargando...", "", "")])
             
-            print(f"[OK] Datos cargados: {total} registros procesados")
+            # Descartar la página anterior si el usuario avanzó antes de que terminara
+            self.cargador.cancelar('pagina')
+            self.cargador.enviar(
+                'pagina', servicio_estadisticas.cache_estadisticas.obtener,
+                lambda filas: self.mostrar_estadistica(indice, filas),
+                ('pagina', indice, individual), self.obtener_datos_estadistica, indice, individual,
+                al_fallar=lambda e: self.show_error_in_table(f"Error al cargar datos: {str(e)}"))
             
         except Exception as e:
             print(f"[ERROR] Error al cargar datos: {e}")
             self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+    
+    def agregar_interruptor_edades(self):
+        """Agregar el interruptor de edades individuales (solo en la página de edades)"""
+        # Agregar interruptor para edades individuales en la posición marcada (solo en esta página)
+        if not hasattr(self, 'age_switch_added'):
+            try:
+                # Buscar el content_frame para agregar el interruptor
+                content_frame = self.tabla_estadisticas.master.master
+                
+                # Crear frame para el interruptor - insertarlo ANTES de la tabla
+                switch_frame = tk.Frame(content_frame, bg='white')
+                switch_frame._age_switch = True  # Marcar para identificación
+                
+                # Insertar el frame del interruptor ANTES del frame de la tabla
+                table_frame = self.tabla_estadisticas.master
+                switch_frame.pack(fill='x', padx=20, pady=(5, 10), before=table_frame)
+                
+                # Crear y agregar el interruptor
+                age_switch = self.create_toggle_switch(
+                    switch_frame, 
+                    "Mostrar edades individuales", 
+                    self.show_individual_ages, 
+                    self.on_age_display_changed
+                )
+                age_switch.pack(anchor='w')  # Alinear a la izquierda
+                
+                # Marcar que ya se agregó el interruptor
+                self.age_switch_added = True
+                print("[OK] Interruptor agregado en la posición marcada")
+            except Exception as e:
+                print(f"[ERROR] Error al agregar interruptor: {e}")
+    
+    def load_unidad_data_simple(self):
+        """Cargar datos de distribución por unidad en tabla real"""
+        self.cargar_estadistica(0)
             
     def show_error_in_text(self, mensaje):
         """Mostrar mensaje de error en el widget de texto (deprecated)"""
@@ -615,721 +715,44 @@ class Estadisticas(tk.Toplevel):
     def show_error_in_table(self, mensaje):
         """Mostrar mensaje de error en la tabla"""
         if hasattr(self, 'stats_table'):
-            # Limpiar tabla
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-            # Insertar mensaje de error
-            self.stats_table.insert("", "end", values=(f"[ERROR] {mensaje}", "", ""))
+            # Reemplazar el contenido de la tabla por el mensaje de error
+            self.tabla_estadisticas.mostrar([(f"[ERROR] {mensaje}", "", "")])
             
     def load_dedo_data_simple(self):
         """Cargar datos de distribución por dedo registrado en tabla real"""
-        try:
-            print("[REFRESH] Cargando datos de dedos...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para dedos
-            self.stats_table.heading("unidad", text="DEDO REGISTRADO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT dedo_registrado 
-                FROM postulantes 
-                WHERE dedo_registrado IS NOT NULL AND dedo_registrado != ''
-                ORDER BY dedo_registrado
-            """)
-            
-            dedos_data = cursor.fetchall()
-            conn.close()
-            
-            if not dedos_data:
-                self.show_error_in_table("No se encontraron datos de dedos registrados")
-                return
-                
-            # Contar dedos
-            dedo_count = {}
-            for row in dedos_data:
-                dedo = row[0]
-                dedo_count[dedo] = dedo_count.get(dedo, 0) + 1
-                
-            # Insertar datos en la tabla ordenados por cantidad (mayor a menor)
-            total = sum(dedo_count.values())
-            sorted_dedos = sorted(dedo_count.items(), key=lambda x: x[1], reverse=True)
-            
-            for dedo, count in sorted_dedos:
-                porcentaje = (count / total) * 100
-                self.stats_table.insert("", "end", values=(
-                    dedo,
-                    formatear_numero(count),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos de dedos cargados: {total} registros")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de dedos: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(1)
             
     def load_edad_data_simple(self):
         """Cargar datos de distribución por edades en tabla real"""
-        try:
-            print("[REFRESH] Cargando datos de edades...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para edades
-            self.stats_table.heading("unidad", text="GRUPO ETARIO")
-            self.update_idletasks()
-            
-            # Agregar interruptor para edades individuales en la posición marcada (solo en esta página)
-            if not hasattr(self, 'age_switch_added'):
-                try:
-                    # Buscar el content_frame para agregar el interruptor
-                    content_frame = self.stats_table.master.master
-                    
-                    # Crear frame para el interruptor - insertarlo ANTES de la tabla
-                    switch_frame = tk.Frame(content_frame, bg='white')
-                    switch_frame._age_switch = True  # Marcar para identificación
-                    
-                    # Insertar el frame del interruptor ANTES del frame de la tabla
-                    table_frame = self.stats_table.master
-                    switch_frame.pack(fill='x', padx=20, pady=(5, 10), before=table_frame)
-                    
-                    # Crear y agregar el interruptor
-                    age_switch = self.create_toggle_switch(
-                        switch_frame, 
-                        "Mostrar edades individuales", 
-                        self.show_individual_ages, 
-                        self.on_age_display_changed
-                    )
-                    age_switch.pack(anchor='w')  # Alinear a la izquierda
-                    
-                    # Marcar que ya se agregó el interruptor
-                    self.age_switch_added = True
-                    print("[OK] Interruptor agregado en la posición marcada")
-                except Exception as e:
-                    print(f"[ERROR] Error al agregar interruptor: {e}")
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT edad, fecha_nacimiento 
-                FROM postulantes 
-                WHERE edad IS NOT NULL OR fecha_nacimiento IS NOT NULL
-            """)
-            
-            edad_data = cursor.fetchall()
-            conn.close()
-            
-            if not edad_data:
-                self.show_error_in_table("No se encontraron datos de edades")
-                return
-                
-            # Procesar edades
-            edades = []
-            for row in edad_data:
-                edad = row[0]
-                fecha_nac = row[1]
-                
-                if edad:
-                    edades.append(edad)
-                elif fecha_nac:
-                    from datetime import datetime
-                    try:
-                        edad_calc = datetime.now().year - fecha_nac.year
-                        if datetime.now().date() < fecha_nac.replace(year=datetime.now().year):
-                            edad_calc -= 1
-                        edades.append(edad_calc)
-                    except:
-                        continue
-                        
-            if not edades:
-                self.show_error_in_table("No se pudieron procesar las edades")
-                return
-                
-            # Verificar si mostrar edades individuales o rangos
-            show_individual = getattr(self, 'show_individual_ages', tk.BooleanVar(value=False)).get()
-            
-            if show_individual:
-                # Actualizar header de tabla para edades individuales
-                self.stats_table.heading("unidad", text="EDAD")
-                self.update_idletasks()
-                # Mostrar edades individuales
-                edad_counts = {}
-                for edad in edades:
-                    edad_counts[edad] = edad_counts.get(edad, 0) + 1
-                
-                # Ordenar por edad
-                sorted_ages = sorted(edad_counts.items())
-                
-                # Insertar datos en la tabla
-                total = len(edades)
-                for edad, count in sorted_ages:
-                    porcentaje = (count / total) * 100
-                    self.stats_table.insert("", "end", values=(
-                        f"{edad} años",
-                        formatear_numero(count),
-                        formatear_porcentaje(porcentaje)
-                    ))
-                
-                print(f"[OK] Datos de edades individuales cargados: {total} registros")
-                return
-                
-            # Crear rangos dinámicos basados en la distribución real de datos
-            # Actualizar header de tabla para rangos
-            self.stats_table.heading("unidad", text="GRUPO ETARIO")
-            self.update_idletasks()
-            
-            if len(edades) > 0:
-                edades_sorted = sorted(edades)
-                min_edad = min(edades)
-                max_edad = max(edades)
-                
-                # Si hay pocos datos, usar rangos estándar
-                if len(edades) < 10:
-                    rangos = {
-                        "18-25 años": 0,
-                        "26-35 años": 0, 
-                        "36-45 años": 0,
-                        "46-55 años": 0,
-                        "56+ años": 0
-                    }
-                    
-                    for edad in edades:
-                        if 18 <= edad <= 25:
-                            rangos["18-25 años"] += 1
-                        elif 26 <= edad <= 35:
-                            rangos["26-35 años"] += 1
-                        elif 36 <= edad <= 45:
-                            rangos["36-45 años"] += 1
-                        elif 46 <= edad <= 55:
-                            rangos["46-55 años"] += 1
-                        elif edad > 55:
-                            rangos["56+ años"] += 1
-                else:
-                    # Crear rangos dinámicos usando percentiles
-                    try:
-                        import numpy as np
-                        
-                        # Calcular percentiles para crear rangos equilibrados
-                        percentiles = [0, 20, 40, 60, 80, 100]
-                        limites = np.percentile(edades, percentiles)
-                        
-                        # Crear rangos dinámicos
-                        rangos = {}
-                        for i in range(len(limites) - 1):
-                            inicio = int(limites[i])
-                            fin = int(limites[i + 1])
-                            
-                            if inicio == fin:
-                                fin += 1
-                                
-                            if i == len(limites) - 2:  # Último rango
-                                rango_nombre = f"{inicio}+ años"
-                            else:
-                                rango_nombre = f"{inicio}-{fin} años"
-                            
-                            rangos[rango_nombre] = 0
-                        
-                        # Asignar edades a rangos dinámicos
-                        for edad in edades:
-                            for i in range(len(limites) - 1):
-                                inicio = int(limites[i])
-                                fin = int(limites[i + 1])
-                                
-                                if inicio == fin:
-                                    fin += 1
-                                    
-                                if i == len(limites) - 2:  # Último rango
-                                    if edad >= inicio:
-                                        rango_nombre = f"{inicio}+ años"
-                                        rangos[rango_nombre] += 1
-                                        break
-                                else:
-                                    if inicio <= edad <= fin:
-                                        rango_nombre = f"{inicio}-{fin} años"
-                                        rangos[rango_nombre] += 1
-                                        break
-                    except ImportError:
-                        # Fallback si numpy no está disponible
-                        print("[WARN] numpy no disponible, usando rangos estándar")
-                        rangos = {
-                            "18-25 años": 0,
-                            "26-35 años": 0, 
-                            "36-45 años": 0,
-                            "46-55 años": 0,
-                            "56+ años": 0
-                        }
-                        
-                        for edad in edades:
-                            if 18 <= edad <= 25:
-                                rangos["18-25 años"] += 1
-                            elif 26 <= edad <= 35:
-                                rangos["26-35 años"] += 1
-                            elif 36 <= edad <= 45:
-                                rangos["36-45 años"] += 1
-                            elif 46 <= edad <= 55:
-                                rangos["46-55 años"] += 1
-                            elif edad > 55:
-                                rangos["56+ años"] += 1
-            else:
-                rangos = {"Sin datos": 0}
-                    
-            # Insertar datos en la tabla ordenados por cantidad (mayor a menor)
-            total = sum(rangos.values())
-            sorted_rangos = sorted([(rango, count) for rango, count in rangos.items() if count > 0], 
-                                 key=lambda x: x[1], reverse=True)
-            
-            for rango, count in sorted_rangos:
-                porcentaje = (count / total) * 100
-                self.stats_table.insert("", "end", values=(
-                    rango,
-                    formatear_numero(count),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos de edades cargados: {total} registros")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de edades: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(2)
             
     def load_sexo_data_simple(self):
         """Cargar datos de distribución por sexo en tabla real"""
-        try:
-            print("[REFRESH] Cargando datos de sexo...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para sexo
-            self.stats_table.heading("unidad", text="SEXO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener distribución por sexo
-            cursor.execute("""
-                SELECT 
-                    COALESCE(sexo, 'No especificado') as sexo,
-                    COUNT(*) as cantidad,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM postulantes), 2) as porcentaje
-                FROM postulantes 
-                GROUP BY sexo 
-                ORDER BY cantidad DESC
-            """)
-            
-            sexo_data = cursor.fetchall()
-            conn.close()
-            
-            if not sexo_data:
-                self.show_error_in_table("No se encontraron datos de sexo")
-                return
-                
-            # Insertar datos en la tabla
-            for sexo, cantidad, porcentaje in sexo_data:
-                self.stats_table.insert("", "end", values=(
-                    sexo,
-                    formatear_numero(cantidad),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos de sexo cargados: {len(sexo_data)} categorías")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de sexo: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(3)
             
     def load_dia_semana_data_simple(self):
         """Cargar datos de distribución por día de la semana"""
-        try:
-            print("[REFRESH] Cargando datos por día de la semana...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para días de la semana
-            self.stats_table.heading("unidad", text="DÍA DE LA SEMANA")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener distribución por día de la semana
-            cursor.execute("""
-                SELECT 
-                    CASE EXTRACT(DOW FROM fecha_registro)
-                        WHEN 0 THEN 'Domingo'
-                        WHEN 1 THEN 'Lunes'
-                        WHEN 2 THEN 'Martes'
-                        WHEN 3 THEN 'Miércoles'
-                        WHEN 4 THEN 'Jueves'
-                        WHEN 5 THEN 'Viernes'
-                        WHEN 6 THEN 'Sábado'
-                    END as dia_semana,
-                    COUNT(*) as cantidad,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM postulantes), 2) as porcentaje
-                FROM postulantes 
-                GROUP BY EXTRACT(DOW FROM fecha_registro)
-                ORDER BY EXTRACT(DOW FROM fecha_registro)
-            """)
-            
-            dia_data = cursor.fetchall()
-            conn.close()
-            
-            if not dia_data:
-                self.show_error_in_table("No se encontraron datos por día de la semana")
-                return
-                
-            # Insertar datos en la tabla
-            for dia, cantidad, porcentaje in dia_data:
-                self.stats_table.insert("", "end", values=(
-                    dia,
-                    formatear_numero(cantidad),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos por día de la semana cargados: {len(dia_data)} días")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos por día de la semana: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(4)
             
     def load_anios_data_simple(self):
         """Cargar datos de registros por años"""
-        try:
-            print("[REFRESH] Cargando datos por años...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para años
-            self.stats_table.heading("unidad", text="AÑO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener registros por años
-            cursor.execute("""
-                SELECT 
-                    EXTRACT(YEAR FROM fecha_registro) as anio,
-                    COUNT(*) as cantidad,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM postulantes), 2) as porcentaje
-                FROM postulantes 
-                GROUP BY EXTRACT(YEAR FROM fecha_registro)
-                ORDER BY anio DESC
-            """)
-            
-            anio_data = cursor.fetchall()
-            conn.close()
-            
-            if not anio_data:
-                self.show_error_in_table("No se encontraron datos por años")
-                return
-                
-            # Insertar datos en la tabla
-            for anio, cantidad, porcentaje in anio_data:
-                self.stats_table.insert("", "end", values=(
-                    str(int(anio)),
-                    formatear_numero(cantidad),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos por años cargados: {len(anio_data)} años")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos por años: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(5)
             
     def load_horarios_pico_data_simple(self):
         """Cargar datos de horarios de pico de registro (por hora)"""
-        try:
-            print("[REFRESH] Cargando datos de horarios de pico...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para horarios
-            self.stats_table.heading("unidad", text="HORARIO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener registros por hora
-            cursor.execute("""
-                SELECT 
-                    EXTRACT(HOUR FROM fecha_registro) as hora,
-                    COUNT(*) as cantidad,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM postulantes), 2) as porcentaje
-                FROM postulantes 
-                GROUP BY EXTRACT(HOUR FROM fecha_registro)
-                ORDER BY EXTRACT(HOUR FROM fecha_registro) ASC
-            """)
-            
-            hora_data = cursor.fetchall()
-            conn.close()
-            
-            if not hora_data:
-                self.show_error_in_table("No se encontraron datos de horarios")
-                return
-                
-            # Ordenar los datos por hora antes de insertar
-            hora_data_ordenada = sorted(hora_data, key=lambda x: x[0])
-            
-            # Insertar datos en la tabla con formato de hora
-            for hora, cantidad, porcentaje in hora_data_ordenada:
-                hora_formato = f"{int(hora):02d}:00 - {int(hora):02d}:59"
-                self.stats_table.insert("", "end", values=(
-                    hora_formato,
-                    formatear_numero(cantidad),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos de horarios de pico cargados: {len(hora_data)} horas")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de horarios de pico: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(6)
             
     def load_edad_sexo_data_simple(self):
         """Cargar datos de distribución por rango de edad y sexo"""
-        try:
-            print("[REFRESH] Cargando datos por rango de edad y sexo...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para edad y sexo
-            self.stats_table.heading("unidad", text="RANGO ETARIO Y SEXO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener distribución por rango de edad y sexo
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                        WHEN edad < 25 THEN '18-24 años'
-                        WHEN edad < 35 THEN '25-34 años'
-                        WHEN edad < 45 THEN '35-44 años'
-                        WHEN edad < 55 THEN '45-54 años'
-                        ELSE '55+ años'
-                    END as rango_edad,
-                    COALESCE(sexo, 'No especificado') as sexo,
-                    COUNT(*) as cantidad,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM postulantes), 2) as porcentaje
-                FROM postulantes 
-                GROUP BY 
-                    CASE 
-                        WHEN edad < 25 THEN '18-24 años'
-                        WHEN edad < 35 THEN '25-34 años'
-                        WHEN edad < 45 THEN '35-44 años'
-                        WHEN edad < 55 THEN '45-54 años'
-                        ELSE '55+ años'
-                    END,
-                    sexo
-                ORDER BY rango_edad, sexo
-            """)
-            
-            edad_sexo_data = cursor.fetchall()
-            conn.close()
-            
-            if not edad_sexo_data:
-                self.show_error_in_table("No se encontraron datos por rango de edad y sexo")
-                return
-                
-            # Insertar datos en la tabla
-            for rango_edad, sexo, cantidad, porcentaje in edad_sexo_data:
-                self.stats_table.insert("", "end", values=(
-                    f"{rango_edad} - {sexo}",
-                    formatear_numero(cantidad),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos por rango de edad y sexo cargados: {len(edad_sexo_data)} combinaciones")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos por rango de edad y sexo: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(7)
             
     def load_edad_promedio_unidad_data_simple(self):
         """Cargar datos de edad promedio por unidad"""
-        try:
-            print("[REFRESH] Cargando datos de edad promedio por unidad...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar headers de tabla para edad promedio
-            self.stats_table.heading("unidad", text="UNIDAD")
-            self.stats_table.heading("registros", text="EDAD PROMEDIO")
-            self.stats_table.heading("porcentaje", text="TOTAL PERSONAS")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            
-            # Consulta para obtener edad promedio por unidad
-            cursor.execute("""
-                SELECT 
-                    unidad,
-                    ROUND(AVG(edad), 1) as edad_promedio,
-                    COUNT(*) as total_personas
-                FROM postulantes 
-                WHERE unidad IS NOT NULL AND unidad != ''
-                GROUP BY unidad
-                ORDER BY edad_promedio DESC
-            """)
-            
-            edad_promedio_data = cursor.fetchall()
-            conn.close()
-            
-            if not edad_promedio_data:
-                self.show_error_in_table("No se encontraron datos de edad promedio por unidad")
-                return
-                
-            # Insertar datos en la tabla
-            for unidad, edad_promedio, total_personas in edad_promedio_data:
-                self.stats_table.insert("", "end", values=(
-                    unidad,
-                    f"{formatear_numero(edad_promedio, 1)} años",
-                    f"{formatear_numero(total_personas)} personas"
-                ))
-            
-            print(f"[OK] Datos de edad promedio por unidad cargados: {len(edad_promedio_data)} unidades")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de edad promedio por unidad: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(8)
             
     def load_usuario_data_simple(self):
         """Cargar datos de top 5 usuarios más activos en tabla real"""
-        try:
-            print("[REFRESH] Cargando datos de usuarios...")
-            
-            if not hasattr(self, 'stats_table'):
-                return
-                
-            # Limpiar tabla actual
-            for item in self.stats_table.get_children():
-                self.stats_table.delete(item)
-                
-            # Actualizar header de tabla para usuarios
-            self.stats_table.heading("unidad", text="NOMBRE COMPLETO")
-            self.update_idletasks()
-            
-            conn = connect_db()
-            if not conn:
-                self.show_error_in_table("Error: No se pudo conectar a la base de datos")
-                return
-                
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT p.registrado_por, COUNT(p.id) as total_registros
-                FROM postulantes p
-                WHERE p.registrado_por IS NOT NULL AND p.registrado_por != ''
-                GROUP BY p.registrado_por
-                ORDER BY total_registros DESC
-            """)
-            
-            usuarios_data = cursor.fetchall()
-            conn.close()
-            
-            if not usuarios_data:
-                self.show_error_in_table("No se encontraron datos de usuarios")
-                return
-                
-            # Ranking con medallas
-            medallas = ["🥇", "🥈", "🥉", "🏅", "[MEDAL]"]
-            total_general = sum(total for _, total in usuarios_data)
-            
-            # Insertar datos en la tabla sin ranking
-            for registrado_por, total_registros in usuarios_data:
-                porcentaje = (total_registros / total_general) * 100
-                
-                self.stats_table.insert("", "end", values=(
-                    registrado_por,
-                    formatear_numero(total_registros),
-                    formatear_porcentaje(porcentaje)
-                ))
-            
-            print(f"[OK] Datos de usuarios cargados: {len(usuarios_data)} usuarios")
-            
-        except Exception as e:
-            print(f"[ERROR] Error al cargar datos de usuarios: {e}")
-            self.show_error_in_table(f"Error al cargar datos: {str(e)}")
+        self.cargar_estadistica(9)
         
     def create_premium_card_vertical(self, parent, title, subtitle, content_creator, section_id, expanded=False):
         """Crear una card premium moderna en layout vertical"""
@@ -1831,62 +1254,53 @@ class Estadisticas(tk.Toplevel):
                 messagebox.showerror("Error", "Formato de hora incorrecto. Use HH:MM (ej: 07:00)")
                 return
             
-            # Obtener datos de la base de datos
-            conn = connect_db()
-            if not conn:
+            # Histograma acumulado del día: se consulta una vez por fecha y
+            # cualquier cambio de rango horario se responde desde memoria
+            guardado = self.minutos_por_fecha.get(fecha)
+            if guardado is not None and (fecha != datetime.now().date()
+                                         or time.monotonic() - guardado[1] < self.VIGENCIA_MINUTOS_HOY):
+                self.mostrar_registros_por_hora(fecha, rango_inicio, rango_fin, guardado[0])
                 return
-                
-            cursor = conn.cursor()
             
-            # Consulta para obtener registros por hora del día seleccionado
-            cursor.execute("""
-                SELECT 
-                    EXTRACT(HOUR FROM fecha_registro) as hora,
-                    EXTRACT(MINUTE FROM fecha_registro) as minuto,
-                    COUNT(*) as cantidad
-                FROM postulantes 
-                WHERE DATE(fecha_registro) = %s
-                GROUP BY EXTRACT(HOUR FROM fecha_registro), EXTRACT(MINUTE FROM fecha_registro)
-                ORDER BY hora, minuto
-            """, (fecha,))
-            
-            registros_por_hora = cursor.fetchall()
-            
-            # Calcular totales por rango
-            rango_count = 0
-            
-            # Crear diccionario para facilitar el conteo
-            hora_counts = {}
-            for hora, minuto, cantidad in registros_por_hora:
-                hora_int = int(hora)
-                minuto_int = int(minuto)
-                
-                # Crear tiempo para comparación
-                tiempo_registro = datetime.strptime(f"{hora_int:02d}:{minuto_int:02d}", "%H:%M").time()
-                
-                # Acumular por hora para el diccionario
-                if hora_int not in hora_counts:
-                    hora_counts[hora_int] = 0
-                hora_counts[hora_int] += cantidad
-                
-                # Asignar al rango según horario configurado
-                if rango_inicio <= tiempo_registro <= rango_fin:
-                    rango_count += cantidad
-            
-            # Actualizar variables
-            self.rango_count_var.set(str(rango_count))
-            self.total_dia_var.set(str(rango_count))
-            
-            # Actualizar tarjeta de resumen
-            fecha_str = fecha.strftime('%d/%m/%Y')
-            summary_message = f"Usuarios registrados en fecha {fecha_str}\nentre las {rango_inicio.strftime('%H:%M')} y las {rango_fin.strftime('%H:%M')}\n\nTotal: {rango_count} registros"
-            self.summary_text_var.set(summary_message)
-            
-            conn.close()
+            self.summary_text_var.set("Cargando...")
+            self.cargador.cancelar('horas')
+            self.cargador.enviar(
+                'horas', servicio_estadisticas.acumulado_por_minuto,
+                lambda acumulado: self.recibir_registros_por_hora(fecha, rango_inicio, rango_fin, acumulado),
+                fecha,
+                al_fallar=lambda e: self.mostrar_error_por_hora(f"Error al actualizar estadísticas por hora: {e}"))
             
         except Exception as e:
             print(f"Error al actualizar estadísticas por hora: {e}")
             messagebox.showerror("Error", f"Error al actualizar estadísticas por hora: {e}")
+    
+    def recibir_registros_por_hora(self, fecha, rango_inicio, rango_fin, acumulado):
+        """Guardar el histograma de un día recién consultado y mostrar el rango pedido"""
+        if acumulado is None:
+            self.mostrar_error_por_hora("Error: No se pudo conectar a la base de datos")
+            return
+        self.minutos_por_fecha[fecha] = (acumulado, time.monotonic())
+        self.mostrar_registros_por_hora(fecha, rango_inicio, rango_fin, acumulado)
+    
+    def mostrar_registros_por_hora(self, fecha, rango_inicio, rango_fin, acumulado):
+        """Mostrar la cantidad de registros de un día dentro del rango horario"""
+        rango_count = servicio_estadisticas.registros_en_rango_horario(acumulado, rango_inicio, rango_fin)
+        
+        # Actualizar variables
+        self.rango_count_var.set(str(rango_count))
+        self.total_dia_var.set(str(acumulado[-1]))
+        
+        # Actualizar tarjeta de resumen
+        fecha_str = fecha.strftime('%d/%m/%Y')
+        summary_message = f"Usuarios registrados en fecha {fecha_str}\nentre las {rango_inicio.strftime('%H:%M')} y las {rango_fin.strftime('%H:%M')}\n\nTotal: {rango_count} registros"
+        self.summary_text_var.set(summary_message)
+    
+    def mostrar_error_por_hora(self, mensaje):
+        """Reemplazar el resumen por hora por un mensaje de error (sin dejar datos viejos)"""
+        print(f"[ERROR] {mensaje}")
+        self.rango_count_var.set("0")
+        self.total_dia_var.set("0")
+        self.summary_text_var.set(mensaje)
             
     def restore_default_hours(self):
         """Restaurar rango horario por defecto"""
@@ -1912,7 +1326,7 @@ class Estadisticas(tk.Toplevel):
             # Cargar estadísticas detalladas solo si tiene permisos
             if puede_ver_estadisticas_completas(self.user_data) or verificar_permiso(self.user_data, 'estadisticas_basicas', mostrar_error=False):
                 self.load_detailed_stats()
-                print("[OK] Estadísticas cargadas correctamente")
+                print("[OK] Carga de estadísticas iniciada")
             else:
                 # Mostrar mensaje de acceso restringido
                 messagebox.showwarning("Acceso Restringido", 
@@ -1925,122 +1339,65 @@ class Estadisticas(tk.Toplevel):
             messagebox.showerror("Error", f"Error al cargar estadísticas: {e}")
             
     def load_main_metrics(self):
-        """Cargar métricas principales"""
+        """Cargar métricas principales (en segundo plano)"""
+        self.cargador.enviar(
+            'resumen', servicio_estadisticas.cache_estadisticas.obtener, self.mostrar_metricas_principales,
+            ('metricas', datetime.now().date()), servicio_estadisticas.metricas_principales,
+            al_fallar=lambda e: print(f"[ERROR] Error al cargar métricas principales: {e}"))
+            
+    def mostrar_metricas_principales(self, metricas):
+        """Mostrar las métricas principales ya consultadas"""
         try:
-            conn = connect_db()
-            if not conn:
+            if metricas is None:
                 print("[ERROR] No se pudo conectar a la base de datos")
                 return
-                
-            cursor = conn.cursor()
-            
-            # Total de postulantes
-            cursor.execute("SELECT COUNT(*) FROM postulantes")
-            total_postulantes = cursor.fetchone()[0]
-            
-            # Total de usuarios
-            cursor.execute("SELECT COUNT(*) FROM usuarios")
-            total_usuarios = cursor.fetchone()[0]
-            
-            # Postulantes de hoy
-            hoy = datetime.now().date()
-            cursor.execute("SELECT COUNT(*) FROM postulantes WHERE DATE(fecha_registro) = %s", (hoy,))
-            postulantes_hoy = cursor.fetchone()[0]
-            
-            # Postulantes de esta semana
-            inicio_semana = hoy - timedelta(days=hoy.weekday())
-            cursor.execute("SELECT COUNT(*) FROM postulantes WHERE DATE(fecha_registro) >= %s", (inicio_semana,))
-            postulantes_semana = cursor.fetchone()[0]
-            
-            # Postulantes de este mes
-            inicio_mes = hoy.replace(day=1)
-            cursor.execute("SELECT COUNT(*) FROM postulantes WHERE DATE(fecha_registro) >= %s", (inicio_mes,))
-            postulantes_mes = cursor.fetchone()[0]
             
             # Actualizar variables INMEDIATAMENTE
-            self.total_postulantes_var.set(str(total_postulantes))
-            self.total_usuarios_var.set(str(total_usuarios))
-            self.postulantes_hoy_var.set(str(postulantes_hoy))
-            self.postulantes_semana_var.set(str(postulantes_semana))
-            self.postulantes_mes_var.set(str(postulantes_mes))
+            self.total_postulantes_var.set(str(metricas['total_postulantes']))
+            self.total_usuarios_var.set(str(metricas['total_usuarios']))
+            self.postulantes_hoy_var.set(str(metricas['hoy']))
+            self.postulantes_semana_var.set(str(metricas['semana']))
+            self.postulantes_mes_var.set(str(metricas['mes']))
             
             # Forzar actualización visual
             self.update_idletasks()
             
-            conn.close()
-            print(f"[OK] Métricas cargadas: {total_postulantes} postulantes, {total_usuarios} usuarios")
+            print(f"[OK] Métricas cargadas: {metricas['total_postulantes']} postulantes, {metricas['total_usuarios']} usuarios")
             
         except Exception as e:
             print(f"[ERROR] Error al cargar métricas principales: {e}")
             
     def load_detailed_stats(self):
-        """Cargar estadísticas detalladas"""
-        try:
-            conn = connect_db()
-            if not conn:
-                return
-                
-            cursor = conn.cursor()
-            
-            # Obtener todos los postulantes
-            cursor.execute("""
-                SELECT fecha_nacimiento, fecha_registro, edad, dedo_registrado, unidad 
-                FROM postulantes 
-                ORDER BY fecha_registro DESC
-            """)
-            postulantes = cursor.fetchall()
-            
-            if not postulantes:
-                print("[INFO] No hay postulantes en la base de datos")
-                return
-                
-            # Calcular estadísticas de edad
-            edades = []
-            for p in postulantes:
-                if p[2]:  # edad
-                    edades.append(p[2])
-                elif p[0]:  # fecha_nacimiento
-                    try:
-                        edad = datetime.now().year - p[0].year
-                        if datetime.now().date() < p[0].replace(year=datetime.now().year):
-                            edad -= 1
-                        edades.append(edad)
-                    except:
-                        continue
-                    
-            if edades:
-                promedio_edad = sum(edades) / len(edades)
-                edad_minima = min(edades)
-                edad_maxima = max(edades)
-                
-                self.stats_vars['promedio_edad'].set(f"{promedio_edad:.1f} años")
-                self.stats_vars['edad_minima'].set(f"{edad_minima} años")
-                self.stats_vars['edad_maxima'].set(f"{edad_maxima} años")
-                
-            # Fechas de registro
-            fechas_registro = [p[1] for p in postulantes if p[1]]
-            if fechas_registro:
-                ultimo = max(fechas_registro)
-                primer = min(fechas_registro)
-                
-                self.stats_vars['ultimo_registro'].set(ultimo.strftime('%d/%m/%Y %H:%M'))
-                self.stats_vars['primer_registro'].set(primer.strftime('%d/%m/%Y %H:%M'))
-                
-            # Total de unidades únicas
-            unidades = set(p[4] for p in postulantes if p[4])
-            self.stats_vars['total_unidades'].set(str(len(unidades)))
-            
-            # Cargar la estadística inicial (primera página)
-            self.after(100, lambda: self.load_current_stat())
-            
-            # Forzar actualización visual
-            self.update_idletasks()
-            
-            conn.close()
-            print(f"[OK] Estadísticas detalladas cargadas: {len(postulantes)} registros procesados")
+        """Cargar estadísticas detalladas (resumen y página actual en paralelo)"""
+        self.cargador.enviar(
+            'resumen', servicio_estadisticas.cache_estadisticas.obtener, self.mostrar_resumen_general,
+            ('resumen_general',), servicio_estadisticas.resumen_general,
+            al_fallar=lambda e: print(f"[ERROR] Error al cargar estadísticas detalladas: {e}"))
+        
+        # Cargar la estadística inicial (primera página) sin esperar al resumen
+        self.load_current_stat()
             
-        except Exception as e:
-            print(f"[ERROR] Error al cargar estadísticas detalladas: {e}")
+    def mostrar_resumen_general(self, resumen):
+        """Mostrar edad promedio/mínima/máxima, fechas de registro y unidades"""
+        if resumen is None:
+            return
+        
+        if not resumen['total_registros']:
+            print("[INFO] No hay postulantes en la base de datos")
+            return
+        
+        if resumen['promedio_edad'] is not None:
+            self.stats_vars['promedio_edad'].set(f"{resumen['promedio_edad']:.1f} años")
+            self.stats_vars['edad_minima'].set(f"{resumen['edad_minima']} años")
+            self.stats_vars['edad_maxima'].set(f"{resumen['edad_maxima']} años")
+        
+        if resumen['ultimo_registro']:
+            self.stats_vars['ultimo_registro'].set(resumen['ultimo_registro'].strftime('%d/%m/%Y %H:%M'))
+            self.stats_vars['primer_registro'].set(resumen['primer_registro'].strftime('%d/%m/%Y %H:%M'))
+        
+        self.stats_vars['total_unidades'].set(str(resumen['total_unidades']))
+        
+        print(f"[OK] Estadísticas detalladas cargadas: {resumen['total_registros']} registros resumidos")
             
     def update_unidad_distribution(self, postulantes):
         """Actualizar distribución por unidad de inscripción"""
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Gestor de la flota de dispositivos ZKTeco de Sistema QUIRA
+
+Lee los aparatos activos de aparatos_biometricos (ip_address, puerto,
+estado), mantiene una conexión por dispositivo y los sondea en paralelo
+con un pool de hilos acotado: usuarios (espejo local), registros de
+asistencia (sincronización incremental) y hora del dispositivo. Un equipo
+que falla se reintenta con espera exponencial sin demorar a los demás.
+
+El sondeo periódico se inicia al verificar la base de datos en el arranque
+(main_integrado); GestionZKTeco muestra el estado consolidado en su pestaña
+de flota.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from database import connect_db
+from espejo_usuarios_zkteco import espejo_de
+from sesiones_zkteco import obtener_sesion
+import sincronizacion_asistencia
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Hilos de sondeo simultáneos y segundos entre rondas
+MAX_SONDEOS_SIMULTANEOS = 4
+INTERVALO_SONDEO = 60
+
+# Espera tras un fallo: BACKOFF_INICIAL * 2^(fallos-1), hasta BACKOFF_MAXIMO segundos
+BACKOFF_INICIAL = 15
+BACKOFF_MAXIMO = 900
+
+
+def cargar_aparatos():
+    """
+    Aparatos activos con dirección IP configurada
+
+    Returns:
+        list: [{'id', 'nombre', 'serial', 'ip_address', 'puerto'}], o None sin conexión
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, nombre, serial, ip_address, COALESCE(puerto, 4370)
+            FROM aparatos_biometricos
+            WHERE estado = 'ACTIVO' AND ip_address IS NOT NULL AND ip_address != ''
+            ORDER BY id
+        """)
+        return [
+            {'id': id_aparato, 'nombre': nombre, 'serial': serial, 'ip_address': ip, 'puerto': puerto}
+            for id_aparato, nombre, serial, ip, puerto in cursor.fetchall()
+        ]
+    except Exception as e:
+        logger.error("Error al cargar aparatos biométricos: %s", e)
+        return None
+    finally:
+        conn.close()
+
+
+class EstadoDispositivo:
+    """Conexión y último resultado de sondeo de un aparato"""
+
+    def __init__(self, aparato):
+        self.aparato = aparato
+        self.dispositivo = None
+        self.conectado = False
+        self.fallos = 0
+        self.proximo_intento = 0.0
+        self.ultimo_contacto = None
+        self.ultimo_error = None
+        self.usuarios = None
+        self.registros_nuevos = None
+        self.hora_dispositivo = None
+        self.lock = threading.Lock()
+
+    def resumen(self):
+        """Estado del aparato como diccionario"""
+        espera = max(0.0, self.proximo_intento - time.monotonic()) if self.fallos else 0.0
+        return {
+            'id': self.aparato['id'],
+            'nombre': self.aparato['nombre'],
+            'serial': self.aparato['serial'],
+            'ip_address': self.aparato['ip_address'],
+            'puerto': self.aparato['puerto'],
+            'conectado': self.conectado,
+            'fallos_consecutivos': self.fallos,
+            'reintento_en': round(espera),
+            'ultimo_contacto': self.ultimo_contacto,
+            'ultimo_error': self.ultimo_error,
+            'usuarios': self.usuarios,
+            'registros_nuevos': self.registros_nuevos,
+            'hora_dispositivo': self.hora_dispositivo,
+        }
+
+
+class GestorFlota:
+    """Sondeo concurrente de todos los aparatos activos"""
+
+    def __init__(self, max_workers=MAX_SONDEOS_SIMULTANEOS, intervalo=INTERVALO_SONDEO):
+        """
+        Inicializar gestor
+
+        Args:
+            max_workers (int): Dispositivos sondeados a la vez
+            intervalo (float): Segundos entre rondas del sondeo periódico
+        """
+        self.intervalo = intervalo
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='flota-zkteco')
+        self._estados = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    # ------------------------------------------------------------------
+    # Aparatos
+    # ------------------------------------------------------------------
+
+    def actualizar_aparatos(self):
+        """
+        Sincronizar la lista de dispositivos con aparatos_biometricos
+
+        Los aparatos nuevos se agregan, los que cambiaron de IP/puerto se
+        reconectan y los que ya no están activos se desconectan.
+
+        Returns:
+            bool: True si se pudo leer la tabla
+        """
+        aparatos = cargar_aparatos()
+        if aparatos is None:
+            return False
+
+        retirados = []
+        with self._lock:
+            vigentes = {a['id']: a for a in aparatos}
+            for id_aparato in list(self._estados):
+                estado = self._estados[id_aparato]
+                nuevo = vigentes.get(id_aparato)
+                if (nuevo is None or (nuevo['ip_address'], nuevo['puerto'])
+                        != (estado.aparato['ip_address'], estado.aparato['puerto'])):
+                    retirados.append(self._estados.pop(id_aparato))
+            for id_aparato, aparato in vigentes.items():
+                if id_aparato in self._estados:
+                    self._estados[id_aparato].aparato = aparato
+                else:
+                    self._estados[id_aparato] = EstadoDispositivo(aparato)
+
+        # Fuera del lock general: puede haber un sondeo en curso sobre el aparato
+        for estado in retirados:
+            with estado.lock:
+                self._desconectar(estado)
+        return True
+
+    # ------------------------------------------------------------------
+    # Sondeo
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _desconectar(estado):
+        if estado.dispositivo is not None:
+            try:
+                estado.dispositivo.disconnect()
+            except Exception:
+                pass
+        estado.dispositivo = None
+        estado.conectado = False
+
+    def _asegurar_conexion(self, estado):
+        """Usar la sesión compartida del aparato (la misma que usan las ventanas)"""
+        if estado.dispositivo is None:
+            aparato = estado.aparato
+            estado.dispositivo = obtener_sesion(aparato['ip_address'], aparato['puerto'])
+        estado.conectado = estado.dispositivo.connect()
+        return estado.conectado
+
+    def _sondear(self, estado):
+        """Sondear un aparato (en un hilo del pool)"""
+        with estado.lock:
+            aparato = estado.aparato
+            try:
+                if not self._asegurar_conexion(estado):
+                    raise ConnectionError(f"No se pudo conectar a {aparato['ip_address']}:{aparato['puerto']}")
+
+                dispositivo = estado.dispositivo
+
+                espejo = espejo_de(dispositivo)
+                if espejo.sincronizar(dispositivo):
+                    estado.usuarios = espejo.cantidad()
+
+                clave = sincronizacion_asistencia.clave_dispositivo(
+                    aparato['serial'], aparato['ip_address'], aparato['puerto'])
+                resultado = sincronizacion_asistencia.sincronizar_dispositivo(dispositivo, clave, aparato['id'])
+                if resultado is not None:
+                    estado.registros_nuevos = resultado['nuevos']
+
+                estado.hora_dispositivo = dispositivo.get_device_time()
+
+                estado.fallos = 0
+                estado.ultimo_error = None
+                estado.ultimo_contacto = datetime.now()
+                estado.proximo_intento = 0.0
+
+            except Exception as e:
+                estado.fallos += 1
+                estado.ultimo_error = str(e)
+                espera = min(BACKOFF_INICIAL * 2 ** (estado.fallos - 1), BACKOFF_MAXIMO)
+                estado.proximo_intento = time.monotonic() + espera
+                self._desconectar(estado)
+                logger.warning("[WARN] Aparato %s (%s): %s. Reintento en %s s",
+                               aparato['nombre'], aparato['ip_address'], e, espera)
+
+            return estado.resumen()
+
+    def sondear(self, forzar=False):
+        """
+        Sondear en paralelo todos los aparatos pendientes
+
+        Args:
+            forzar (bool): Incluir también los aparatos en espera por fallos
+
+        Returns:
+            list: Resumen de cada aparato sondeado
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            pendientes = [e for e in self._estados.values() if forzar or e.proximo_intento <= ahora]
+
+        futuros = [self._executor.submit(self._sondear, estado) for estado in pendientes]
+        return [futuro.result() for futuro in as_completed(futuros)]
+
+    def estado_consolidado(self):
+        """
+        Estado de toda la flota
+
+        Returns:
+            dict: {'aparatos': [resumen...], 'total', 'conectados', 'con_fallos'}
+        """
+        with self._lock:
+            resumenes = [estado.resumen() for estado in self._estados.values()]
+        return {
+            'aparatos': resumenes,
+            'total': len(resumenes),
+            'conectados': sum(1 for r in resumenes if r['conectado']),
+            'con_fallos': sum(1 for r in resumenes if r['fallos_consecutivos']),
+        }
+
+    # ------------------------------------------------------------------
+    # Sondeo periódico
+    # ------------------------------------------------------------------
+
+    def iniciar(self):
+        """Iniciar (una sola vez) el sondeo periódico en segundo plano"""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name='flota-zkteco', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        """Detener el sondeo periódico y cerrar las conexiones"""
+        self._detener.set()
+        with self._lock:
+            estados = list(self._estados.values())
+        for estado in estados:
+            with estado.lock:
+                self._desconectar(estado)
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.actualizar_aparatos()
+                self.sondear()
+            except Exception as e:
+                logger.error("Error en el sondeo de la flota: %s", e)
+            self._detener.wait(self.intervalo)
+
+
+# Instancia compartida por todo el proceso
+gestor_flota = GestorFlota()
+
+
+if __name__ == "__main__":
+    # Prueba básica: una ronda de sondeo
+    gestor_flota.actualizar_aparatos()
+    for resumen in gestor_flota.sondear(forzar=True):
+        estado = "[OK]" if resumen['conectado'] else "[ERROR]"
+        print(f"{estado} {resumen['nombre']} ({resumen['ip_address']}:{resumen['puerto']}) - "
+              f"usuarios: {resumen['usuarios']}, registros nuevos: {resumen['registros_nuevos']}")
+    gestor_flota.detener()
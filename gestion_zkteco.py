@@ -10,8 +10,13 @@ from datetime import datetime, timedelta
 import csv
 import os
 import logging
-from zkteco_connector_v2 import ZKTecoK40V2
-from database import connect_db
+from sesiones_zkteco import obtener_sesion
+from flota_zkteco import gestor_flota
+from espejo_usuarios_zkteco import espejo_de
+from tabla_virtual import TablaVirtual, VistaFilas
+from registro_eventos import (buffer_registros, establecer_nivel, formatear,
+                              CAPACIDAD_BUFFER, MODULOS_DISPOSITIVO)
+from database import connect_db, invalidar_cache_aparatos
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -73,6 +78,9 @@ class GestionZKTeco(tk.Toplevel):
         # Pestaña 5: Logs del Sistema
         self.create_logs_tab()
         
+        # Pestaña 6: Estado de todos los aparatos (gestor de flota)
+        self.create_fleet_tab()
+        
     def create_header(self, parent):
         """Crear header con título y estado de conexión"""
         header_frame = ttk.Frame(parent)
@@ -334,6 +342,24 @@ class GestionZKTeco(tk.Toplevel):
         logs_container = ttk.LabelFrame(main_frame, text="Logs del Sistema", padding=15)
         logs_container.pack(fill='both', expand=True)
         
+        # Filtros: nivel mínimo mostrado y depuración de los módulos de dispositivos
+        logs_filters_frame = ttk.Frame(logs_container)
+        logs_filters_frame.pack(fill='x', pady=(0, 10))
+        
+        ttk.Label(logs_filters_frame, text="Nivel mínimo:").pack(side='left', padx=(0, 5))
+        self.log_level_var = tk.StringVar(value="INFO")
+        log_level_combo = ttk.Combobox(logs_filters_frame, textvariable=self.log_level_var,
+                                       values=["DEBUG", "INFO", "WARNING", "ERROR"],
+                                       state="readonly", width=10)
+        log_level_combo.pack(side='left', padx=(0, 20))
+        log_level_combo.bind('<<ComboboxSelected>>', lambda e: self.reload_logs_view())
+        
+        self.device_debug_var = tk.BooleanVar(
+            value=logging.getLogger(MODULOS_DISPOSITIVO[0]).level == logging.DEBUG)
+        ttk.Checkbutton(logs_filters_frame, text="Depuración de dispositivos y asistencia",
+                        variable=self.device_debug_var,
+                        command=self.toggle_device_debug).pack(side='left')
+        
         # Text widget para logs con scrollbar
         logs_text_frame = ttk.Frame(logs_container)
         logs_text_frame.pack(fill='both', expand=True)
@@ -353,15 +379,152 @@ class GestionZKTeco(tk.Toplevel):
         logs_buttons_frame.pack(fill='x', pady=(10, 0))
         
         clear_logs_btn = ttk.Button(logs_buttons_frame, text="[DELETE] Limpiar Logs", 
-                                   command=lambda: self.log_text.delete(1.0, tk.END))
+                                   command=self.clear_logs_view)
         clear_logs_btn.pack(side='left', padx=(0, 10))
         
         export_logs_btn = ttk.Button(logs_buttons_frame, text="📤 Exportar Logs", 
                                      command=self.export_logs)
         export_logs_btn.pack(side='left')
         
-        # Configurar log inicial
+        # Mostrar los registros ya conservados en memoria y seguir los nuevos
+        self.log_sequence = 0
         self.log("Sistema de gestión QUIRA iniciado")
+        self.poll_logs()
+        
+    def refresh_logs_view(self):
+        """Agregar al visor los registros nuevos del buffer en memoria"""
+        nivel = logging.getLevelName(self.log_level_var.get())
+        nuevos = buffer_registros.desde(self.log_sequence, nivel)
+        self.log_sequence = max(self.log_sequence, buffer_registros.ultima_secuencia)
+        if not nuevos:
+            return
+        
+        # Un solo insert por lote; el texto se formatea recién aquí
+        self.log_text.insert(tk.END, "".join(formatear(registro) + "\n" for _, registro in nuevos))
+        lineas = int(self.log_text.index('end-1c').split('.')[0])
+        if lineas > CAPACIDAD_BUFFER:
+            self.log_text.delete(1.0, f"{lineas - CAPACIDAD_BUFFER}.0")
+        self.log_text.see(tk.END)  # Auto-scroll al final
+        
+    def reload_logs_view(self):
+        """Volver a mostrar el buffer completo con el nivel seleccionado"""
+        self.log_text.delete(1.0, tk.END)
+        self.log_sequence = 0
+        self.refresh_logs_view()
+        
+    def clear_logs_view(self):
+        """Limpiar el visor (los registros siguen en el buffer)"""
+        self.log_text.delete(1.0, tk.END)
+        self.log_sequence = buffer_registros.ultima_secuencia
+        
+    def poll_logs(self):
+        """Consultar periódicamente el buffer (registros de otros hilos y módulos)"""
+        try:
+            if not self.winfo_exists():
+                return
+            self.refresh_logs_view()
+            self.after(500, self.poll_logs)
+        except tk.TclError:
+            pass  # La ventana se cerró
+        
+    def toggle_device_debug(self):
+        """Activar o desactivar DEBUG en los módulos de dispositivos y asistencia"""
+        if self.device_debug_var.get():
+            establecer_nivel(MODULOS_DISPOSITIVO, logging.DEBUG)
+            self.log_level_var.set("DEBUG")
+            self.reload_logs_view()
+            self.log("Depuración de dispositivos y asistencia activada")
+        else:
+            establecer_nivel(MODULOS_DISPOSITIVO, logging.NOTSET)
+            self.log("Depuración de dispositivos y asistencia desactivada")
+        
+    def create_fleet_tab(self):
+        """Crear pestaña con el estado consolidado de todos los aparatos activos"""
+        fleet_frame = ttk.Frame(self.notebook)
+        self.notebook.add(fleet_frame, text="[ZKT] Flota")
+        
+        # Frame principal con padding
+        main_frame = ttk.Frame(fleet_frame, padding=20)
+        main_frame.pack(expand=True, fill='both')
+        
+        # Resumen y botón de sondeo inmediato
+        summary_frame = ttk.Frame(main_frame)
+        summary_frame.pack(fill='x', pady=(0, 10))
+        
+        self.fleet_summary = ttk.Label(summary_frame, text="Cargando aparatos...", style='Status.TLabel')
+        self.fleet_summary.pack(side='left')
+        
+        self.fleet_poll_btn = ttk.Button(summary_frame, text="[REFRESH] Sondear ahora",
+                                         command=self.poll_fleet_now)
+        self.fleet_poll_btn.pack(side='right')
+        
+        # Tabla de aparatos
+        fleet_container = ttk.LabelFrame(main_frame, text="Aparatos Biométricos Activos", padding=15)
+        fleet_container.pack(fill='both', expand=True)
+        
+        columns = ('Aparato', 'Dirección', 'Estado', 'Usuarios', 'Registros nuevos',
+                   'Último contacto', 'Último error')
+        self.fleet_table = TablaVirtual(fleet_container, columns, height=10, horizontal=True)
+        for col, width in zip(columns, (150, 140, 150, 80, 110, 110, 250)):
+            self.fleet_table.tree.heading(col, text=col)
+            self.fleet_table.tree.column(col, width=width, minwidth=60)
+        self.fleet_table.pack(fill='both', expand=True)
+        
+        # El gestor sondea en segundo plano; la pestaña solo lee su estado en memoria
+        gestor_flota.iniciar()
+        self.refresh_fleet_view()
+        
+    def fleet_values(self, aparato):
+        """Valores de la tabla de flota para el resumen de un aparato"""
+        if aparato['conectado']:
+            estado = "[OK] Conectado"
+        elif aparato['fallos_consecutivos']:
+            estado = f"[ERROR] Reintento en {aparato['reintento_en']} s"
+        else:
+            estado = "Pendiente"
+        contacto = aparato['ultimo_contacto']
+        return (
+            aparato['nombre'],
+            f"{aparato['ip_address']}:{aparato['puerto']}",
+            estado,
+            aparato['usuarios'] if aparato['usuarios'] is not None else '-',
+            aparato['registros_nuevos'] if aparato['registros_nuevos'] is not None else '-',
+            contacto.strftime('%H:%M:%S') if contacto else '-',
+            aparato['ultimo_error'] or '',
+        )
+        
+    def refresh_fleet_view(self):
+        """Mostrar periódicamente el estado consolidado del gestor de flota"""
+        try:
+            if not self.winfo_exists():
+                return
+        except tk.TclError:
+            return  # La ventana se cerró
+        
+        estado = gestor_flota.estado_consolidado()
+        self.fleet_summary.config(
+            text=f"{estado['total']} aparato(s) - {estado['conectados']} conectado(s) - "
+                 f"{estado['con_fallos']} con fallos")
+        self.fleet_table.actualizar(VistaFilas(estado['aparatos'], self.fleet_values))
+        self.after(2000, self.refresh_fleet_view)
+        
+    def poll_fleet_now(self):
+        """Sondear todos los aparatos ya (incluidos los que esperan por fallos)"""
+        self.fleet_poll_btn.config(state='disabled')
+        self.log("Sondeando todos los aparatos...")
+        
+        def poll_thread():
+            try:
+                gestor_flota.actualizar_aparatos()
+                resumenes = gestor_flota.sondear(forzar=True)
+                conectados = sum(1 for r in resumenes if r['conectado'])
+                self.after(0, lambda: self.log(f"Sondeo de flota: {conectados} de {len(resumenes)} aparatos conectados"))
+            except Exception as e:
+                self.after(0, lambda e=e: self.log(f"Error en sondeo de flota: {e}"))
+            finally:
+                self.after(0, lambda: self.fleet_poll_btn.config(state='normal'))
+        
+        threading.Thread(target=poll_thread, daemon=True).start()
         
     def update_status_info(self, message):
         """Actualizar información de estado"""
@@ -470,6 +633,7 @@ class GestionZKTeco(tk.Toplevel):
                 conn.commit()
                 cursor.close()
                 conn.close()
+                invalidar_cache_aparatos()
                 
                 # Actualizar interfaz
                 self.load_test_mode_status()
@@ -561,19 +725,16 @@ class GestionZKTeco(tk.Toplevel):
         self.geometry(f'{width}x{height}+{x}+{y}')
         
     def log(self, message):
-        """Agregar mensaje al log"""
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)  # También imprimir en consola
+        """Agregar mensaje al log (registro central: consola y buffer en memoria)"""
+        logger.info("%s", message)
         
-        # Agregar al widget de texto si existe
-        if hasattr(self, 'log_text'):
+        # Mostrarlo ya en el visor si existe (desde otros hilos lo muestra el sondeo)
+        if hasattr(self, 'log_text') and threading.current_thread() is threading.main_thread():
             try:
-                self.log_text.insert(tk.END, log_message + "\n")
-                self.log_text.see(tk.END)  # Auto-scroll al final
+                self.refresh_logs_view()
                 self.update_idletasks()
-            except:
-                pass  # Si hay error, solo imprimir en consola
+            except tk.TclError:
+                pass  # Si hay error, queda en consola y en el buffer
         
     def connect_device(self):
         """Conectar al dispositivo"""
@@ -596,7 +757,7 @@ class GestionZKTeco(tk.Toplevel):
         
         def connect_thread():
             try:
-                self.zkteco_device = ZKTecoK40V2(ip, port)
+                self.zkteco_device = obtener_sesion(ip, port)
                 
                 if self.zkteco_device.connect():
                     self.connected = True
@@ -657,16 +818,17 @@ class GestionZKTeco(tk.Toplevel):
             self.device_info['mac'].set(device_info.get('mac_address', 'No disponible'))
             self.device_info['algorithm'].set(device_info.get('algorithm', 'No disponible'))
             
-            # Obtener información adicional
+            # Obtener información adicional (contadores, sin descargar las tablas)
             try:
-                users = self.zkteco_device.get_user_list()
-                self.device_info['users_count'].set(str(len(users) if users else 0))
+                espejo = espejo_de(self.zkteco_device)
+                espejo.sincronizar(self.zkteco_device)
+                self.device_info['users_count'].set(str(espejo.cantidad() or 0))
             except:
                 self.device_info['users_count'].set("Error")
             
             try:
-                logs = self.zkteco_device.get_attendance_logs()
-                self.device_info['logs_count'].set(str(len(logs) if logs else 0))
+                logs_count = self.zkteco_device.get_attendance_count()
+                self.device_info['logs_count'].set(str(logs_count) if logs_count is not None else "Error")
             except:
                 self.device_info['logs_count'].set("Error")
             
@@ -729,9 +891,10 @@ class GestionZKTeco(tk.Toplevel):
         ttk.Button(button_frame, text="[DELETE] Eliminar", 
                   command=lambda: delete_user()).pack(side=tk.LEFT, padx=(0, 5))
         
-        # Treeview para usuarios
+        # Tabla virtual para usuarios (solo se materializan las filas visibles)
         columns = ('uid', 'name', 'privilege', 'user_id', 'group_id')
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=15)
+        tabla = TablaVirtual(main_frame, columns, height=15)
+        tree = tabla.tree
         
         # Configurar columnas
         tree.heading('uid', text='UID')
@@ -746,13 +909,8 @@ class GestionZKTeco(tk.Toplevel):
         tree.column('user_id', width=120)
         tree.column('group_id', width=100)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack treeview y scrollbar
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Pack tabla (incluye scrollbar)
+        tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Frame de información
         info_frame = ttk.LabelFrame(main_frame, text="Información", padding="10")
@@ -761,37 +919,34 @@ class GestionZKTeco(tk.Toplevel):
         info_label = ttk.Label(info_frame, text="Seleccione un usuario para ver detalles")
         info_label.pack()
         
+        def user_values(user):
+            """Valores de la tabla para un usuario del dispositivo"""
+            privilege = user.get('privilege', 0)
+            # Convertir privilegio a texto
+            privilege_text = {
+                0: 'Usuario',
+                1: 'Administrador',
+                2: 'Supervisor'
+            }.get(privilege, f'Privilegio {privilege}')
+            return (user.get('uid', ''), user.get('name', 'N/A'), privilege_text,
+                    user.get('user_id', ''), user.get('group_id', ''))
+        
         def load_users():
             """Cargar usuarios del dispositivo"""
             try:
                 self.log("Cargando usuarios del dispositivo...")
-                users = self.zkteco_device.get_user_list()
-                
-                # Limpiar treeview
-                for item in tree.get_children():
-                    tree.delete(item)
+                # "Actualizar" siempre relee el dispositivo y refresca el espejo local
+                espejo = espejo_de(self.zkteco_device)
+                espejo.sincronizar(self.zkteco_device, forzar=True)
+                users = espejo.usuarios()
                 
                 users_data.clear()
+                users_data.extend(users or [])
+                
+                # Las filas se formatean al mostrarse (solo las visibles)
+                tabla.mostrar(VistaFilas(users_data, user_values))
                 
                 if users:
-                    for user in users:
-                        uid = user.get('uid', '')
-                        name = user.get('name', 'N/A')
-                        privilege = user.get('privilege', 0)
-                        user_id = user.get('user_id', '')
-                        group_id = user.get('group_id', '')
-                        
-                        # Convertir privilegio a texto
-                        privilege_text = {
-                            0: 'Usuario',
-                            1: 'Administrador',
-                            2: 'Supervisor'
-                        }.get(privilege, f'Privilegio {privilege}')
-                        
-                        # Insertar en treeview
-                        tree.insert('', tk.END, values=(uid, name, privilege_text, user_id, group_id))
-                        users_data.append(user)
-                    
                     self.log(f"[OK] {len(users)} usuarios cargados")
                     info_label.config(text=f"Total de usuarios: {len(users)}")
                 else:
@@ -898,14 +1053,13 @@ class GestionZKTeco(tk.Toplevel):
         
         def edit_user():
             """Editar usuario seleccionado"""
-            selection = tree.selection()
-            if not selection:
+            values = tabla.fila_seleccionada()
+            if not values:
                 messagebox.showwarning("Advertencia", "Seleccione un usuario para editar")
                 return
             
             # Obtener datos del usuario seleccionado
-            item = tree.item(selection[0])
-            uid = item['values'][0]
+            uid = values[0]
             
             # Buscar usuario en la lista
             user = next((u for u in users_data if str(u.get('uid', '')) == str(uid)), None)
@@ -1006,15 +1160,14 @@ class GestionZKTeco(tk.Toplevel):
         
         def delete_user():
             """Eliminar usuario seleccionado"""
-            selection = tree.selection()
-            if not selection:
+            values = tabla.fila_seleccionada()
+            if not values:
                 messagebox.showwarning("Advertencia", "Seleccione un usuario para eliminar")
                 return
             
             # Obtener datos del usuario seleccionado
-            item = tree.item(selection[0])
-            uid = item['values'][0]
-            name = item['values'][1]
+            uid = values[0]
+            name = values[1]
             
             # Confirmar eliminación
             respuesta = messagebox.askyesno(
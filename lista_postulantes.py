@@ -7,7 +7,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 import math
-from database import get_postulantes, eliminar_postulante, connect_db
+from database import eliminar_postulante, connect_db
 from editar_postulante import EditarPostulante
 from PIL import Image, ImageTk
 import os
@@ -31,6 +31,12 @@ class ListaPostulantes(tk.Toplevel):
         self.total_items = 0
         self.total_pages = 0
         
+        # Estado de paginación por clave (fecha_registro, id)
+        self.filtros_activos = {}
+        self.primera_clave = None
+        self.ultima_clave = None
+        self.ancla_pagina = ('primera', None)
+        
         # Variables de filtro
         self.filter_nombre = tk.StringVar()
         self.filter_apellido = tk.StringVar()
@@ -382,18 +388,14 @@ class ListaPostulantes(tk.Toplevel):
         try:
             print("DEBUG: Iniciando carga optimizada de postulantes...")
             
-            # Obtener solo el total de postulantes (sin cargar todos los datos)
-            from database import get_total_postulantes
-            self.total_items = get_total_postulantes()
-            
-            print(f"DEBUG: Total de postulantes: {self.total_items}")
-            
             # Cargar opciones de filtro
             self.load_filter_options()
             
-            # Cargar solo la primera página
+            # Cargar solo la primera página junto con el total (filtrado en el servidor)
             self.current_page = 1
-            self.display_current_page()
+            self.cargar_pagina('primera', incluir_total=True)
+            
+            print(f"DEBUG: Total de postulantes: {self.total_items}")
             
             # Actualizar paginación
             print("DEBUG: Actualizando paginación...")
@@ -448,65 +450,42 @@ class ListaPostulantes(tk.Toplevel):
             print(f"Error al cargar opciones de filtro: {e}")
             self.aparato_id_to_name = {}
         
+    def get_filtros(self):
+        """Construir el diccionario de filtros para la consulta en el servidor"""
+        filtros = {
+            'nombre': self.filter_nombre.get().strip(),
+            'apellido': self.filter_apellido.get().strip(),
+            'cedula': self.filter_cedula.get().strip(),
+            'unidad': self.filter_unidad.get(),
+            'dedo': self.filter_dedo.get(),
+        }
+        
+        # Fechas en formato DD/MM/AAAA (las inválidas se ignoran)
+        for clave, variable in (('fecha_desde', self.filter_fecha_desde), ('fecha_hasta', self.filter_fecha_hasta)):
+            if variable.get():
+                try:
+                    filtros[clave] = datetime.strptime(variable.get().strip(), '%d/%m/%Y').date()
+                except ValueError:
+                    pass
+        
+        # Filtro por aparato: usar el ID (indexado) si se conoce
+        aparato = self.filter_aparato.get()
+        if aparato:
+            aparato_ids = [aid for aid, nombre in getattr(self, 'aparato_id_to_name', {}).items() if nombre == aparato]
+            if aparato_ids:
+                filtros['aparato_id'] = aparato_ids[0]
+            else:
+                filtros['aparato'] = aparato
+        
+        return {clave: valor for clave, valor in filtros.items() if valor}
+        
     def apply_filters(self):
-        """Aplicar filtros a los postulantes"""
+        """Aplicar filtros a los postulantes (en el servidor)"""
         try:
-            # Filtrar postulantes
-            filtered = []
-            
-            for postulante in self.all_postulantes:
-                # Filtro por nombre
-                if self.filter_nombre.get() and self.filter_nombre.get().lower() not in postulante[1].lower():
-                    continue
-                    
-                # Filtro por apellido
-                if self.filter_apellido.get() and self.filter_apellido.get().lower() not in postulante[2].lower():
-                    continue
-                    
-                # Filtro por cédula
-                if self.filter_cedula.get() and self.filter_cedula.get() not in str(postulante[3]):
-                    continue
-                    
-                # Filtro por fecha desde
-                if self.filter_fecha_desde.get():
-                    try:
-                        fecha_desde = datetime.strptime(self.filter_fecha_desde.get(), '%d/%m/%Y')
-                        if postulante[6] and postulante[6].date() < fecha_desde.date():
-                            continue
-                    except ValueError:
-                        pass
-                        
-                # Filtro por fecha hasta
-                if self.filter_fecha_hasta.get():
-                    try:
-                        fecha_hasta = datetime.strptime(self.filter_fecha_hasta.get(), '%d/%m/%Y')
-                        if postulante[6] and postulante[6].date() > fecha_hasta.date():
-                            continue
-                    except ValueError:
-                        pass
-                        
-                # Filtro por unidad
-                if self.filter_unidad.get() and self.filter_unidad.get() != postulante[12]:
-                    continue
-                    
-                # Filtro por dedo
-                if self.filter_dedo.get() and self.filter_dedo.get() != postulante[13]:
-                    continue
-                    
-                # Filtro por aparato (optimizado)
-                if self.filter_aparato.get():
-                    aparato_id = postulante[15]  # aparato_id está en la posición 15
-                    aparato_nombre = self.aparato_id_to_name.get(aparato_id)
-                    
-                    if not aparato_nombre or aparato_nombre != self.filter_aparato.get():
-                        continue
-                
-                filtered.append(postulante)
-            
-            self.filtered_postulantes = filtered
+            self.filtros_activos = self.get_filtros()
             self.current_page = 1
+            self.cargar_pagina('primera', incluir_total=True)
             self.update_pagination()
-            self.display_current_page()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al aplicar filtros: {e}")
@@ -522,10 +501,10 @@ class ListaPostulantes(tk.Toplevel):
         self.filter_dedo.set("")
         self.filter_aparato.set("")
         
-        self.filtered_postulantes = self.all_postulantes.copy()
+        self.filtros_activos = {}
         self.current_page = 1
+        self.cargar_pagina('primera', incluir_total=True)
         self.update_pagination()
-        self.display_current_page()
         
     def update_pagination(self):
         """Actualizar información de paginación optimizada"""
@@ -588,39 +567,65 @@ class ListaPostulantes(tk.Toplevel):
         except Exception as e:
             print(f"ERROR en force_update_pagination: {e}")
         
+    def cargar_pagina(self, direccion, posicion=None, incluir_total=False):
+        """
+        Obtener y mostrar una página usando paginación por clave
+        
+        Args:
+            direccion (str): 'primera', 'siguiente', 'anterior' o 'ultima'
+            posicion (tuple): Clave (fecha_registro, id) de corte
+            incluir_total (bool): Si se debe recalcular el total filtrado
+        """
+        from database import get_postulantes_pagina
+        
+        limit = self.items_per_page
+        if direccion == 'ultima':
+            # La última página contiene el resto, para mantener alineadas las páginas
+            limit = self.total_items - (self.total_pages - 1) * self.items_per_page
+            if limit <= 0:
+                limit = self.items_per_page
+        
+        resultado = get_postulantes_pagina(
+            filtros=self.filtros_activos,
+            limit=limit,
+            posicion=posicion,
+            direccion=direccion,
+            incluir_total=incluir_total
+        )
+        
+        if resultado['total'] is not None:
+            self.total_items = resultado['total']
+        
+        self.ancla_pagina = (direccion, posicion)
+        self.mostrar_filas(resultado['postulantes'])
+        
     def display_current_page(self):
-        """Mostrar la página actual de postulantes con optimización"""
+        """Volver a mostrar la página actual (misma clave de corte)"""
+        direccion, posicion = self.ancla_pagina
+        self.cargar_pagina(direccion, posicion)
+        
+    def mostrar_filas(self, page_postulantes):
+        """Mostrar en la tabla las filas de una página"""
         try:
             # Limpiar tabla
             for item in self.tree.get_children():
                 self.tree.delete(item)
             
-            # Calcular índices de la página actual
-            start_idx = (self.current_page - 1) * self.items_per_page
-            
-            # Obtener solo los postulantes de la página actual
-            from database import get_postulantes
-            page_postulantes = get_postulantes(limit=self.items_per_page, offset=start_idx)
+            # Guardar claves de los extremos para navegar a páginas vecinas
+            if page_postulantes:
+                self.primera_clave = (page_postulantes[0][6], page_postulantes[0][0])
+                self.ultima_clave = (page_postulantes[-1][6], page_postulantes[-1][0])
+            else:
+                self.primera_clave = None
+                self.ultima_clave = None
             
             # Mostrar postulantes de la página actual
             for postulante in page_postulantes:
                 # Formatear fecha
                 fecha_registro = postulante[6].strftime('%d/%m/%Y %H:%M') if postulante[6] else 'N/A'
                 
-                # Obtener nombre del aparato
-                aparato_nombre = 'N/A'
-                if postulante[15]:  # aparato_id
-                    try:
-                        conn = connect_db()
-                        if conn:
-                            cursor = conn.cursor()
-                            cursor.execute("SELECT nombre FROM aparatos_biometricos WHERE id = %s", (postulante[15],))
-                            aparato_result = cursor.fetchone()
-                            if aparato_result:
-                                aparato_nombre = aparato_result[0]
-                            conn.close()
-                    except:
-                        pass
+                # Nombre del aparato (ya viene en la consulta vía JOIN)
+                aparato_nombre = postulante[19] or 'N/A'
                 
                 self.tree.insert('', 'end', values=(
                     postulante[0],  # ID
@@ -644,7 +649,7 @@ class ListaPostulantes(tk.Toplevel):
             self.items_per_page = int(self.items_per_page_var.get())
             self.current_page = 1
             self.update_pagination()
-            self.display_current_page()
+            self.cargar_pagina('primera')
         except ValueError:
             pass
             
@@ -653,28 +658,31 @@ class ListaPostulantes(tk.Toplevel):
         if self.current_page > 1:
             self.current_page = 1
             self.update_pagination()
-            self.display_current_page()
+            self.cargar_pagina('primera')
             
     def go_to_previous_page(self):
         """Ir a la página anterior"""
         if self.current_page > 1:
             self.current_page -= 1
             self.update_pagination()
-            self.display_current_page()
+            if self.current_page == 1:
+                self.cargar_pagina('primera')
+            else:
+                self.cargar_pagina('anterior', self.primera_clave)
             
     def go_to_next_page(self):
         """Ir a la página siguiente"""
         if self.current_page < self.total_pages:
             self.current_page += 1
             self.update_pagination()
-            self.display_current_page()
+            self.cargar_pagina('siguiente', self.ultima_clave)
             
     def go_to_last_page(self):
         """Ir a la última página"""
         if self.current_page < self.total_pages:
             self.current_page = self.total_pages
             self.update_pagination()
-            self.display_current_page()
+            self.cargar_pagina('ultima')
             
     def get_current_time(self):
         """Obtener hora actual formateada"""
@@ -1276,21 +1284,7 @@ class ListaPostulantes(tk.Toplevel):
     def refresh_current_page(self):
         """Recargar solo la página actual sin cargar todos los datos"""
         try:
-            # Calcular el rango de la página actual
-            start_idx = (self.current_page - 1) * self.items_per_page
-            end_idx = start_idx + self.items_per_page
-            
-            # Obtener solo los datos de la página actual
-            from database import get_postulantes
-            page_data = get_postulantes(limit=self.items_per_page, offset=start_idx)
-            
-            # Limpiar tabla
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Cargar solo los datos de la página actual
-            for postulante in page_data:
-                self.tree.insert('', 'end', values=postulante)
+            self.display_current_page()
             
             # Actualizar información de paginación
             self.update_pagination()
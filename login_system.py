@@ -22,6 +22,8 @@ class LoginWindow(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
+        self.inicio_bloqueado = False  # Base de datos aún verificándose al arrancar
+        self.login_pendiente = False
         self.setup_ui()
         
     def setup_ui(self):
@@ -158,6 +160,12 @@ class LoginWindow(tk.Frame):
                                   cursor='hand2')
         self.login_btn.pack()
         
+        # Estado del arranque (verificación de base de datos en segundo plano)
+        self.estado_label = tk.Label(fields_frame, text="",
+                                    font=('Segoe UI', 9),
+                                    fg='#6c757d', bg='#f7f8f9')
+        self.estado_label.pack(pady=(10, 0))
+        
         # Configurar eventos
         self.password_entry.bind('<Return>', lambda e: self.login())
         self.username_entry.focus()
@@ -174,6 +182,11 @@ class LoginWindow(tk.Frame):
         # Deshabilitar botón durante el login
         self.login_btn.config(state='disabled', text="Conectando...")
         
+        if self.inicio_bloqueado:
+            # Se envía en cuanto termine la verificación de la base de datos
+            self.login_pendiente = True
+            return
+        
         # Procesar login en hilo separado
         def login_thread():
             try:
@@ -206,6 +219,19 @@ class LoginWindow(tk.Frame):
         
         threading.Thread(target=login_thread, daemon=True).start()
     
+    def bloquear_inicio(self, mensaje):
+        """Mostrar que el sistema aún se está iniciando (el usuario puede ir escribiendo)"""
+        self.inicio_bloqueado = True
+        self.estado_label.config(text=mensaje)
+    
+    def habilitar_inicio(self):
+        """Base de datos lista: enviar el login si el usuario ya lo pidió"""
+        self.inicio_bloqueado = False
+        self.estado_label.config(text="")
+        if self.login_pendiente:
+            self.login_pendiente = False
+            self.login()
+    
     def login_success(self, user_data):
         """Manejar login exitoso"""
         self.login_btn.config(state='normal', text="Iniciar Sesión")
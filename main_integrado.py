@@ -2,8 +2,16 @@
 """
 Sistema QUIRA
 Punto de entrada principal del sistema
+
+La ventana de login se muestra de inmediato; la verificación de la base de
+datos y la del dispositivo ZKTeco corren en paralelo en segundo plano.
 """
 
+import time
+
+# Referencia para medir el tiempo hasta la primera ventana
+INICIO_PROCESO = time.perf_counter()
+
 # Importar silent_wrapper optimizado para ZKTeco PRIMERO para evitar ventanas CMD
 try:
     import silent_wrapper_zkteco
@@ -20,6 +28,7 @@ from tkinter import messagebox
 import sys
 import os
 import ctypes
+import logging
 
 # Configurar DPI para Windows (HD/4K)
 try:
@@ -33,6 +42,14 @@ except:
 # Agregar el directorio actual al path para importaciones
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from tareas_segundo_plano import CargadorSegundoPlano
+
+logger = logging.getLogger(__name__)
+
+# Dispositivo ZKTeco verificado al iniciar
+ZKTECO_IP = "192.168.100.201"
+ZKTECO_PUERTO = 4370
+
 def check_dependencies():
     """Verificar que todas las dependencias estén instaladas"""
     try:
@@ -48,42 +65,48 @@ def check_dependencies():
         return False
 
 def check_database():
-    """Verificar conexión a la base de datos"""
+    """
+    Verificar conexión a la base de datos (en segundo plano, sin tocar widgets)
+    
+    Si schema_version no tiene migraciones pendientes se omite init_database.
+    
+    Returns:
+        tuple: (ok, mensaje de error o None)
+    """
     try:
-        from database import connect_db, init_database
-        
-        # Intentar conectar
-        conn = connect_db()
-        if not conn:
-            messagebox.showerror("Error de Base de Datos", 
-                               "No se pudo conectar a PostgreSQL.\n\n"
-                               "Verifique que:\n"
-                               "1. PostgreSQL esté instalado y ejecutándose\n"
-                               "2. Exista la base de datos 'sistema_postulantes'\n"
-                               "3. Las credenciales sean correctas")
-            return False
+        from database import esquema_al_dia, init_database
+        
+        inicio = time.perf_counter()
+        al_dia = esquema_al_dia()
+        if al_dia is None:
+            return False, ("No se pudo conectar a PostgreSQL.\n\n"
+                           "Verifique que:\n"
+                           "1. PostgreSQL esté instalado y ejecutándose\n"
+                           "2. Exista la base de datos 'sistema_postulantes'\n"
+                           "3. Las credenciales sean correctas")
+        
+        if al_dia:
+            logger.info("[OK] Esquema al día, se omite la inicialización (%.0f ms)",
+                        (time.perf_counter() - inicio) * 1000)
+            return True, None
         
         # Inicializar base de datos
         if not init_database():
-            messagebox.showerror("Error de Base de Datos", 
-                               "No se pudo inicializar la base de datos")
-            return False
+            return False, "No se pudo inicializar la base de datos"
         
-        conn.close()
-        return True
+        logger.info("[OK] Base de datos inicializada en %.0f ms", (time.perf_counter() - inicio) * 1000)
+        return True, None
         
     except Exception as e:
-        messagebox.showerror("Error de Base de Datos", 
-                           f"Error al verificar base de datos: {e}")
-        return False
+        return False, f"Error al verificar base de datos: {e}"
 
 def check_zkteco_connection():
-    """Verificar conexión al dispositivo ZKTeco"""
+    """Verificar conectividad con el dispositivo ZKTeco (en segundo plano)"""
     try:
-        from zkteco_connector_v2 import test_connection
+        from sondeo_red import puerto_abierto
         
-        # Intentar conectar al dispositivo
-        if test_connection("192.168.100.201", 4370):
+        # Sondeo TCP del puerto del dispositivo (fracción de segundo)
+        if puerto_abierto(ZKTECO_IP, ZKTECO_PUERTO):
             print("[OK] Conexión ZKTeco verificada")
             return True
         else:
@@ -95,6 +118,83 @@ def check_zkteco_connection():
         print(f"[WARN] Error al verificar ZKTeco: {e}")
         return False
 
+class OrquestadorArranque:
+    """Verificaciones de inicio en paralelo mientras la ventana de login ya está visible"""
+    
+    def __init__(self, root, login_window):
+        self.root = root
+        self.login_window = login_window
+        self.cargador = CargadorSegundoPlano(root, max_workers=2, nombre='arranque')
+        self.database_ok = None
+        self.zkteco_available = None
+        self.gestor_flota = None
+    
+    def iniciar(self):
+        """Lanzar las verificaciones (llamar antes de root.mainloop())"""
+        self.root.after(0, self.primera_ventana)
+        
+        # El login puede completarse mientras tanto; se envía al quedar lista la base de datos
+        self.login_window.bloquear_inicio("Verificando base de datos...")
+        
+        print("[DB] Verificando base de datos...")
+        self.cargador.enviar('database', check_database, self.base_datos_verificada,
+                             al_fallar=lambda e: self.base_datos_verificada((False, str(e))))
+        
+        print("[ZKT] Verificando dispositivo ZKTeco...")
+        self.cargador.enviar('zkteco', check_zkteco_connection, self.zkteco_verificado,
+                             al_fallar=lambda e: self.zkteco_verificado(False))
+    
+    def detener(self):
+        """Detener los servicios en segundo plano iniciados al arrancar (al salir)"""
+        if self.gestor_flota is not None:
+            self.gestor_flota.detener()
+    
+    def primera_ventana(self):
+        logger.info("[OK] Primera ventana visible en %.0f ms", (time.perf_counter() - INICIO_PROCESO) * 1000)
+    
+    def base_datos_verificada(self, resultado):
+        ok, mensaje = resultado
+        self.database_ok = ok
+        if not ok:
+            self.cargador.cerrar()
+            messagebox.showerror("Error de Base de Datos", mensaje)
+            self.root.destroy()
+            return
+        
+        # Cargar la lista de problemas judiciales antes del primer registro
+        from cache_problema_judicial import lista_problema_judicial
+        lista_problema_judicial.iniciar_en_segundo_plano()
+        
+        # Sondeo periódico de todos los aparatos activos (usuarios, asistencia y hora)
+        try:
+            from flota_zkteco import gestor_flota
+            gestor_flota.iniciar()
+            self.gestor_flota = gestor_flota
+        except ImportError as e:
+            logger.warning("[WARN] Gestor de flota ZKTeco no disponible: %s", e)
+        
+        self.login_window.habilitar_inicio()
+        self.verificar_fin()
+    
+    def zkteco_verificado(self, disponible):
+        self.zkteco_available = disponible
+        self.verificar_fin()
+    
+    def verificar_fin(self):
+        if self.database_ok is None or self.zkteco_available is None:
+            return
+        
+        self.cargador.cerrar()
+        
+        # Mostrar estado del sistema
+        if self.zkteco_available:
+            status_msg = "[OK] Sistema listo\n[OK] Base de datos conectada\n[OK] ZKTeco disponible"
+        else:
+            status_msg = "[OK] Sistema listo\n[OK] Base de datos conectada\n[WARN] ZKTeco no disponible"
+        
+        print(f"[STATUS] Estado: {status_msg}")
+        logger.info("[OK] Arranque completo en %.0f ms", (time.perf_counter() - INICIO_PROCESO) * 1000)
+
 def main():
     """Función principal del sistema"""
     print("[INIT] Iniciando Sistema QUIRA")
@@ -105,15 +205,6 @@ def main():
     if not check_dependencies():
         return
     
-    # Verificar base de datos
-    print("[DB] Verificando base de datos...")
-    if not check_database():
-        return
-    
-    # Verificar ZKTeco (opcional)
-    print("[ZKT] Verificando dispositivo ZKTeco...")
-    zkteco_available = check_zkteco_connection()
-    
     # Crear ventana principal
     root = tk.Tk()
     root.title("Sistema QUIRA")
@@ -126,12 +217,6 @@ def main():
     except ImportError:
         print("[WARN] No se pudo importar icon_utils")
     
-    # Mostrar estado del sistema
-    if zkteco_available:
-        status_msg = "[OK] Sistema listo\n[OK] Base de datos conectada\n[OK] ZKTeco disponible"
-    else:
-        status_msg = "[OK] Sistema listo\n[OK] Base de datos conectada\n[WARN] ZKTeco no disponible"
-    
     # Crear ventana de login
     try:
         from login_system import LoginWindow
@@ -149,11 +234,15 @@ def main():
         # Hacer la ventana no redimensionable para mantener el tamaño del contenido
         root.resizable(False, False)
         
+        # Base de datos y ZKTeco se verifican en paralelo con la ventana ya visible
+        arranque = OrquestadorArranque(root, login_window)
+        arranque.iniciar()
+        
         print("[OK] Sistema iniciado correctamente")
-        print(f"[STATUS] Estado: {status_msg}")
         
         # Iniciar loop principal
         root.mainloop()
+        arranque.detener()
         
     except Exception as e:
         messagebox.showerror("Error", f"Error al iniciar el sistema: {e}")
@@ -152,6 +152,7 @@ class MenuPrincipal(tk.Frame):
             sistema_menu.add_command(label="Gestión de Privilegios", command=self.gestion_privilegios)
             sistema_menu.add_separator()
             sistema_menu.add_command(label="Cargar Cédulas Problema Judicial", command=self.cargar_cedulas_problema_judicial)
+            sistema_menu.add_command(label="Cruzar Postulantes con Problemas Judiciales", command=self.cruce_problema_judicial)
         
         # Menú Ayuda
         ayuda_menu = tk.Menu(menubar, tearoff=0)
@@ -380,6 +381,11 @@ class MenuPrincipal(tk.Frame):
         from cargar_cedulas_problema_judicial import CargarCedulasProblemaJudicial
         CargarCedulasProblemaJudicial(self)
     
+    def cruce_problema_judicial(self):
+        """Abrir cruce de postulantes con la lista de problemas judiciales"""
+        from cruce_problema_judicial import CruceProblemaJudicial
+        CruceProblemaJudicial(self, self.user_data)
+    
     def control_asistencia(self):
         """Abrir control de asistencia"""
         from privilegios_utils import verificar_permiso_silencioso
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Registro de eventos centralizado para Sistema QUIRA
+
+Todos los módulos usan logging.getLogger(__name__); aquí se configura una
+sola vez la salida:
+
+- nivel general y niveles por módulo (variables de entorno QUIRA_LOG_NIVEL
+  y QUIRA_LOG_MODULOS, o establecer_nivel() en tiempo de ejecución);
+- consola con el formato de siempre;
+- un buffer circular en memoria con los últimos registros, que la pestaña
+  de logs de GestionZKTeco muestra sin leer archivos.
+
+Los mensajes se pasan con argumentos ("... %s", valor) y no con f-strings:
+si el nivel está deshabilitado logging descarta la llamada antes de
+formatear, y el buffer guarda el registro sin formatear hasta que se muestra.
+
+Ejemplo: QUIRA_LOG_MODULOS="zkteco_connector_v2=DEBUG,database=WARNING"
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+
+# Formato de la consola
+FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Formato del visor de GestionZKTeco
+FORMATO_VISOR = '[%(asctime)s] %(levelname)s %(name)s: %(message)s'
+
+# Registros conservados en memoria
+CAPACIDAD_BUFFER = 5000
+
+# Módulos de dispositivos y asistencia (interruptor de depuración del visor)
+MODULOS_DISPOSITIVO = (
+    'zkteco_connector_v2',
+    'sesiones_zkteco',
+    'espejo_usuarios_zkteco',
+    'sincronizacion_asistencia',
+    'control_asistencia',
+    'flota_zkteco',
+)
+
+
+class BufferRegistros(logging.Handler):
+    """Handler que conserva los últimos registros (sin formatear) en un deque"""
+
+    def __init__(self, capacidad=CAPACIDAD_BUFFER):
+        super().__init__()
+        self._registros = deque(maxlen=capacidad)
+        self._secuencia = 0
+
+    def emit(self, record):
+        # logging.Handler.handle ya tomó self.lock
+        self._secuencia += 1
+        self._registros.append((self._secuencia, record))
+
+    @property
+    def ultima_secuencia(self):
+        return self._secuencia
+
+    def desde(self, secuencia=0, nivel=logging.NOTSET):
+        """
+        Registros posteriores a una secuencia
+
+        Args:
+            secuencia (int): Última secuencia ya leída (0 = todos los conservados)
+            nivel (int): Nivel mínimo de los registros devueltos
+
+        Returns:
+            list: [(secuencia, LogRecord)] en orden cronológico
+        """
+        nuevos = []
+        with self.lock:
+            for numero, registro in reversed(self._registros):
+                if numero <= secuencia:
+                    break
+                if registro.levelno >= nivel:
+                    nuevos.append((numero, registro))
+        nuevos.reverse()
+        return nuevos
+
+    def limpiar(self):
+        """Descartar los registros conservados"""
+        with self.lock:
+            self._registros.clear()
+
+
+# Buffer compartido por todo el proceso
+buffer_registros = BufferRegistros()
+
+_formato_visor = logging.Formatter(FORMATO_VISOR, datefmt='%H:%M:%S')
+_configurado = False
+_lock = threading.Lock()
+
+
+def _nivel(valor):
+    """Nivel numérico a partir de un nombre ('DEBUG') o un número"""
+    if isinstance(valor, int):
+        return valor
+    nivel = logging.getLevelName(str(valor).strip().upper())
+    return nivel if isinstance(nivel, int) else logging.INFO
+
+
+def configurar_registro(nivel=None):
+    """
+    Configurar la salida del registro (solo la primera llamada tiene efecto)
+
+    Args:
+        nivel (str o int, optional): Nivel general; por defecto QUIRA_LOG_NIVEL o INFO
+    """
+    global _configurado
+
+    with _lock:
+        if _configurado:
+            return
+        raiz = logging.getLogger()
+        raiz.setLevel(_nivel(nivel or os.environ.get('QUIRA_LOG_NIVEL', 'INFO')))
+
+        if not raiz.handlers:
+            consola = logging.StreamHandler()
+            consola.setFormatter(logging.Formatter(FORMATO))
+            raiz.addHandler(consola)
+        raiz.addHandler(buffer_registros)
+
+        # QUIRA_LOG_MODULOS="modulo=NIVEL,otro=NIVEL"
+        for par in os.environ.get('QUIRA_LOG_MODULOS', '').split(','):
+            if '=' in par:
+                modulo, nivel_modulo = par.split('=', 1)
+                logging.getLogger(modulo.strip()).setLevel(_nivel(nivel_modulo))
+
+        _configurado = True
+
+
+def establecer_nivel(modulos, nivel):
+    """
+    Cambiar el nivel de uno o varios módulos en tiempo de ejecución
+
+    Args:
+        modulos (str o iterable): Nombres de logger (el __name__ de cada módulo)
+        nivel (str o int): Nivel; logging.NOTSET vuelve a heredar el nivel general
+    """
+    if isinstance(modulos, str):
+        modulos = (modulos,)
+    for modulo in modulos:
+        logging.getLogger(modulo).setLevel(_nivel(nivel))
+
+
+def formatear(registro):
+    """Texto de un registro con el formato del visor"""
+    return _formato_visor.format(registro)
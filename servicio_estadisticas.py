@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+"""
+Servicio de estadísticas para Sistema QUIRA
+
+Calcula en el servidor (GROUP BY, percentiles, min/max/promedio) las
+estadísticas que muestra la ventana Estadisticas, devolviendo solo las filas
+agregadas en lugar de transferir la tabla postulantes completa.
+
+Convención de retorno: None si no se pudo conectar a la base de datos,
+lista vacía si no hay datos.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
+
+from database import connect_db
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Edad efectiva: la columna edad o, si falta, la calculada con age() sobre fecha_nacimiento
+EXPRESION_EDAD = "COALESCE(NULLIF(edad, 0), DATE_PART('year', AGE(fecha_nacimiento))::int)"
+
+# Rangos estándar usados cuando hay pocos datos (o no se pueden calcular percentiles)
+RANGOS_EDAD_ESTANDAR = [
+    ("18-25 años", 18, 25),
+    ("26-35 años", 26, 35),
+    ("36-45 años", 36, 45),
+    ("46-55 años", 46, 55),
+    ("56+ años", 56, None),
+]
+
+# Percentiles que delimitan los rangos dinámicos de edad
+PERCENTILES_EDAD = [0, 20, 40, 60, 80, 100]
+
+# Nombres de los días según EXTRACT(DOW ...)
+DIAS_SEMANA = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+# Si existe la tabla estadisticas_resumen (None = aún no verificado)
+_resumen_disponible = None
+
+# Migración que agrega al resumen las dimensiones por día y edad que se leen aquí
+MIGRACION_RESUMEN = 12
+
+# Entradas máximas del cache de resultados y segundos entre verificaciones de la marca de agua
+CACHE_MAX_ENTRADAS = 64
+CACHE_INTERVALO_VERIFICACION = 2
+
+# Minutos de un día (histograma por minuto de los horarios de registro)
+MINUTOS_DIA = 24 * 60
+
+
+def _consultar(query, params=None):
+    """
+    Ejecutar una consulta de agregación y devolver todas las filas
+
+    Returns:
+        list: Filas resultantes, o None si no hay conexión
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def resumen_disponible():
+    """
+    Verificar (una vez por sesión) si existe el resumen materializado
+    estadisticas_resumen y ya tiene las dimensiones de la migración 12
+
+    Returns:
+        bool: True si las estadísticas pueden leerse del resumen
+    """
+    global _resumen_disponible
+
+    if _resumen_disponible is None:
+        filas = _consultar("""
+            SELECT to_regclass('estadisticas_resumen') IS NOT NULL
+               AND EXISTS (SELECT 1 FROM schema_version
+                           WHERE version = %s AND estado = 'aplicada')
+        """, (MIGRACION_RESUMEN,))
+        if filas is None:
+            return False
+        _resumen_disponible = bool(filas[0][0])
+        if not _resumen_disponible:
+            logger.warning("[WARN] Resumen de estadísticas no disponible, se consultará la tabla base")
+    return _resumen_disponible
+
+
+def leer_resumen(dimension):
+    """
+    Leer una dimensión del resumen materializado
+
+    Args:
+        dimension (str): sexo, dia_semana, anio, hora, dia, edad, nacimiento,
+            edad_sexo, unidad, dedo o usuario
+
+    Returns:
+        list: [(clave, cantidad, suma_edad, cantidad_edad)] con cantidad > 0,
+              por cantidad descendente
+    """
+    return _consultar("""
+        SELECT clave, cantidad, suma_edad, cantidad_edad
+        FROM estadisticas_resumen
+        WHERE dimension = %s AND cantidad > 0
+        ORDER BY cantidad DESC, clave
+    """, (dimension,))
+
+
+def _distribucion_resumen(dimension, convertir=None):
+    """
+    Distribución (clave, cantidad, porcentaje) leída del resumen
+
+    Args:
+        dimension (str): Dimensión del resumen
+        convertir (callable, optional): Conversión de la clave de texto
+    """
+    filas = leer_resumen(dimension)
+    if not filas:
+        return filas
+
+    total = sum(cantidad for _, cantidad, _, _ in filas)
+    convertir = convertir or (lambda clave: clave)
+    return [(convertir(clave), cantidad, round(cantidad * 100.0 / total, 2))
+            for clave, cantidad, _, _ in filas]
+
+
+def reconstruir_resumen():
+    """
+    Reconstruir el resumen materializado desde cero (tras cargas masivas,
+    TRUNCATE u otros cambios que no disparan triggers por fila)
+
+    Returns:
+        bool: True si se reconstruyó correctamente
+    """
+    conn = connect_db()
+    if not conn:
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT quira_estadisticas_reconstruir()")
+        conn.commit()
+        logger.info("[OK] Resumen de estadísticas reconstruido")
+        return True
+    except Exception as e:
+        logger.error("Error al reconstruir resumen de estadísticas: %s", e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def _distribucion(columna, etiqueta_vacia=None):
+    """
+    Conteo y porcentaje por valor de una columna de postulantes
+
+    Args:
+        columna (str): Columna (o expresión) a agrupar
+        etiqueta_vacia (str, optional): Si se indica, los NULL se agrupan con
+            esta etiqueta; si no, se excluyen los NULL y los vacíos
+
+    Returns:
+        list: [(valor, cantidad, porcentaje)] ordenado por cantidad descendente
+    """
+    if etiqueta_vacia is None:
+        valor = columna
+        where = f"WHERE {columna} IS NOT NULL AND {columna} != ''"
+    else:
+        valor = f"COALESCE({columna}, '{etiqueta_vacia}')"
+        where = ""
+
+    return _consultar(f"""
+        SELECT {valor} AS valor,
+               COUNT(*) AS cantidad,
+               ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) AS porcentaje
+        FROM postulantes
+        {where}
+        GROUP BY 1
+        ORDER BY cantidad DESC, valor
+    """)
+
+
+def distribucion_unidad():
+    """
+    Distribución de postulantes por unidad de inscripción
+
+    Returns:
+        list: [(unidad, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        return _distribucion_resumen('unidad')
+    return _distribucion("unidad")
+
+
+def distribucion_dedo():
+    """
+    Distribución de postulantes por dedo registrado
+
+    Returns:
+        list: [(dedo, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        return _distribucion_resumen('dedo')
+    return _distribucion("dedo_registrado")
+
+
+def distribucion_sexo():
+    """
+    Distribución de postulantes por sexo
+
+    Returns:
+        list: [(sexo, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        return _distribucion_resumen('sexo')
+    return _distribucion("sexo", etiqueta_vacia='No especificado')
+
+
+def distribucion_dia_semana():
+    """
+    Distribución de registros por día de la semana (domingo primero)
+
+    Returns:
+        list: [(dia, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        filas = _distribucion_resumen('dia_semana', int)
+        if filas:
+            filas.sort(key=lambda fila: fila[0])
+            filas = [(DIAS_SEMANA[dia], cantidad, porcentaje) for dia, cantidad, porcentaje in filas]
+        return filas
+
+    return _consultar("""
+        SELECT
+            CASE EXTRACT(DOW FROM fecha_registro)
+                WHEN 0 THEN 'Domingo'
+                WHEN 1 THEN 'Lunes'
+                WHEN 2 THEN 'Martes'
+                WHEN 3 THEN 'Miércoles'
+                WHEN 4 THEN 'Jueves'
+                WHEN 5 THEN 'Viernes'
+                WHEN 6 THEN 'Sábado'
+            END as dia_semana,
+            COUNT(*) as cantidad,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) as porcentaje
+        FROM postulantes
+        WHERE fecha_registro IS NOT NULL
+        GROUP BY EXTRACT(DOW FROM fecha_registro)
+        ORDER BY EXTRACT(DOW FROM fecha_registro)
+    """)
+
+
+def distribucion_anios():
+    """
+    Registros por año (más reciente primero)
+
+    Returns:
+        list: [(anio, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        filas = _distribucion_resumen('anio', int)
+        if filas:
+            filas.sort(key=lambda fila: fila[0], reverse=True)
+        return filas
+
+    return _consultar("""
+        SELECT
+            EXTRACT(YEAR FROM fecha_registro)::int as anio,
+            COUNT(*) as cantidad,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) as porcentaje
+        FROM postulantes
+        WHERE fecha_registro IS NOT NULL
+        GROUP BY 1
+        ORDER BY anio DESC
+    """)
+
+
+def distribucion_horas():
+    """
+    Registros por hora del día
+
+    Returns:
+        list: [(hora, cantidad, porcentaje)] ordenado por hora
+    """
+    if resumen_disponible():
+        filas = _distribucion_resumen('hora', int)
+        if filas:
+            filas.sort(key=lambda fila: fila[0])
+        return filas
+
+    return _consultar("""
+        SELECT
+            EXTRACT(HOUR FROM fecha_registro)::int as hora,
+            COUNT(*) as cantidad,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) as porcentaje
+        FROM postulantes
+        WHERE fecha_registro IS NOT NULL
+        GROUP BY 1
+        ORDER BY hora
+    """)
+
+
+def distribucion_edad_sexo():
+    """
+    Distribución por rango etario y sexo
+
+    Returns:
+        list: [(rango_edad, sexo, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        filas = _distribucion_resumen('edad_sexo')
+        if filas:
+            filas = sorted((clave.split('|', 1) + [cantidad, porcentaje])
+                           for clave, cantidad, porcentaje in filas)
+            filas = [tuple(fila) for fila in filas]
+        return filas
+
+    return _consultar("""
+        SELECT
+            CASE
+                WHEN edad < 25 THEN '18-24 años'
+                WHEN edad < 35 THEN '25-34 años'
+                WHEN edad < 45 THEN '35-44 años'
+                WHEN edad < 55 THEN '45-54 años'
+                ELSE '55+ años'
+            END as rango_edad,
+            COALESCE(sexo, 'No especificado') as sexo,
+            COUNT(*) as cantidad,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) as porcentaje
+        FROM postulantes
+        GROUP BY 1, 2
+        ORDER BY rango_edad, sexo
+    """)
+
+
+def edad_promedio_por_unidad():
+    """
+    Edad promedio y total de personas por unidad
+
+    Returns:
+        list: [(unidad, edad_promedio, total_personas)] por edad promedio descendente
+    """
+    if resumen_disponible():
+        filas = leer_resumen('unidad')
+        if not filas:
+            return filas
+        promedios = [(unidad, round(suma_edad / cantidad_edad, 1) if cantidad_edad else None, cantidad)
+                     for unidad, cantidad, suma_edad, cantidad_edad in filas]
+        promedios.sort(key=lambda fila: (fila[1] is None, -(fila[1] or 0)))
+        return promedios
+
+    return _consultar("""
+        SELECT
+            unidad,
+            ROUND(AVG(edad), 1) as edad_promedio,
+            COUNT(*) as total_personas
+        FROM postulantes
+        WHERE unidad IS NOT NULL AND unidad != ''
+        GROUP BY unidad
+        ORDER BY edad_promedio DESC NULLS LAST
+    """)
+
+
+def distribucion_usuario():
+    """
+    Registros por usuario registrador
+
+    Returns:
+        list: [(registrado_por, cantidad, porcentaje)]
+    """
+    if resumen_disponible():
+        return _distribucion_resumen('usuario')
+    return _distribucion("registrado_por")
+
+
+def _edad_al(nacimiento, hoy):
+    """Años cumplidos a una fecha (igual que DATE_PART('year', AGE(...)))"""
+    return hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
+
+
+def histograma_edades(hoy=None):
+    """
+    Cantidad de postulantes por edad efectiva (edad o calculada con age())
+
+    Con el resumen, las edades guardadas se leen tal cual y las fechas de
+    nacimiento (de quienes no tienen edad) se convierten a edad al leer.
+
+    Args:
+        hoy (date, optional): Fecha de referencia (por defecto la actual)
+
+    Returns:
+        list: [(edad, cantidad)] ordenado por edad
+    """
+    if resumen_disponible():
+        filas = _consultar("""
+            SELECT dimension, clave, cantidad
+            FROM estadisticas_resumen
+            WHERE dimension IN ('edad', 'nacimiento') AND cantidad > 0
+        """)
+        if filas is None:
+            return None
+
+        hoy = hoy or date.today()
+        conteo = Counter()
+        for dimension, clave, cantidad in filas:
+            if dimension == 'edad':
+                conteo[int(clave)] += cantidad
+            else:
+                conteo[_edad_al(date.fromisoformat(clave), hoy)] += cantidad
+        return sorted(conteo.items())
+
+    return _consultar(f"""
+        SELECT edad_efectiva, COUNT(*)
+        FROM (
+            SELECT {EXPRESION_EDAD} AS edad_efectiva
+            FROM postulantes
+            WHERE edad IS NOT NULL OR fecha_nacimiento IS NOT NULL
+        ) t
+        WHERE edad_efectiva IS NOT NULL
+        GROUP BY edad_efectiva
+        ORDER BY edad_efectiva
+    """)
+
+
+def _percentil_histograma(histograma, total, percentil):
+    """
+    Percentil con interpolación lineal (igual que numpy.percentile y
+    percentile_cont) calculado sobre un histograma ordenado
+    """
+    posicion = (total - 1) * percentil / 100.0
+    inferior = int(posicion)
+    fraccion = posicion - inferior
+
+    valor_inferior = valor_superior = None
+    acumulado = 0
+    for edad, cantidad in histograma:
+        acumulado += cantidad
+        if valor_inferior is None and inferior < acumulado:
+            valor_inferior = edad
+        if inferior + 1 < acumulado or acumulado == total:
+            valor_superior = edad
+            if valor_inferior is not None:
+                break
+
+    return valor_inferior + (valor_superior - valor_inferior) * fraccion
+
+
+def _rangos_estandar(histograma):
+    rangos = {nombre: 0 for nombre, _, _ in RANGOS_EDAD_ESTANDAR}
+    for edad, cantidad in histograma:
+        for nombre, desde, hasta in RANGOS_EDAD_ESTANDAR:
+            if edad >= desde and (hasta is None or edad <= hasta):
+                rangos[nombre] += cantidad
+                break
+    return rangos
+
+
+def _rangos_percentiles(histograma, total):
+    limites = [_percentil_histograma(histograma, total, p) for p in PERCENTILES_EDAD]
+
+    tramos = []
+    for i in range(len(limites) - 1):
+        inicio = int(limites[i])
+        fin = int(limites[i + 1])
+        if inicio == fin:
+            fin += 1
+        ultimo = i == len(limites) - 2
+        nombre = f"{inicio}+ años" if ultimo else f"{inicio}-{fin} años"
+        tramos.append((nombre, inicio, None if ultimo else fin))
+
+    rangos = {nombre: 0 for nombre, _, _ in tramos}
+    for edad, cantidad in histograma:
+        for nombre, inicio, fin in tramos:
+            if edad >= inicio and (fin is None or edad <= fin):
+                rangos[nombre] += cantidad
+                break
+    return rangos
+
+
+def distribucion_edad(individual=False):
+    """
+    Distribución por edad, individual o por grupos etarios
+
+    Los grupos son rangos estándar si hay menos de 10 registros y, si no,
+    rangos dinámicos por quintiles. Solo viaja el histograma por edad.
+
+    Args:
+        individual (bool): Si se muestran edades individuales en lugar de rangos
+
+    Returns:
+        list: [(etiqueta, cantidad, porcentaje)]
+    """
+    histograma = histograma_edades()
+    if not histograma:
+        return histograma
+
+    total = sum(cantidad for _, cantidad in histograma)
+
+    if individual:
+        return [(f"{edad} años", cantidad, cantidad * 100.0 / total)
+                for edad, cantidad in histograma]
+
+    if total < 10:
+        rangos = _rangos_estandar(histograma)
+    else:
+        rangos = _rangos_percentiles(histograma, total)
+
+    total_rangos = sum(rangos.values())
+    filas = [(nombre, cantidad, cantidad * 100.0 / total_rangos)
+             for nombre, cantidad in rangos.items() if cantidad > 0]
+    filas.sort(key=lambda fila: fila[1], reverse=True)
+    return filas
+
+
+def resumen_general():
+    """
+    Edad promedio/mínima/máxima, primer y último registro y unidades distintas
+
+    Returns:
+        dict: Claves promedio_edad, edad_minima, edad_maxima, primer_registro,
+              ultimo_registro, total_unidades, total_registros; None sin conexión
+    """
+    if resumen_disponible():
+        return _resumen_general_resumen()
+
+    filas = _consultar(f"""
+        SELECT AVG({EXPRESION_EDAD}), MIN({EXPRESION_EDAD}), MAX({EXPRESION_EDAD}),
+               MIN(fecha_registro), MAX(fecha_registro),
+               COUNT(DISTINCT NULLIF(unidad, '')), COUNT(*)
+        FROM postulantes
+    """)
+    if filas is None:
+        return None
+
+    fila = filas[0]
+    return {
+        'promedio_edad': float(fila[0]) if fila[0] is not None else None,
+        'edad_minima': fila[1],
+        'edad_maxima': fila[2],
+        'primer_registro': fila[3],
+        'ultimo_registro': fila[4],
+        'total_unidades': fila[5],
+        'total_registros': fila[6],
+    }
+
+
+def _resumen_general_resumen():
+    """
+    resumen_general desde el resumen materializado: las edades salen del
+    histograma, las unidades y el total de sus dimensiones, y el primer y
+    último registro de los extremos del índice de fecha_registro (dos
+    lecturas de índice, sin recorrer la tabla; las horas no caben en el resumen)
+    """
+    histograma = histograma_edades()
+    filas = _consultar("""
+        SELECT (SELECT MIN(fecha_registro) FROM postulantes),
+               (SELECT MAX(fecha_registro) FROM postulantes),
+               COUNT(*) FILTER (WHERE dimension = 'unidad'),
+               COALESCE(SUM(cantidad) FILTER (WHERE dimension = 'sexo'), 0)
+        FROM estadisticas_resumen
+        WHERE dimension IN ('unidad', 'sexo') AND cantidad > 0
+    """)
+    if histograma is None or filas is None:
+        return None
+
+    primer, ultimo, unidades, total = filas[0]
+    con_edad = sum(cantidad for _, cantidad in histograma)
+    return {
+        'promedio_edad': (sum(edad * cantidad for edad, cantidad in histograma) / con_edad
+                          if con_edad else None),
+        'edad_minima': histograma[0][0] if histograma else None,
+        'edad_maxima': histograma[-1][0] if histograma else None,
+        'primer_registro': primer,
+        'ultimo_registro': ultimo,
+        'total_unidades': unidades,
+        'total_registros': total,
+    }
+
+
+def metricas_principales(hoy=None):
+    """
+    Totales de postulantes y usuarios, y registros de hoy/semana/mes
+
+    Args:
+        hoy (date, optional): Fecha de referencia (por defecto la actual)
+
+    Returns:
+        dict: Claves total_postulantes, total_usuarios, hoy, semana, mes; None sin conexión
+    """
+    hoy = hoy or datetime.now().date()
+    manana = hoy + timedelta(days=1)
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    inicio_mes = hoy.replace(day=1)
+
+    if resumen_disponible():
+        # Claves 'AAAA-MM-DD': el orden de texto coincide con el de las fechas
+        filas = _consultar("""
+            SELECT COALESCE(SUM(cantidad) FILTER (WHERE dimension = 'sexo'), 0),
+                   (SELECT COUNT(*) FROM usuarios),
+                   COALESCE(SUM(cantidad) FILTER (WHERE dimension = 'dia' AND clave >= %s AND clave < %s), 0),
+                   COALESCE(SUM(cantidad) FILTER (WHERE dimension = 'dia' AND clave >= %s), 0),
+                   COALESCE(SUM(cantidad) FILTER (WHERE dimension = 'dia' AND clave >= %s), 0)
+            FROM estadisticas_resumen
+            WHERE dimension IN ('sexo', 'dia')
+        """, (hoy.isoformat(), manana.isoformat(), inicio_semana.isoformat(), inicio_mes.isoformat()))
+    else:
+        filas = _consultar("""
+            SELECT COUNT(*),
+                   (SELECT COUNT(*) FROM usuarios),
+                   COUNT(*) FILTER (WHERE fecha_registro >= %s AND fecha_registro < %s),
+                   COUNT(*) FILTER (WHERE fecha_registro >= %s),
+                   COUNT(*) FILTER (WHERE fecha_registro >= %s)
+            FROM postulantes
+        """, (hoy, manana, inicio_semana, inicio_mes))
+    if filas is None:
+        return None
+
+    total, usuarios, de_hoy, semana, mes = filas[0]
+    return {
+        'total_postulantes': total,
+        'total_usuarios': usuarios,
+        'hoy': de_hoy,
+        'semana': semana,
+        'mes': mes,
+    }
+
+
+def acumulado_por_minuto(fecha):
+    """
+    Registros acumulados por minuto de un día (una sola consulta agrupada)
+
+    acumulado[m] es la cantidad de registros anteriores al minuto m del día
+    (0..1440), de modo que cualquier rango horario se responde en O(1) con
+    registros_en_rango_horario sin volver a consultar.
+
+    Args:
+        fecha (date): Día a consultar
+
+    Returns:
+        list: 1441 enteros, o None sin conexión
+    """
+    filas = _consultar("""
+        SELECT (EXTRACT(HOUR FROM fecha_registro) * 60
+                + EXTRACT(MINUTE FROM fecha_registro))::int AS minuto,
+               COUNT(*) AS cantidad
+        FROM postulantes
+        WHERE fecha_registro >= %s AND fecha_registro < %s
+        GROUP BY 1
+    """, (fecha, fecha + timedelta(days=1)))
+    if filas is None:
+        return None
+
+    por_minuto = [0] * MINUTOS_DIA
+    for minuto, cantidad in filas:
+        por_minuto[minuto] = cantidad
+
+    acumulado = [0] * (MINUTOS_DIA + 1)
+    for minuto, cantidad in enumerate(por_minuto):
+        acumulado[minuto + 1] = acumulado[minuto] + cantidad
+    return acumulado
+
+
+def registros_en_rango_horario(acumulado, inicio, fin):
+    """
+    Cantidad de registros entre dos horas (ambas inclusive, por minuto)
+
+    Args:
+        acumulado (list): Resultado de acumulado_por_minuto
+        inicio (time): Hora inicial
+        fin (time): Hora final
+
+    Returns:
+        int: Cantidad de registros (0 si el rango está invertido)
+    """
+    desde = inicio.hour * 60 + inicio.minute
+    hasta = fin.hour * 60 + fin.minute
+    if hasta < desde:
+        return 0
+    return acumulado[hasta + 1] - acumulado[desde]
+
+
+# ----------------------------------------------------------------------
+# Cache de resultados
+# ----------------------------------------------------------------------
+
+def marca_de_agua():
+    """
+    Marca de agua de los datos de estadísticas: cambia con cualquier alta,
+    edición o baja de postulantes (y altas/bajas de usuarios)
+
+    MAX() usa los índices de fecha_registro/fecha_ultima_edicion; el total sale
+    del resumen materializado si existe (suma de la dimensión sexo), para
+    detectar bajas sin recorrer la tabla.
+
+    Returns:
+        tuple: Marca de agua, o None sin conexión
+    """
+    if resumen_disponible():
+        total = "(SELECT COALESCE(SUM(cantidad), 0) FROM estadisticas_resumen WHERE dimension = 'sexo')"
+    else:
+        total = "(SELECT COUNT(*) FROM postulantes)"
+
+    filas = _consultar(f"""
+        SELECT (SELECT MAX(fecha_registro) FROM postulantes),
+               (SELECT MAX(fecha_ultima_edicion) FROM postulantes),
+               {total},
+               (SELECT COUNT(*) FROM usuarios)
+    """)
+    return None if filas is None else tuple(filas[0])
+
+
+class CacheEstadisticas:
+    """
+    Cache LRU de resultados de estadísticas, invalidado por marca de agua.
+
+    Las claves identifican la estadística y sus parámetros (página, fecha,
+    rango horario, edades individuales...). Mientras la marca de agua no
+    cambie, los resultados se sirven sin volver a consultar; cuando cambia,
+    el cache se vacía una sola vez y cada estadística se recalcula al pedirla.
+    """
+
+    def __init__(self, max_entradas=CACHE_MAX_ENTRADAS,
+                 intervalo_verificacion=CACHE_INTERVALO_VERIFICACION):
+        """
+        Inicializar cache
+
+        Args:
+            max_entradas (int): Entradas máximas (se descarta la menos usada)
+            intervalo_verificacion (float): Segundos durante los cuales se confía
+                en la última marca de agua leída sin volver a consultarla
+        """
+        self.max_entradas = max_entradas
+        self.intervalo_verificacion = intervalo_verificacion
+        self._entradas = OrderedDict()
+        self._marca = None
+        self._verificada_en = None
+        self._lock = threading.Lock()
+
+    def _verificar_marca(self):
+        """Vaciar el cache si los datos cambiaron desde la última verificación"""
+        ahora = time.monotonic()
+        with self._lock:
+            if (self._verificada_en is not None
+                    and ahora - self._verificada_en < self.intervalo_verificacion):
+                return
+
+        marca = marca_de_agua()
+        if marca is None:
+            return
+
+        with self._lock:
+            if marca != self._marca:
+                if self._marca is not None:
+                    logger.info("Datos de postulantes modificados, se invalida el cache de estadísticas")
+                self._entradas.clear()
+                self._marca = marca
+            self._verificada_en = time.monotonic()
+
+    def obtener(self, clave, calcular, *args, **kwargs):
+        """
+        Obtener un resultado del cache o calcularlo
+
+        Args:
+            clave (tuple): Tipo de estadística y sus parámetros
+            calcular (callable): Función que calcula el resultado (None = sin conexión)
+
+        Returns:
+            Resultado de calcular(*args, **kwargs); los None no se guardan
+        """
+        self._verificar_marca()
+
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                return self._entradas[clave]
+            marca = self._marca
+
+        resultado = calcular(*args, **kwargs)
+        if resultado is None:
+            return None
+
+        with self._lock:
+            # Si la marca cambió mientras se calculaba, el resultado puede ser viejo
+            if marca == self._marca:
+                self._entradas[clave] = resultado
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return resultado
+
+    def invalidar(self):
+        """Vaciar el cache y forzar la lectura de la marca de agua"""
+        with self._lock:
+            self._entradas.clear()
+            self._marca = None
+            self._verificada_en = None
+
+
+# Instancia compartida por las ventanas de estadísticas
+cache_estadisticas = CacheEstadisticas()
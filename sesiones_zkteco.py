@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Registro de sesiones ZKTeco compartidas por todo el proceso
+
+Cada ventana (AgregarPostulante, ControlAsistencia, GestionZKTeco...) y el
+gestor de flota obtienen un manejador con obtener_sesion(ip, puerto). Todos
+los manejadores de un mismo dispositivo comparten una única conexión:
+
+- los comandos se serializan con un lock (el K40 atiende un comando a la vez);
+- un hilo de keepalive verifica con is_alive las sesiones inactivas y las
+  reconecta si hay ventanas usándolas;
+- si un comando falla por conexión caída se reconecta y se reintenta una vez;
+- al cerrar una ventana la conexión queda abierta un tiempo, de modo que
+  abrir otra ventana no vuelve a pagar el ping + sondeo TCP + handshake.
+
+Los manejadores exponen la misma interfaz que ZKTecoK40V2.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from zkteco_connector_v2 import ZKTecoK40V2
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Segundos sin contacto tras los cuales se verifica la conexión antes de usarla
+VERIFICAR_TRAS = 20
+
+# Intervalo del keepalive y segundos que una sesión sin ventanas se mantiene abierta
+INTERVALO_KEEPALIVE = 30
+TTL_SIN_USO = 600
+
+# Comandos que no se reintentan tras reconectar (no son idempotentes o cortan la conexión)
+SIN_REINTENTO = {'restart', 'clear_attendance', 'clear_users'}
+
+
+class SesionZKTeco:
+    """Conexión compartida con un dispositivo"""
+
+    def __init__(self, ip_address, port=4370, timeout=10):
+        self.dispositivo = ZKTecoK40V2(ip_address, port, timeout)
+        self.lock = threading.RLock()
+        self.conectada = False
+        self.referencias = 0
+        self.ultimo_contacto = 0.0
+        self.ultimo_uso = time.monotonic()
+        self._info = None
+
+    @property
+    def clave(self):
+        return f"{self.dispositivo.ip_address}:{self.dispositivo.port}"
+
+    def reconectar(self):
+        """Cerrar (si hace falta) y abrir la conexión (con el lock tomado)"""
+        if self.conectada:
+            self.dispositivo.disconnect()
+        self._info = None
+        self.conectada = self.dispositivo.connect()
+        if self.conectada:
+            self.ultimo_contacto = time.monotonic()
+            logger.info("[OK] Sesión ZKTeco %s conectada", self.clave)
+        return self.conectada
+
+    def cerrar(self):
+        """Cerrar la conexión (con el lock tomado)"""
+        if self.conectada:
+            self.dispositivo.disconnect()
+            logger.info("Sesión ZKTeco %s cerrada", self.clave)
+        self.conectada = False
+        self._info = None
+
+    def asegurar_conexion(self):
+        """Reutilizar la conexión abierta, verificándola si estuvo inactiva"""
+        if self.conectada:
+            if time.monotonic() - self.ultimo_contacto < VERIFICAR_TRAS:
+                return True
+            if self.dispositivo.is_alive():
+                self.ultimo_contacto = time.monotonic()
+                return True
+            logger.warning("[WARN] Sesión ZKTeco %s caída, reconectando", self.clave)
+        return self.reconectar()
+
+    def ejecutar(self, metodo, *args, **kwargs):
+        """Ejecutar un método de ZKTecoK40V2 con la conexión compartida"""
+        with self.lock:
+            self.ultimo_uso = time.monotonic()
+            if not self.asegurar_conexion():
+                raise Exception("No hay conexión activa")
+
+            funcion = getattr(self.dispositivo, metodo)
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception as e:
+                if metodo in SIN_REINTENTO:
+                    raise
+                logger.warning("[WARN] %s falló en %s (%s), reconectando", metodo, self.clave, e)
+                if not self.reconectar():
+                    raise
+                resultado = funcion(*args, **kwargs)
+
+            self.ultimo_contacto = time.monotonic()
+            if metodo == 'restart' and resultado:
+                # El dispositivo corta la conexión al reiniciarse
+                self.conectada = False
+                self._info = None
+            return resultado
+
+    def info_dispositivo(self):
+        """get_device_info, cacheado mientras dure la conexión (serial, MAC, firmware...)"""
+        with self.lock:
+            if self._info is None or not self.conectada:
+                info = self.ejecutar('get_device_info')
+                if 'error' in info:
+                    return info
+                self._info = info
+            return dict(self._info)
+
+    def mantener(self):
+        """Paso de keepalive (desde el hilo de keepalive)"""
+        if not self.lock.acquire(blocking=False):
+            return  # Hay un comando en curso: la conexión está en uso
+        try:
+            if not self.conectada:
+                return
+            ahora = time.monotonic()
+            if self.referencias == 0 and ahora - self.ultimo_uso > TTL_SIN_USO:
+                self.cerrar()
+            elif ahora - self.ultimo_contacto >= INTERVALO_KEEPALIVE:
+                if self.dispositivo.is_alive():
+                    self.ultimo_contacto = ahora
+                elif self.referencias > 0:
+                    logger.warning("[WARN] Keepalive de %s falló, reconectando", self.clave)
+                    self.reconectar()
+                else:
+                    self.cerrar()
+        except Exception as e:
+            logger.warning("[WARN] Error en keepalive de %s: %s", self.clave, e)
+        finally:
+            self.lock.release()
+
+
+class ManejadorSesion:
+    """
+    Manejador de una ventana sobre una sesión compartida, con la interfaz de
+    ZKTecoK40V2. disconnect() libera el manejador sin cerrar la conexión.
+    """
+
+    def __init__(self, sesion):
+        self._sesion = sesion
+        self._activo = False
+
+    def connect(self):
+        """Conectar (o reutilizar la conexión abierta) y registrar el manejador"""
+        with self._sesion.lock:
+            conectado = self._sesion.asegurar_conexion()
+            if conectado and not self._activo:
+                self._sesion.referencias += 1
+                self._activo = True
+            return conectado
+
+    def disconnect(self):
+        """Liberar el manejador; la conexión sigue disponible para otras ventanas"""
+        with self._sesion.lock:
+            if self._activo:
+                self._sesion.referencias -= 1
+                self._activo = False
+                self._sesion.ultimo_uso = time.monotonic()
+
+    def reconnect(self):
+        """Forzar una reconexión de la sesión compartida"""
+        with self._sesion.lock:
+            if not self._sesion.reconectar():
+                return False
+        return self.connect()
+
+    def is_alive(self):
+        with self._sesion.lock:
+            if not self._sesion.conectada or not self._sesion.dispositivo.is_alive():
+                return False
+            self._sesion.ultimo_contacto = time.monotonic()
+            return True
+
+    def get_device_info(self):
+        return self._sesion.info_dispositivo()
+
+    @property
+    def conn(self):
+        """Conexión pyzk subyacente (solo mientras el manejador está activo)"""
+        return self._sesion.dispositivo.conn if self._activo and self._sesion.conectada else None
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._sesion.dispositivo, nombre)
+        if not callable(atributo):
+            return atributo
+
+        def comando(*args, **kwargs):
+            return self._sesion.ejecutar(nombre, *args, **kwargs)
+        return comando
+
+
+# Sesiones por dispositivo
+_sesiones = {}
+_sesiones_lock = threading.Lock()
+_hilo_keepalive = None
+_detener = threading.Event()
+
+
+def obtener_sesion(ip_address, port=4370):
+    """
+    Obtener un manejador sobre la sesión compartida de un dispositivo
+
+    Args:
+        ip_address (str): IP del dispositivo
+        port (int): Puerto del dispositivo
+
+    Returns:
+        ManejadorSesion: Se usa como un ZKTecoK40V2 (connect, get_user_list, ...)
+    """
+    global _hilo_keepalive
+
+    clave = f"{ip_address}:{int(port)}"
+    with _sesiones_lock:
+        if clave not in _sesiones:
+            _sesiones[clave] = SesionZKTeco(ip_address, int(port))
+        if _hilo_keepalive is None or not _hilo_keepalive.is_alive():
+            _detener.clear()
+            _hilo_keepalive = threading.Thread(target=_keepalive, name='keepalive-zkteco', daemon=True)
+            _hilo_keepalive.start()
+        return ManejadorSesion(_sesiones[clave])
+
+
+def estado_sesiones():
+    """
+    Returns:
+        list: [{'dispositivo', 'conectada', 'ventanas'}] de cada sesión
+    """
+    with _sesiones_lock:
+        return [{'dispositivo': clave, 'conectada': s.conectada, 'ventanas': s.referencias}
+                for clave, s in _sesiones.items()]
+
+
+def _keepalive():
+    while not _detener.wait(INTERVALO_KEEPALIVE):
+        with _sesiones_lock:
+            sesiones = list(_sesiones.values())
+        for sesion in sesiones:
+            sesion.mantener()
+
+
+def cerrar_sesiones():
+    """Cerrar todas las sesiones (al salir de la aplicación)"""
+    _detener.set()
+    with _sesiones_lock:
+        sesiones = list(_sesiones.values())
+    for sesion in sesiones:
+        with sesion.lock:
+            sesion.cerrar()
+
+
+atexit.register(cerrar_sesiones)
@@ -199,7 +199,9 @@ class DatabaseSetupWindow:
                 'dbname': self.db_name_var.get()
             }
             
-            if init_database():
+            # Inicialización pedida por el administrador: reintentar también
+            # los pasos opcionales omitidos en arranques anteriores
+            if init_database(reintentar_opcionales=True):
                 self.log("[OK] Sistema inicializado correctamente")
                 self.log("[SUCCESS] ¡El sistema está listo para usar!")
                 messagebox.showinfo("Éxito", "Sistema inicializado correctamente.\n\n"
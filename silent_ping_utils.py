@@ -1,70 +1,35 @@
 #!/usr/bin/env python3
 """
 Utilidades para ping silencioso sin mostrar ventanas de CMD
+
+Las verificaciones usan el sondeo TCP de sondeo_red en lugar del comando ping.
 """
 
-import subprocess
-import platform
-import socket
 import logging
-from typing import Optional
+
+from sondeo_red import sondear, host_responde, puerto_abierto, ABIERTO, CERRADO, TIMEOUT_SONDEO
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
-def silent_ping(host: str, timeout: int = 3) -> bool:
+def silent_ping(host: str, timeout: float = TIMEOUT_SONDEO) -> bool:
     """
-    Realizar ping silencioso sin mostrar ventanas de CMD
+    Verificar silenciosamente que el host responde (sondeo TCP, sin ping del sistema)
     
     Args:
-        host: Dirección IP o hostname a hacer ping
+        host: Dirección IP o hostname
         timeout: Timeout en segundos
         
     Returns:
         True si el host responde, False en caso contrario
     """
     try:
-        # Detectar el sistema operativo
-        system = platform.system().lower()
-        
-        if system == "windows":
-            # En Windows, usar subprocess con CREATE_NO_WINDOW para ocultar la ventana
-            if hasattr(subprocess, 'CREATE_NO_WINDOW'):
-                # Windows 10/11
-                result = subprocess.run(
-                    ['ping', '-n', '1', '-w', str(timeout * 1000), host],
-                    capture_output=True,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                # Windows anterior - crear STARTUPINFO para ocultar ventana
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                
-                result = subprocess.run(
-                    ['ping', '-n', '1', '-w', str(timeout * 1000), host],
-                    capture_output=True,
-                    text=True,
-                    startupinfo=startupinfo
-                )
-        else:
-            # En Linux/Mac
-            result = subprocess.run(
-                ['ping', '-c', '1', '-W', str(timeout), host],
-                capture_output=True,
-                text=True
-            )
-        
-        # Verificar si el ping fue exitoso
-        return result.returncode == 0
-        
+        return host_responde(host, timeout=timeout)
     except Exception as e:
-        logger.warning(f"Error en ping silencioso a {host}: {e}")
+        logger.warning("Error en ping silencioso a %s: %s", host, e)
         return False
 
-def test_port_connectivity(host: str, port: int, timeout: int = 3) -> bool:
+def test_port_connectivity(host: str, port: int, timeout: float = TIMEOUT_SONDEO) -> bool:
     """
     Probar conectividad a un puerto específico
     
@@ -77,15 +42,9 @@ def test_port_connectivity(host: str, port: int, timeout: int = 3) -> bool:
         True si el puerto está abierto, False en caso contrario
     """
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        
-        return result == 0
-        
+        return puerto_abierto(host, port, timeout=timeout)
     except Exception as e:
-        logger.warning(f"Error al probar puerto {port} en {host}: {e}")
+        logger.warning("Error al probar puerto %s en %s: %s", port, host, e)
         return False
 
 def test_network_connectivity(ip_address: str, port: int = 4370) -> bool:
@@ -100,21 +59,19 @@ def test_network_connectivity(ip_address: str, port: int = 4370) -> bool:
         True si hay conectividad, False en caso contrario
     """
     try:
-        # Primero hacer ping silencioso
-        if not silent_ping(ip_address):
-            logger.warning(f"No hay conectividad de red con {ip_address}")
-            return False
-        
-        # Si el ping es exitoso, intentar conectar al puerto
-        if not test_port_connectivity(ip_address, port):
-            logger.warning(f"Puerto {port} no está abierto en {ip_address}")
-            return False
+        resultado = sondear(ip_address, port)
         
-        logger.info(f"Conectividad de red exitosa con {ip_address}:{port}")
-        return True
+        if resultado['estado'] == ABIERTO:
+            logger.info("Conectividad de red exitosa con %s:%s", ip_address, port)
+            return True
+        elif resultado['estado'] == CERRADO:
+            logger.warning("Puerto %s no está abierto en %s", port, ip_address)
+        else:
+            logger.warning("No hay conectividad de red con %s", ip_address)
+        return False
             
     except Exception as e:
-        logger.error(f"Error al probar conectividad de red: {e}")
+        logger.error("Error al probar conectividad de red: %s", e)
         return False
 
 def check_device_connectivity(ip_address: str = "192.168.100.201", port: int = 4370) -> bool:
@@ -148,12 +105,10 @@ def get_network_info(ip_address: str) -> dict:
     }
     
     try:
-        # Probar ping
-        info['ping_successful'] = silent_ping(ip_address)
-        
-        # Si el ping es exitoso, probar puerto
-        if info['ping_successful']:
-            info['port_open'] = test_port_connectivity(ip_address, 4370)
+        resultado = sondear(ip_address, 4370)
+        info['ping_successful'] = resultado['estado'] in (ABIERTO, CERRADO)
+        info['port_open'] = resultado['estado'] == ABIERTO
+        info['response_time'] = resultado['latencia_ms']
             
     except Exception as e:
         info['error'] = str(e)
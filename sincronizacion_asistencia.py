@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Sincronización incremental de registros de asistencia ZKTeco → PostgreSQL
+
+Los registros descargados de cada dispositivo se guardan en la tabla
+registros_asistencia. Por dispositivo se conserva una marca de agua (último
+registro copiado y tamaño del buffer), de modo que:
+
+- si el dispositivo no tiene registros nuevos no se descarga nada (solo se
+  lee el contador con read_sizes);
+- si los tiene, solo se insertan los nuevos;
+- las búsquedas por fecha/usuario se resuelven con índices en la base local
+  en lugar de volcar el buffer completo del dispositivo.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from psycopg2.extras import execute_values
+
+from database import connect_db
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Un lock por dispositivo: dos ventanas no sincronizan el mismo equipo a la vez
+_locks_dispositivo = {}
+_locks_lock = threading.Lock()
+
+
+def clave_dispositivo(serial=None, ip_address=None, port=4370):
+    """
+    Clave con la que se identifica un dispositivo en el almacén local
+
+    Args:
+        serial (str, optional): Número de serie del dispositivo
+        ip_address (str, optional): IP, si no se conoce el serial
+        port (int): Puerto del dispositivo
+
+    Returns:
+        str: El serial o, si no está disponible, "ip:puerto"
+    """
+    if serial and serial != "No disponible":
+        return str(serial)
+    return f"{ip_address}:{port}"
+
+
+def _lock_de(dispositivo):
+    with _locks_lock:
+        return _locks_dispositivo.setdefault(dispositivo, threading.Lock())
+
+
+def obtener_marca(dispositivo):
+    """
+    Marca de agua de sincronización de un dispositivo
+
+    Args:
+        dispositivo (str): Clave del dispositivo (ver clave_dispositivo)
+
+    Returns:
+        dict: {'ultima_marca', 'registros_dispositivo', 'ultima_sincronizacion'}
+              (valores vacíos si nunca se sincronizó), o None sin conexión
+    """
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ultima_marca, registros_dispositivo, ultima_sincronizacion
+            FROM sincronizacion_asistencia
+            WHERE dispositivo = %s
+        """, (dispositivo,))
+        fila = cursor.fetchone() or (None, 0, None)
+        return {
+            'ultima_marca': fila[0],
+            'registros_dispositivo': fila[1],
+            'ultima_sincronizacion': fila[2],
+        }
+    except Exception as e:
+        logger.error("Error al obtener marca de sincronización de %s: %s", dispositivo, e)
+        return None
+    finally:
+        conn.close()
+
+
+def _registros_nuevos(logs, marca):
+    """
+    Elegir los registros descargados que aún no están en el almacén
+
+    El buffer del K40 solo crece por el final, así que si el contador creció
+    los nuevos son los últimos. Si el buffer se vació o no coincide, se
+    filtra por la marca de tiempo (la restricción UNIQUE descarta repetidos).
+    """
+    previos = marca['registros_dispositivo']
+    if marca['ultima_marca'] is None:
+        return logs
+    if 0 < previos <= len(logs):
+        # Si el buffer se vació y volvió a crecer, el registro previos-1 es posterior a la marca
+        ultimo_copiado = logs[previos - 1]['timestamp']
+        if isinstance(ultimo_copiado, datetime) and ultimo_copiado <= marca['ultima_marca']:
+            return logs[previos:]
+    return [log for log in logs
+            if isinstance(log['timestamp'], datetime) and log['timestamp'] >= marca['ultima_marca']]
+
+
+def sincronizar_dispositivo(zkteco_device, dispositivo, aparato_id=None):
+    """
+    Copiar al almacén local los registros nuevos de un dispositivo conectado
+
+    Args:
+        zkteco_device (ZKTecoK40V2): Dispositivo con conexión activa
+        dispositivo (str): Clave del dispositivo (ver clave_dispositivo)
+        aparato_id (int, optional): ID en aparatos_biometricos, si está registrado
+
+    Returns:
+        dict: {'nuevos': int, 'descargado': bool}, o None si falló la base de datos
+              o la lectura del dispositivo (la marca de agua no se modifica)
+    """
+    with _lock_de(dispositivo):
+        marca = obtener_marca(dispositivo)
+        if marca is None:
+            return None
+
+        cantidad = zkteco_device.get_attendance_count()
+        if cantidad is not None and cantidad == marca['registros_dispositivo'] and marca['ultima_marca']:
+            logger.info("Asistencia de %s al día (%s registros)", dispositivo, cantidad)
+            return {'nuevos': 0, 'descargado': False}
+
+        logs = zkteco_device.get_attendance_logs()
+        nuevos = [log for log in _registros_nuevos(logs, marca)
+                  if isinstance(log.get('timestamp'), datetime)]
+
+        # get_attendance_logs devuelve [] si la lectura falla: guardar el contador
+        # nuevo con la marca vieja haría que los registros faltantes nunca se copien
+        if cantidad and not logs:
+            logger.warning("[WARN] %s informa %s registros pero no se pudieron leer", dispositivo, cantidad)
+            return None
+        if cantidad is not None and cantidad > marca['registros_dispositivo'] and not nuevos:
+            logger.warning("[WARN] %s informa %s registros (antes %s) pero no se leyó ninguno nuevo",
+                           dispositivo, cantidad, marca['registros_dispositivo'])
+            return None
+
+        conn = connect_db()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            insertados = 0
+            if nuevos:
+                insertados = len(execute_values(cursor, """
+                    INSERT INTO registros_asistencia
+                        (dispositivo, aparato_id, user_id, uid, fecha_hora, punch, status)
+                    VALUES %s
+                    ON CONFLICT (dispositivo, user_id, fecha_hora, punch) DO NOTHING
+                    RETURNING 1
+                """, [
+                    (dispositivo, aparato_id, str(log['user_id']),
+                     log['uid'] if isinstance(log['uid'], int) else None,
+                     log['timestamp'],
+                     log['punch'] if isinstance(log['punch'], int) else None,
+                     log['status'] if isinstance(log['status'], int) else None)
+                    for log in nuevos
+                ], page_size=1000, fetch=True))
+
+            ultima = max((log['timestamp'] for log in nuevos), default=marca['ultima_marca'])
+            if marca['ultima_marca'] and ultima and marca['ultima_marca'] > ultima:
+                ultima = marca['ultima_marca']
+
+            cursor.execute("""
+                INSERT INTO sincronizacion_asistencia
+                    (dispositivo, aparato_id, ultima_marca, registros_dispositivo, ultima_sincronizacion)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (dispositivo) DO UPDATE SET
+                    aparato_id = COALESCE(EXCLUDED.aparato_id, sincronizacion_asistencia.aparato_id),
+                    ultima_marca = EXCLUDED.ultima_marca,
+                    registros_dispositivo = EXCLUDED.registros_dispositivo,
+                    ultima_sincronizacion = EXCLUDED.ultima_sincronizacion
+            """, (dispositivo, aparato_id, ultima, cantidad if cantidad is not None else len(logs)))
+
+            conn.commit()
+            logger.info("[OK] Asistencia de %s: %s registros nuevos", dispositivo, insertados)
+            return {'nuevos': insertados, 'descargado': True}
+
+        except Exception as e:
+            logger.error("Error al sincronizar asistencia de %s: %s", dispositivo, e)
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+
+def consultar_registros(dispositivo=None, desde=None, hasta=None, usuario=None, user_ids=None):
+    """
+    Consultar registros de asistencia del almacén local
+
+    Args:
+        dispositivo (str, optional): Clave del dispositivo; None = todos
+        desde (date, optional): Primer día incluido
+        hasta (date, optional): Último día incluido
+        usuario (str, optional): Texto contenido en el ID de usuario del dispositivo
+        user_ids (iterable, optional): IDs que también coinciden (p. ej. por nombre)
+
+    Returns:
+        list: Registros con las mismas claves que ZKTecoK40V2.get_attendance_logs
+              (user_id, timestamp, status, punch, uid), ordenados por fecha,
+              o None si no se pudo consultar
+    """
+    condiciones = []
+    params = []
+
+    if dispositivo:
+        condiciones.append("dispositivo = %s")
+        params.append(dispositivo)
+    if desde:
+        condiciones.append("fecha_hora >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append("fecha_hora < %s")
+        params.append(hasta + timedelta(days=1))
+    if usuario:
+        patron = usuario.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        if user_ids:
+            condiciones.append("(user_id ILIKE %s OR user_id = ANY(%s))")
+            params.extend([f"%{patron}%", [str(u) for u in user_ids]])
+        else:
+            condiciones.append("user_id ILIKE %s")
+            params.append(f"%{patron}%")
+
+    where = " AND ".join(condiciones) or "TRUE"
+
+    conn = connect_db()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT user_id, fecha_hora, status, punch, uid
+            FROM registros_asistencia
+            WHERE {where}
+            ORDER BY fecha_hora, id
+        """, params)
+        return [
+            {'user_id': user_id, 'timestamp': fecha_hora, 'status': status, 'punch': punch, 'uid': uid}
+            for user_id, fecha_hora, status, punch, uid in cursor.fetchall()
+        ]
+    except Exception as e:
+        logger.error("Error al consultar registros de asistencia: %s", e)
+        return None
+    finally:
+        conn.close()
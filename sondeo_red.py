@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Sondeo rápido de conectividad de dispositivos ZKTeco
+
+Reemplaza el ping del sistema operativo (un proceso nuevo que espera hasta
+3 s) por una conexión TCP no bloqueante al puerto del dispositivo con
+timeout de fracción de segundo. Una conexión aceptada o rechazada prueba
+que el host responde; el puerto abierto prueba además que el servicio
+ZKTeco está escuchando.
+
+Varios dispositivos se sondean a la vez con un solo selector (sin hilos) y
+los resultados recientes se guardan por host:puerto, de modo que las
+verificaciones repetidas (antes de cada connect, al reconectar...) no
+vuelven a tocar la red.
+"""
+
+import errno
+import logging
+import selectors
+import socket
+import threading
+import time
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Timeout por defecto de un sondeo (segundos). En la LAN el K40 responde en milisegundos
+TIMEOUT_SONDEO = 0.5
+
+# Segundos que se reutiliza un resultado: los fallos se vuelven a probar antes
+CACHE_TTL_DISPONIBLE = 5
+CACHE_TTL_FALLO = 2
+
+# Sockets abiertos a la vez por sondeo (select() en Windows admite 512)
+LOTE_MAXIMO = 256
+
+# Estados posibles de un sondeo
+ABIERTO = 'abierto'              # El puerto aceptó la conexión
+CERRADO = 'cerrado'              # El host respondió pero rechazó la conexión
+SIN_RESPUESTA = 'sin_respuesta'  # No hubo respuesta dentro del timeout
+INALCANZABLE = 'inalcanzable'    # Error de red (sin ruta, red caída, dirección inválida...)
+
+_EN_CURSO = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+             getattr(errno, 'WSAEWOULDBLOCK', 10035)}
+_RECHAZADA = {errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', 10061)}
+
+# (host, puerto) -> (estado, latencia_ms, momento)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _estado_de(codigo):
+    if codigo == 0:
+        return ABIERTO
+    if codigo in _RECHAZADA:
+        return CERRADO
+    return INALCANZABLE
+
+
+def _sondear_lote(destinos, timeout):
+    """Conexiones no bloqueantes simultáneas a un lote de (host, puerto)"""
+    resultados = {}
+    selector = selectors.DefaultSelector()
+    inicio = time.monotonic()
+
+    def latencia():
+        return round((time.monotonic() - inicio) * 1000, 1)
+
+    try:
+        for destino in destinos:
+            sock = None
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                codigo = sock.connect_ex(destino)
+            except OSError as e:
+                if sock is not None:
+                    sock.close()
+                logger.debug(f"Sondeo de {destino[0]}:{destino[1]} falló: {e}")
+                resultados[destino] = (INALCANZABLE, None)
+                continue
+
+            if codigo in _EN_CURSO:
+                selector.register(sock, selectors.EVENT_WRITE, destino)
+            else:
+                sock.close()
+                resultados[destino] = (_estado_de(codigo), latencia())
+
+        limite = inicio + timeout
+        while selector.get_map():
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            for clave, _ in selector.select(restante):
+                sock = clave.fileobj
+                codigo = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                selector.unregister(sock)
+                sock.close()
+                resultados[clave.data] = (_estado_de(codigo), latencia())
+    finally:
+        for clave in list(selector.get_map().values()):
+            clave.fileobj.close()
+            resultados.setdefault(clave.data, (SIN_RESPUESTA, None))
+        selector.close()
+
+    return resultados
+
+
+def sondear_dispositivos(destinos, timeout=TIMEOUT_SONDEO, usar_cache=True):
+    """
+    Sondear en paralelo el puerto de varios dispositivos
+
+    Args:
+        destinos (iterable): Pares (ip, puerto)
+        timeout (float): Segundos máximos de espera por el sondeo completo
+        usar_cache (bool): Reutilizar resultados recientes
+
+    Returns:
+        dict: {(ip, puerto): {'estado': str, 'latencia_ms': float o None}}
+    """
+    resultados = {}
+    pendientes = []
+    ahora = time.monotonic()
+
+    for destino in dict.fromkeys((str(ip), int(puerto)) for ip, puerto in destinos):
+        if usar_cache:
+            with _cache_lock:
+                previo = _cache.get(destino)
+            if previo is not None:
+                estado, latencia, momento = previo
+                ttl = CACHE_TTL_DISPONIBLE if estado == ABIERTO else CACHE_TTL_FALLO
+                if ahora - momento < ttl:
+                    resultados[destino] = {'estado': estado, 'latencia_ms': latencia}
+                    continue
+        pendientes.append(destino)
+
+    for i in range(0, len(pendientes), LOTE_MAXIMO):
+        sondeados = _sondear_lote(pendientes[i:i + LOTE_MAXIMO], timeout)
+        momento = time.monotonic()
+        with _cache_lock:
+            for destino, (estado, latencia) in sondeados.items():
+                _cache[destino] = (estado, latencia, momento)
+        for destino, (estado, latencia) in sondeados.items():
+            resultados[destino] = {'estado': estado, 'latencia_ms': latencia}
+
+    return resultados
+
+
+def sondear(ip_address, port=4370, timeout=TIMEOUT_SONDEO, usar_cache=True):
+    """
+    Sondear el puerto de un dispositivo
+
+    Returns:
+        dict: {'estado': str, 'latencia_ms': float o None}
+    """
+    destino = (str(ip_address), int(port))
+    return sondear_dispositivos([destino], timeout, usar_cache)[destino]
+
+
+def puerto_abierto(ip_address, port=4370, timeout=TIMEOUT_SONDEO, usar_cache=True):
+    """
+    Verificar que el dispositivo acepta conexiones en su puerto
+
+    Returns:
+        bool: True si el puerto está abierto
+    """
+    return sondear(ip_address, port, timeout, usar_cache)['estado'] == ABIERTO
+
+
+def host_responde(ip_address, port=4370, timeout=TIMEOUT_SONDEO, usar_cache=True):
+    """
+    Verificar que el host está en la red (equivalente al ping, sin ICMP)
+
+    Returns:
+        bool: True si el host aceptó o rechazó la conexión
+    """
+    return sondear(ip_address, port, timeout, usar_cache)['estado'] in (ABIERTO, CERRADO)
+
+
+def invalidar_cache(ip_address=None, port=None):
+    """
+    Descartar resultados guardados
+
+    Args:
+        ip_address (str, optional): Solo los de este host; None = todos
+        port (int, optional): Solo los de este puerto del host
+    """
+    with _cache_lock:
+        if ip_address is None:
+            _cache.clear()
+            return
+        for destino in [d for d in _cache if d[0] == str(ip_address)]:
+            if port is None or destino[1] == int(port):
+                del _cache[destino]
+
+
+if __name__ == "__main__":
+    # Prueba básica
+    for (ip, puerto), resultado in sondear_dispositivos([("192.168.100.201", 4370)]).items():
+        estado = "[OK]" if resultado['estado'] == ABIERTO else "[ERROR]"
+        print(f"{estado} {ip}:{puerto} - {resultado['estado']} ({resultado['latencia_ms']} ms)")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Tabla virtual sobre ttk.Treeview para Sistema QUIRA
+
+El Treeview crea un ítem de Tcl por fila; borrar e insertar miles de filas
+una por una congela la interfaz. TablaVirtual mantiene solo tantos ítems
+como filas caben en pantalla y los reutiliza al desplazarse:
+
+- las filas se leen de cualquier secuencia (len + índice), así que los
+  datos pueden formatearse recién al mostrarse (ver VistaFilas);
+- al refrescar, solo se reescriben los ítems cuyo contenido cambió;
+- los ítems que faltan se crean por lotes en callbacks de inactividad;
+- la selección se guarda por índice de fila y sobrevive al desplazamiento.
+
+El Treeview interno queda en .tree para configurar encabezados, columnas y
+eventos como siempre; tree.selection() e item(...)['values'] devuelven las
+filas visibles seleccionadas.
+"""
+
+import itertools
+import tkinter as tk
+from tkinter import ttk
+
+# Ítems creados por callback de inactividad
+LOTE_INSERCION = 50
+
+# Filas desplazadas por cada paso de la rueda del mouse
+FILAS_RUEDA = 3
+
+_contador = itertools.count()
+
+
+class VistaFilas:
+    """Secuencia que formatea cada fila recién al leerla"""
+
+    def __init__(self, datos, formatear):
+        """
+        Args:
+            datos (sequence): Datos originales
+            formatear (callable): Convierte un dato en la tupla de valores de la fila
+        """
+        self._datos = datos
+        self._formatear = formatear
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __getitem__(self, indice):
+        return self._formatear(self._datos[indice])
+
+
+class TablaVirtual(ttk.Frame):
+    """Treeview con barra de desplazamiento que solo materializa las filas visibles"""
+
+    def __init__(self, parent, columns, height=10, horizontal=False, **opciones):
+        """
+        Args:
+            parent: Widget contenedor
+            columns (tuple): Columnas del Treeview
+            height (int): Filas visibles pedidas (la tabla crece si se expande)
+            horizontal (bool): Agregar barra de desplazamiento horizontal
+            **opciones: Opciones adicionales del Treeview (style, selectmode...)
+        """
+        super().__init__(parent)
+        opciones.setdefault('show', 'headings')
+        self.tree = ttk.Treeview(self, columns=columns, height=height, **opciones)
+        self.scroll_y = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scroll_y.grid(row=0, column=1, sticky='ns')
+        if horizontal:
+            self.scroll_x = ttk.Scrollbar(self, orient='horizontal', command=self.tree.xview)
+            self.tree.configure(xscrollcommand=self.scroll_x.set)
+            self.scroll_x.grid(row=1, column=0, sticky='ew')
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._filas = ()
+        self._inicio = 0         # Índice de la primera fila visible
+        self._items = []         # Ítems reutilizados, de arriba hacia abajo
+        self._posicion = {}      # ítem -> posición en pantalla
+        self._mostrado = []      # Valores mostrados en cada ítem
+        self._seleccion = set()  # Índices de filas seleccionadas
+        self._alto_fila = None
+        self._margen_superior = 0
+        self._intentos_medicion = 3
+        self._pintado_pendiente = None
+
+        # Etiqueta propia antes de la clase Treeview: los eventos de la tabla se
+        # atienden primero y los bind() del llamador sobre .tree no los reemplazan
+        etiqueta = f"TablaVirtual{next(_contador)}"
+        self.tree.bindtags((self.tree.bindtags()[0], etiqueta) + self.tree.bindtags()[1:])
+        self.tree.bind_class(etiqueta, '<Configure>', lambda e: self.refrescar())
+        self.tree.bind_class(etiqueta, '<<TreeviewSelect>>', self._al_seleccionar)
+        self.tree.bind_class(etiqueta, '<MouseWheel>', self._rueda)
+        self.tree.bind_class(etiqueta, '<Button-4>', lambda e: self._desplazar(-FILAS_RUEDA))
+        self.tree.bind_class(etiqueta, '<Button-5>', lambda e: self._desplazar(FILAS_RUEDA))
+        for tecla, paso in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'pagina-'),
+                            ('<Next>', 'pagina+'), ('<Home>', 'inicio'), ('<End>', 'fin')):
+            self.tree.bind_class(etiqueta, tecla, lambda e, paso=paso: self._tecla(paso))
+
+    # ------------------------------------------------------------------
+    # Datos
+    # ------------------------------------------------------------------
+
+    def mostrar(self, filas):
+        """
+        Mostrar un conjunto de filas nuevo (vuelve al principio y limpia la selección)
+
+        Args:
+            filas (sequence): Tuplas de valores (o VistaFilas)
+        """
+        self._filas = filas
+        self._inicio = 0
+        self._seleccion = set()
+        self.refrescar()
+
+    def actualizar(self, filas):
+        """Reemplazar las filas conservando la posición y la selección"""
+        self._filas = filas
+        self._seleccion = {i for i in self._seleccion if i < len(filas)}
+        self.refrescar()
+
+    def limpiar(self):
+        """Quitar todas las filas"""
+        self.mostrar(())
+
+    def __len__(self):
+        return len(self._filas)
+
+    def fila(self, indice):
+        """Valores de una fila por índice"""
+        return self._filas[indice]
+
+    def indice_de(self, item):
+        """Índice de la fila que muestra un ítem del Treeview (None si no es de la tabla)"""
+        posicion = self._posicion.get(item)
+        return None if posicion is None else self._inicio + posicion
+
+    def seleccion(self):
+        """Índices de las filas seleccionadas (incluidas las que no están a la vista)"""
+        return sorted(self._seleccion)
+
+    def fila_seleccionada(self):
+        """Valores de la primera fila seleccionada, o None"""
+        seleccion = self.seleccion()
+        return tuple(self._filas[seleccion[0]]) if seleccion else None
+
+    def ver(self, indice):
+        """Desplazar la tabla para que la fila indicada quede a la vista"""
+        capacidad = self._capacidad()
+        if indice < self._inicio:
+            self._inicio = indice
+        elif indice >= self._inicio + capacidad:
+            self._inicio = indice - capacidad + 1
+        self.refrescar()
+
+    # ------------------------------------------------------------------
+    # Dibujo
+    # ------------------------------------------------------------------
+
+    def refrescar(self):
+        """Programar un redibujado (varios pedidos seguidos se combinan en uno)"""
+        if self._pintado_pendiente is None:
+            self._pintado_pendiente = self.after_idle(self._pintar)
+
+    def _capacidad(self):
+        """Filas que caben en el alto actual del Treeview"""
+        if self._alto_fila is None and self._items:
+            caja = self.tree.bbox(self._items[0])
+            if caja and caja[3] > 0:
+                self._margen_superior, self._alto_fila = caja[1], caja[3]
+        alto = self.tree.winfo_height()
+        if self._alto_fila is None or alto <= 1:
+            return max(1, int(self.tree.cget('height')))
+        # Margen inferior del borde: una fila a medias no se cuenta
+        return max(1, (alto - self._margen_superior - 2) // self._alto_fila)
+
+    def _pintar(self):
+        self._pintado_pendiente = None
+        try:
+            if not self.winfo_exists():
+                return
+        except tk.TclError:
+            return  # La ventana ya se cerró
+
+        total = len(self._filas)
+        capacidad = self._capacidad()
+        self._inicio = max(0, min(self._inicio, total - capacidad))
+        visibles = min(capacidad, total)
+
+        # Ítems sobrantes: una sola llamada a Tcl
+        if len(self._items) > visibles:
+            sobrantes = self._items[visibles:]
+            self.tree.delete(*sobrantes)
+            for item in sobrantes:
+                del self._posicion[item]
+            del self._items[visibles:]
+            del self._mostrado[visibles:]
+
+        # Reescribir solo los ítems cuyo contenido cambió
+        for posicion, item in enumerate(self._items):
+            valores = tuple(self._filas[self._inicio + posicion])
+            if valores != self._mostrado[posicion]:
+                self.tree.item(item, values=valores)
+                self._mostrado[posicion] = valores
+
+        # Ítems que faltan: por lotes, el resto en el próximo callback de inactividad
+        faltantes = visibles - len(self._items)
+        for _ in range(min(faltantes, LOTE_INSERCION)):
+            valores = tuple(self._filas[self._inicio + len(self._items)])
+            item = self.tree.insert('', 'end', values=valores)
+            self._posicion[item] = len(self._items)
+            self._items.append(item)
+            self._mostrado.append(valores)
+        if faltantes > LOTE_INSERCION:
+            self.refrescar()
+
+        # El Treeview no debe desplazarse por su cuenta (p. ej. al enfocar un ítem)
+        if self.tree.yview()[0] > 0:
+            self.tree.yview_moveto(0)
+
+        self._sincronizar_seleccion()
+        if total:
+            self.scroll_y.set(self._inicio / total, (self._inicio + len(self._items)) / total)
+        else:
+            self.scroll_y.set(0, 1)
+
+        # La primera vez que se puede medir una fila, ajustar la cantidad de ítems al alto real
+        if self._alto_fila is None and self._items and self._intentos_medicion:
+            self._intentos_medicion -= 1
+            self.after_idle(self.refrescar)
+
+    def _sincronizar_seleccion(self):
+        """Seleccionar en el Treeview los ítems que muestran filas seleccionadas"""
+        objetivo = [item for posicion, item in enumerate(self._items)
+                    if self._inicio + posicion in self._seleccion]
+        if set(objetivo) != set(self.tree.selection()):
+            self.tree.selection_set(objetivo)
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento vertical"""
+        total = len(self._filas)
+        if not args or not total:
+            return
+        if args[0] == 'moveto':
+            self._inicio = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            paso = int(args[1])
+            self._inicio += paso * (self._capacidad() if args[2] == 'pages' else 1)
+        self.refrescar()
+
+    def _desplazar(self, filas):
+        self._inicio = max(0, self._inicio + filas)
+        self.refrescar()
+        return 'break'
+
+    def _rueda(self, event):
+        if event.delta:
+            # Windows informa múltiplos de 120; macOS, pasos pequeños
+            pasos = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+            return self._desplazar(-pasos * FILAS_RUEDA)
+        return 'break'
+
+    def _al_seleccionar(self, event):
+        """Registrar por índice de fila la selección hecha con el mouse"""
+        visibles = range(self._inicio, self._inicio + len(self._items))
+        elegidos = {self._inicio + self._posicion[item]
+                    for item in self.tree.selection() if item in self._posicion}
+        self._seleccion = {i for i in self._seleccion if i not in visibles} | elegidos
+
+    def _tecla(self, paso):
+        """Navegación con teclado sobre todas las filas, no solo las visibles"""
+        total = len(self._filas)
+        if not total:
+            return 'break'
+        actual = self.indice_de(self.tree.focus())
+        if actual is None:
+            actual = min(self._seleccion) if self._seleccion else self._inicio
+
+        capacidad = self._capacidad()
+        destino = {'pagina-': actual - capacidad, 'pagina+': actual + capacidad,
+                   'inicio': 0, 'fin': total - 1}.get(paso, actual + paso if isinstance(paso, int) else actual)
+        destino = max(0, min(destino, total - 1))
+
+        self._seleccion = {destino}
+        self.ver(destino)
+        # Dibujar ya para poder enfocar el ítem que muestra la fila destino
+        if self._pintado_pendiente is not None:
+            self.after_cancel(self._pintado_pendiente)
+        self._pintar()
+        posicion = destino - self._inicio
+        if 0 <= posicion < len(self._items):
+            self.tree.focus(self._items[posicion])
+        return 'break'
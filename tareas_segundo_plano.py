@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Ejecución de tareas en segundo plano para ventanas Tkinter de Sistema QUIRA
+
+Las consultas se ejecutan en un pool de hilos; los resultados vuelven por una
+cola thread-safe que el hilo de Tk revisa con after(), de modo que los
+widgets solo se tocan desde el hilo principal. Cada tarea pertenece a un
+grupo que puede cancelarse (p. ej. al cambiar de página o cerrar la ventana):
+los resultados de tareas canceladas se descartan sin llamar a su callback.
+"""
+
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class CargadorSegundoPlano:
+    """Pool de hilos cuyos resultados se entregan en el hilo de Tk"""
+
+    def __init__(self, widget, max_workers=4, intervalo_ms=50, nombre='cargador'):
+        """
+        Inicializar cargador
+
+        Args:
+            widget: Widget Tk cuyo after() se usa para revisar la cola
+            max_workers (int): Hilos de trabajo simultáneos
+            intervalo_ms (int): Intervalo de revisión de la cola mientras hay tareas pendientes
+            nombre (str): Prefijo de los nombres de hilo (para diagnóstico)
+        """
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=nombre)
+        self._resultados = queue.Queue()
+        self._generaciones = {}   # grupo -> generación vigente
+        self._futuros = {}        # grupo -> futuros aún no entregados
+        self._after_id = None
+        self._cerrado = False
+
+    # ------------------------------------------------------------------
+    # API pública (llamar solo desde el hilo de Tk)
+    # ------------------------------------------------------------------
+
+    def enviar(self, grupo, funcion, al_terminar, *args, al_fallar=None, **kwargs):
+        """
+        Ejecutar funcion(*args, **kwargs) en segundo plano
+
+        Args:
+            grupo (str): Grupo de cancelación de la tarea
+            funcion (callable): Función a ejecutar (no debe tocar widgets)
+            al_terminar (callable): Recibe el resultado en el hilo de Tk
+            al_fallar (callable, optional): Recibe la excepción en el hilo de Tk
+
+        Returns:
+            Future: Futuro de la tarea, o None si el cargador está cerrado
+        """
+        if self._cerrado:
+            return None
+
+        generacion = self._generaciones.get(grupo, 0)
+        futuro = self._executor.submit(self._ejecutar, grupo, generacion, funcion, args, kwargs,
+                                       al_terminar, al_fallar)
+        self._futuros.setdefault(grupo, set()).add(futuro)
+        self._programar_revision()
+        return futuro
+
+    def cancelar(self, grupo=None):
+        """
+        Cancelar las tareas de un grupo (o de todos)
+
+        Las que aún no empezaron no se ejecutan; las que están en curso
+        terminan, pero su resultado se descarta.
+
+        Args:
+            grupo (str, optional): Grupo a cancelar; None cancela todos
+        """
+        grupos = list(self._futuros) if grupo is None else [grupo]
+        for g in grupos:
+            self._generaciones[g] = self._generaciones.get(g, 0) + 1
+            for futuro in self._futuros.pop(g, ()):
+                futuro.cancel()
+
+    def cerrar(self):
+        """Cancelar todo y liberar los hilos (al cerrar la ventana)"""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self.cancelar()
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _ejecutar(self, grupo, generacion, funcion, args, kwargs, al_terminar, al_fallar):
+        """Cuerpo de la tarea en el hilo de trabajo"""
+        try:
+            resultado, error = funcion(*args, **kwargs), None
+        except Exception as e:
+            resultado, error = None, e
+        self._resultados.put((grupo, generacion, resultado, error, al_terminar, al_fallar))
+
+    def _programar_revision(self):
+        if self._after_id is None and not self._cerrado:
+            self._after_id = self.widget.after(self.intervalo_ms, self._revisar_cola)
+
+    def _revisar_cola(self):
+        """Entregar en el hilo de Tk los resultados disponibles"""
+        self._after_id = None
+        if self._cerrado:
+            return
+
+        # Un futuro terminado ya dejó su resultado en la cola (o fue cancelado
+        # antes de empezar), así que se descarta antes de vaciarla
+        for futuros in self._futuros.values():
+            futuros -= {f for f in futuros if f.done()}
+
+        while True:
+            try:
+                grupo, generacion, resultado, error, al_terminar, al_fallar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+
+            if generacion != self._generaciones.get(grupo, 0):
+                continue  # Resultado de una tarea cancelada
+
+            try:
+                if error is None:
+                    al_terminar(resultado)
+                elif al_fallar is not None:
+                    al_fallar(error)
+                else:
+                    logger.error("Error en tarea de segundo plano (%s): %s", grupo, error)
+            except Exception as e:
+                logger.error("Error al procesar resultado de %s: %s", grupo, e)
+
+            if self._cerrado:
+                return
+
+        if any(self._futuros.values()):
+            self._programar_revision()
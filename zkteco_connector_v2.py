@@ -6,67 +6,41 @@ Conector ZKTeco K40 usando la biblioteca pyzk oficial
 import logging
 from zk import ZK
 from typing import Optional, List, Dict, Any
-from datetime import datetime
-import subprocess
-import platform
+from datetime import datetime, timedelta
 import os
 
+from sondeo_red import sondear, host_responde, invalidar_cache, ABIERTO, CERRADO, TIMEOUT_SONDEO
+from registro_eventos import configurar_registro
+
 # Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configurar_registro()
 logger = logging.getLogger(__name__)
 
-def silent_ping(host: str, timeout: int = 3) -> bool:
+def silent_ping(host: str, timeout: float = TIMEOUT_SONDEO) -> bool:
     """
-    Realizar ping silencioso sin mostrar ventanas de CMD
+    Verificar silenciosamente que el host responde (sondeo TCP, sin ping del sistema)
     
     Args:
-        host: Dirección IP o hostname a hacer ping
+        host: Dirección IP o hostname
         timeout: Timeout en segundos
         
     Returns:
         True si el host responde, False en caso contrario
     """
     try:
-        # Detectar el sistema operativo
-        system = platform.system().lower()
-        
-        if system == "windows":
-            # En Windows, usar subprocess con CREATE_NO_WINDOW para ocultar la ventana
-            if hasattr(subprocess, 'CREATE_NO_WINDOW'):
-                # Windows 10/11
-                result = subprocess.run(
-                    ['ping', '-n', '1', '-w', str(timeout * 1000), host],
-                    capture_output=True,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                # Windows anterior
-                result = subprocess.run(
-                    ['ping', '-n', '1', '-w', str(timeout * 1000), host],
-                    capture_output=True,
-                    text=True,
-                    startupinfo=subprocess.STARTUPINFO()
-                )
-        else:
-            # En Linux/Mac
-            result = subprocess.run(
-                ['ping', '-c', '1', '-W', str(timeout), host],
-                capture_output=True,
-                text=True
-            )
-        
-        # Verificar si el ping fue exitoso
-        return result.returncode == 0
-        
+        return host_responde(host, timeout=timeout)
     except Exception as e:
-        logger.warning(f"Error en ping silencioso a {host}: {e}")
+        logger.warning("Error en ping silencioso a %s: %s", host, e)
         return False
 
 def test_network_connectivity(ip_address: str, port: int = 4370) -> bool:
     """
     Probar conectividad de red de forma silenciosa
     
+    Una conexión TCP no bloqueante al puerto del dispositivo prueba a la vez
+    que el host está en la red y que el servicio escucha. El resultado se
+    reutiliza unos segundos (ver sondeo_red).
+    
     Args:
         ip_address: Dirección IP del dispositivo
         port: Puerto del dispositivo
@@ -75,27 +49,19 @@ def test_network_connectivity(ip_address: str, port: int = 4370) -> bool:
         True si hay conectividad, False en caso contrario
     """
     try:
-        # Primero hacer ping silencioso
-        if not silent_ping(ip_address):
-            logger.warning(f"No hay conectividad de red con {ip_address}")
-            return False
-        
-        # Si el ping es exitoso, intentar conectar al puerto
-        import socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3)
-        result = sock.connect_ex((ip_address, port))
-        sock.close()
+        resultado = sondear(ip_address, port)
         
-        if result == 0:
-            logger.info(f"Conectividad de red exitosa con {ip_address}:{port}")
+        if resultado['estado'] == ABIERTO:
+            logger.info("Conectividad de red exitosa con %s:%s (%s ms)", ip_address, port, resultado['latencia_ms'])
             return True
+        elif resultado['estado'] == CERRADO:
+            logger.warning("Puerto %s no está abierto en %s", port, ip_address)
         else:
-            logger.warning(f"Puerto {port} no está abierto en {ip_address}")
-            return False
+            logger.warning("No hay conectividad de red con %s", ip_address)
+        return False
             
     except Exception as e:
-        logger.error(f"Error al probar conectividad de red: {e}")
+        logger.error("Error al probar conectividad de red: %s", e)
         return False
 
 class ZKTecoK40V2:
@@ -126,10 +92,10 @@ class ZKTecoK40V2:
         try:
             # Verificar conectividad de red de forma silenciosa antes de conectar
             if not test_network_connectivity(self.ip_address, self.port):
-                logger.warning(f"No hay conectividad de red con {self.ip_address}:{self.port}")
+                logger.warning("No hay conectividad de red con %s:%s", self.ip_address, self.port)
                 return False
             
-            logger.info(f"Conectando a {self.ip_address}:{self.port}")
+            logger.info("Conectando a %s:%s", self.ip_address, self.port)
             self.conn = self.zk.connect()
             
             if self.conn:
@@ -137,10 +103,13 @@ class ZKTecoK40V2:
                 return True
             else:
                 logger.error("No se pudo establecer la conexión")
+                invalidar_cache(self.ip_address, self.port)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error al conectar: {e}")
+            logger.error("Error al conectar: %s", e)
+            # El próximo intento vuelve a sondear la red en lugar de usar el resultado guardado
+            invalidar_cache(self.ip_address, self.port)
             return False
     
     def disconnect(self):
@@ -150,7 +119,7 @@ class ZKTecoK40V2:
                 self.conn.disconnect()
                 logger.info("Conexión cerrada")
         except Exception as e:
-            logger.error(f"Error al desconectar: {e}")
+            logger.error("Error al desconectar: %s", e)
     
     def reconnect(self) -> bool:
         """
@@ -169,7 +138,7 @@ class ZKTecoK40V2:
             
             return self.connect()
         except Exception as e:
-            logger.error(f"Error al reconectar: {e}")
+            logger.error("Error al reconectar: %s", e)
             return False
     
     def is_alive(self) -> bool:
@@ -219,7 +188,7 @@ class ZKTecoK40V2:
             try:
                 firmware = self.conn.get_firmware_version()
                 # Debug: mostrar información cruda
-                logger.info(f"Firmware raw: {firmware} (type: {type(firmware)})")
+                logger.info("Firmware raw: %s (type: %s)", firmware, type(firmware))
                 
                 # Usar el valor que devuelve la biblioteca
                 firmware_str = str(firmware).strip()
@@ -228,7 +197,7 @@ class ZKTecoK40V2:
                 else:
                     info['firmware_version'] = "No disponible"
             except Exception as e:
-                logger.warning(f"No se pudo obtener firmware_version: {e}")
+                logger.warning("No se pudo obtener firmware_version: %s", e)
                 info['firmware_version'] = "No disponible"
             
             # Información del serial
@@ -266,13 +235,13 @@ class ZKTecoK40V2:
                     # Si no se puede obtener, usar valor por defecto
                     info['algorithm'] = "ZKTeco Algorithm"
             except Exception as e:
-                logger.warning(f"No se pudo obtener algoritmo: {e}")
+                logger.warning("No se pudo obtener algoritmo: %s", e)
                 info['algorithm'] = "ZKTeco Algorithm"
             
             return info
             
         except Exception as e:
-            logger.error(f"Error al obtener información del dispositivo: {e}")
+            logger.error("Error al obtener información del dispositivo: %s", e)
             return {"error": str(e)}
     
     def get_user_count(self) -> int:
@@ -286,27 +255,34 @@ class ZKTecoK40V2:
             raise Exception("No hay conexión activa")
         
         try:
+            # Contador del dispositivo: no descarga la tabla de usuarios
+            try:
+                self.conn.read_sizes()
+                return self.conn.users
+            except Exception as e0:
+                logger.warning("Método read_sizes falló en get_user_count: %s", e0)
+            
             # Intentar diferentes métodos para obtener el conteo
             try:
                 users = self.conn.get_users()
                 return len(users) if users else 0
             except Exception as e1:
-                logger.warning(f"Método get_users falló en get_user_count: {e1}")
+                logger.warning("Método get_users falló en get_user_count: %s", e1)
                 
                 try:
                     users = self.conn.get_user_list()
                     return len(users) if users else 0
                 except Exception as e2:
-                    logger.warning(f"Método get_user_list falló en get_user_count: {e2}")
+                    logger.warning("Método get_user_list falló en get_user_count: %s", e2)
                     
                     try:
                         users = self.conn.get_users_info()
                         return len(users) if users else 0
                     except Exception as e3:
-                        logger.error(f"Todos los métodos fallaron en get_user_count: {e3}")
+                        logger.error("Todos los métodos fallaron en get_user_count: %s", e3)
                         return 0
         except Exception as e:
-            logger.error(f"Error al obtener cantidad de usuarios: {e}")
+            logger.error("Error al obtener cantidad de usuarios: %s", e)
             return 0
     
     def get_user_list(self, start_index: int = 0, count: int = 3000, include_fingerprints: bool = False) -> List[Dict[str, Any]]:
@@ -331,23 +307,23 @@ class ZKTecoK40V2:
             # Método 1: get_users
             try:
                 users = self.conn.get_users()
-                logger.info(f"Usuarios obtenidos con get_users: {len(users) if users else 0}")
+                logger.info("Usuarios obtenidos con get_users: %s", len(users) if users else 0)
             except Exception as e1:
-                logger.warning(f"Método get_users falló: {e1}")
+                logger.warning("Método get_users falló: %s", e1)
                 
                 # Método 2: get_user_list
                 try:
                     users = self.conn.get_user_list()
-                    logger.info(f"Usuarios obtenidos con get_user_list: {len(users) if users else 0}")
+                    logger.info("Usuarios obtenidos con get_user_list: %s", len(users) if users else 0)
                 except Exception as e2:
-                    logger.warning(f"Método get_user_list falló: {e2}")
+                    logger.warning("Método get_user_list falló: %s", e2)
                     
                     # Método 3: get_users_info
                     try:
                         users = self.conn.get_users_info()
-                        logger.info(f"Usuarios obtenidos con get_users_info: {len(users) if users else 0}")
+                        logger.info("Usuarios obtenidos con get_users_info: %s", len(users) if users else 0)
                     except Exception as e3:
-                        logger.error(f"Todos los métodos de obtención de usuarios fallaron: {e3}")
+                        logger.error("Todos los métodos de obtención de usuarios fallaron: %s", e3)
                         return []
             
             if not users:
@@ -366,7 +342,7 @@ class ZKTecoK40V2:
                 start_index = max(0, total_users - count)
                 end_index = total_users
             
-            logger.info(f"Procesando usuarios {start_index} a {end_index} de {total_users} totales")
+            logger.info("Procesando usuarios %s a %s de %s totales", start_index, end_index, total_users)
             
             for user in users[start_index:end_index]:
                 try:
@@ -398,7 +374,7 @@ class ZKTecoK40V2:
                                 except:
                                     fingerprint_count = 0
                         except Exception as e:
-                            logger.warning(f"No se pudo obtener huellas para usuario {user.uid}: {e}")
+                            logger.warning("No se pudo obtener huellas para usuario %s: %s", user.uid, e)
                             fingerprint_count = 0
                     
                     user_info = {
@@ -414,14 +390,14 @@ class ZKTecoK40V2:
                     }
                     user_list.append(user_info)
                 except Exception as user_error:
-                    logger.warning(f"Error al procesar usuario individual: {user_error}")
+                    logger.warning("Error al procesar usuario individual: %s", user_error)
                     continue
             
-            logger.info(f"Total de usuarios procesados: {len(user_list)}")
+            logger.info("Total de usuarios procesados: %s", len(user_list))
             return user_list
             
         except Exception as e:
-            logger.error(f"Error al obtener lista de usuarios: {e}")
+            logger.error("Error al obtener lista de usuarios: %s", e)
             
             # Intentar con conexión temporal como respaldo
             if "TCP packet invalid" in str(e) or "unpack requires" in str(e):
@@ -429,7 +405,7 @@ class ZKTecoK40V2:
                 try:
                     return self._get_users_with_temp_connection()
                 except Exception as temp_error:
-                    logger.error(f"Error con conexión temporal: {temp_error}")
+                    logger.error("Error con conexión temporal: %s", temp_error)
             
             return []
     
@@ -465,14 +441,14 @@ class ZKTecoK40V2:
                     }
                     user_list.append(user_info)
                 except Exception as user_error:
-                    logger.warning(f"Error al procesar usuario en conexión temporal: {user_error}")
+                    logger.warning("Error al procesar usuario en conexión temporal: %s", user_error)
                     continue
             
-            logger.info(f"Usuarios obtenidos con conexión temporal: {len(user_list)}")
+            logger.info("Usuarios obtenidos con conexión temporal: %s", len(user_list))
             return user_list
             
         except Exception as e:
-            logger.error(f"Error en conexión temporal: {e}")
+            logger.error("Error en conexión temporal: %s", e)
             return []
         finally:
             if temp_conn:
@@ -504,7 +480,7 @@ class ZKTecoK40V2:
             uid = int(uid)
             
             # MÉTODO 2: Usar set_user con parámetros individuales
-            logger.info(f"Probando Método 2: set_user con parámetros individuales para {name} (UID: {uid})")
+            logger.info("Probando Método 2: set_user con parámetros individuales para %s (UID: %s)", name, uid)
             
             # Intentar guardar los cambios usando set_user con parámetros individuales
             success = self.conn.set_user(
@@ -518,11 +494,16 @@ class ZKTecoK40V2:
             
             # IMPORTANTE: Aunque set_user devuelva False, sabemos que funciona en el dispositivo
             # Por lo tanto, si no hay excepción, consideramos que fue exitoso
-            logger.info(f"[OK] Método 2 EXITOSO: Usuario {name} (UID: {uid}) actualizado correctamente (set_user devolvió: {success})")
+            logger.info("[OK] Método 2 EXITOSO: Usuario %s (UID: %s) actualizado correctamente (set_user devolvió: %s)", name, uid, success)
+            
+            # Reflejar el cambio en el espejo local de usuarios
+            from espejo_usuarios_zkteco import espejo_de
+            espejo_de(self).actualizar_usuario(uid, name=name, privilege=privilege,
+                                               group_id=group_id, user_id=user_id)
             return True
                 
         except Exception as e:
-            logger.error(f"[ERROR] Método 2 FALLÓ con excepción: {e}")
+            logger.error("[ERROR] Método 2 FALLÓ con excepción: %s", e)
             return False
     
     def get_attendance_logs(self, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
@@ -546,36 +527,45 @@ class ZKTecoK40V2:
             # Método 1: get_attendance
             try:
                 attendance_logs = self.conn.get_attendance()
-                logger.info(f"Logs obtenidos con get_attendance: {len(attendance_logs) if attendance_logs else 0}")
+                logger.info("Logs obtenidos con get_attendance: %s", len(attendance_logs) if attendance_logs else 0)
             except Exception as e1:
-                logger.warning(f"Método get_attendance falló: {e1}")
+                logger.warning("Método get_attendance falló: %s", e1)
                 
                 # Método 2: get_attendance_logs
                 try:
                     attendance_logs = self.conn.get_attendance_logs()
-                    logger.info(f"Logs obtenidos con get_attendance_logs: {len(attendance_logs) if attendance_logs else 0}")
+                    logger.info("Logs obtenidos con get_attendance_logs: %s", len(attendance_logs) if attendance_logs else 0)
                 except Exception as e2:
-                    logger.warning(f"Método get_attendance_logs falló: {e2}")
+                    logger.warning("Método get_attendance_logs falló: %s", e2)
                     
                     # Método 3: get_logs
                     try:
                         attendance_logs = self.conn.get_logs()
-                        logger.info(f"Logs obtenidos con get_logs: {len(attendance_logs) if attendance_logs else 0}")
+                        logger.info("Logs obtenidos con get_logs: %s", len(attendance_logs) if attendance_logs else 0)
                     except Exception as e3:
-                        logger.error(f"Todos los métodos de obtención de logs fallaron: {e3}")
+                        logger.error("Todos los métodos de obtención de logs fallaron: %s", e3)
                         return []
             
             if not attendance_logs:
                 logger.warning("No se encontraron registros de asistencia")
                 return []
             
+            # El protocolo no filtra por fecha: se descartan aquí los registros fuera de rango
+            desde = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            hasta = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+            
             logs = []
             
             for log in attendance_logs:
                 try:
+                    timestamp = getattr(log, 'timestamp', 0)
+                    if (desde or hasta) and isinstance(timestamp, datetime):
+                        if (desde and timestamp < desde) or (hasta and timestamp >= hasta):
+                            continue
+                    
                     log_info = {
                         'user_id': getattr(log, 'user_id', 'N/A'),
-                        'timestamp': getattr(log, 'timestamp', 0),
+                        'timestamp': timestamp,
                         'status': getattr(log, 'status', 'N/A'),
                         'punch': getattr(log, 'punch', 0),  # 0=Entrada, 1=Salida
                         'uid': getattr(log, 'uid', 'N/A'),
@@ -583,16 +573,34 @@ class ZKTecoK40V2:
                     }
                     logs.append(log_info)
                 except Exception as log_error:
-                    logger.warning(f"Error al procesar log individual: {log_error}")
+                    logger.warning("Error al procesar log individual: %s", log_error)
                     continue
             
-            logger.info(f"Total de logs procesados: {len(logs)}")
+            logger.info("Total de logs procesados: %s", len(logs))
             return logs
             
         except Exception as e:
-            logger.error(f"Error al obtener registros de asistencia: {e}")
+            logger.error("Error al obtener registros de asistencia: %s", e)
             return []
     
+    def get_attendance_count(self) -> Optional[int]:
+        """
+        Obtener la cantidad de registros de asistencia sin descargarlos
+        
+        Returns:
+            Cantidad de registros en el dispositivo o None si hay error
+        """
+        if not self.conn:
+            raise Exception("No hay conexión activa")
+        
+        try:
+            # read_sizes actualiza los contadores de usuarios/huellas/registros
+            self.conn.read_sizes()
+            return self.conn.records
+        except Exception as e:
+            logger.warning("No se pudo obtener la cantidad de registros: %s", e)
+            return None
+    
     def get_device_time(self) -> Optional[datetime]:
         """
         Obtener la hora actual del dispositivo
@@ -607,10 +615,10 @@ class ZKTecoK40V2:
         try:
             # Intentar obtener la hora del dispositivo
             device_time = self.conn.get_time()
-            logger.info(f"Hora del dispositivo: {device_time}")
+            logger.info("Hora del dispositivo: %s", device_time)
             return device_time
         except Exception as e:
-            logger.error(f"Error al obtener hora del dispositivo: {e}")
+            logger.error("Error al obtener hora del dispositivo: %s", e)
             return None
     
     def set_device_time(self, new_time: datetime) -> bool:
@@ -630,10 +638,10 @@ class ZKTecoK40V2:
         try:
             # Establecer la hora del dispositivo
             self.conn.set_time(new_time)
-            logger.info(f"Hora del dispositivo establecida a: {new_time}")
+            logger.info("Hora del dispositivo establecida a: %s", new_time)
             return True
         except Exception as e:
-            logger.error(f"Error al establecer hora del dispositivo: {e}")
+            logger.error("Error al establecer hora del dispositivo: %s", e)
             return False
     
     def restart(self) -> bool:
@@ -653,7 +661,7 @@ class ZKTecoK40V2:
             logger.info("Dispositivo reiniciado exitosamente")
             return True
         except Exception as e:
-            logger.error(f"Error al reiniciar dispositivo: {e}")
+            logger.error("Error al reiniciar dispositivo: %s", e)
             return False
     
     def clear_attendance(self) -> bool:
@@ -673,7 +681,7 @@ class ZKTecoK40V2:
             logger.info("Registros de asistencia limpiados exitosamente")
             return True
         except Exception as e:
-            logger.error(f"Error al limpiar registros de asistencia: {e}")
+            logger.error("Error al limpiar registros de asistencia: %s", e)
             return False
     
     def clear_users(self) -> bool:
@@ -688,21 +696,25 @@ class ZKTecoK40V2:
             return False
         
         try:
+            # El espejo local de usuarios deja de ser válido
+            from espejo_usuarios_zkteco import espejo_de
+            espejo_de(self).invalidar()
+            
             # Obtener lista de usuarios primero
             users = self.conn.get_users()
             if not users:
                 logger.info("No hay usuarios para limpiar")
                 return True
             
-            logger.info(f"Encontrados {len(users)} usuarios para eliminar")
+            logger.info("Encontrados %s usuarios para eliminar", len(users))
             
-            # Debug: inspeccionar estructura del primer usuario
-            if users:
+            # Debug: inspeccionar estructura del primer usuario (dir() solo si se va a registrar)
+            if users and logger.isEnabledFor(logging.DEBUG):
                 first_user = users[0]
-                logger.debug(f"Estructura del primer usuario: {type(first_user)}")
-                logger.debug(f"Atributos del primer usuario: {dir(first_user)}")
+                logger.debug("Estructura del primer usuario: %s", type(first_user))
+                logger.debug("Atributos del primer usuario: %s", dir(first_user))
                 if hasattr(first_user, '__dict__'):
-                    logger.debug(f"Dict del primer usuario: {first_user.__dict__}")
+                    logger.debug("Dict del primer usuario: %s", first_user.__dict__)
             
             # Intentar primero con clear_all_users si está disponible
             try:
@@ -714,7 +726,7 @@ class ZKTecoK40V2:
                     else:
                         logger.warning("clear_all_users() falló, intentando eliminación individual")
             except Exception as e:
-                logger.warning(f"clear_all_users() no disponible o falló: {e}")
+                logger.warning("clear_all_users() no disponible o falló: %s", e)
             
             # Eliminar cada usuario individualmente
             deleted_count = 0
@@ -731,29 +743,29 @@ class ZKTecoK40V2:
                     else:
                         # Si no podemos obtener el user_id, usar el índice
                         user_id = i
-                        logger.warning(f"No se pudo obtener user_id para usuario {i}, usando índice")
+                        logger.warning("No se pudo obtener user_id para usuario %s, usando índice", i)
                     
-                    logger.debug(f"Intentando eliminar usuario {user_id}")
+                    logger.debug("Intentando eliminar usuario %s", user_id)
                     
                     if self.conn.delete_user(user_id):
                         deleted_count += 1
-                        logger.debug(f"[OK] Usuario {user_id} eliminado")
+                        logger.debug("[OK] Usuario %s eliminado", user_id)
                     else:
-                        logger.warning(f"[ERROR] No se pudo eliminar usuario {user_id}")
+                        logger.warning("[ERROR] No se pudo eliminar usuario %s", user_id)
                         
                 except Exception as e:
-                    logger.warning(f"Error al eliminar usuario {i}: {e}")
+                    logger.warning("Error al eliminar usuario %s: %s", i, e)
             
-            logger.info(f"Usuarios limpiados: {deleted_count} de {len(users)} eliminados exitosamente")
+            logger.info("Usuarios limpiados: %s de %s eliminados exitosamente", deleted_count, len(users))
             return deleted_count > 0 or len(users) == 0
             
         except Exception as e:
-            logger.error(f"Error al limpiar usuarios: {e}")
+            logger.error("Error al limpiar usuarios: %s", e)
             return False
 
 def test_connection(ip_address: str, port: int = 4370) -> bool:
     """
-    Probar conexión básica con el dispositivo usando ping silencioso
+    Probar conexión básica con el dispositivo usando sondeo silencioso
     
     Args:
         ip_address: Dirección IP del dispositivo
@@ -765,14 +777,14 @@ def test_connection(ip_address: str, port: int = 4370) -> bool:
     try:
         # Primero verificar conectividad de red de forma silenciosa
         if not test_network_connectivity(ip_address, port):
-            logger.warning(f"No hay conectividad de red con {ip_address}:{port}")
+            logger.warning("No hay conectividad de red con %s:%s", ip_address, port)
             return False
         
         # Si hay conectividad de red, intentar conectar al dispositivo
         device = ZKTecoK40V2(ip_address, port)
         return device.connect()
     except Exception as e:
-        logger.error(f"Error en prueba de conexión: {e}")
+        logger.error("Error en prueba de conexión: %s", e)
         return False
     finally:
         if 'device' in locals() and device.conn: